@@ -1,5 +1,17 @@
+import argparse
 import os
 import re
+import time
+from contextlib import ExitStack
+
+from finnish_matcher import FinnishMatcher
+from finnish_profile import DEFAULT_TOP_FILES, ScanProfile, profile_path
+from finnish_scanner import Scanner, filter_by_score
+from finnish_sourcemap import SourceMapCache
+from finnish_watch import watch
+from finnish_writers import (
+    GroupedTextWriter, JsonLinesWriter, SarifWriter, open_replacing, write_findings,
+)
 
 # Directory where Finnish text is searched for
 PROJECT_DIR = os.getcwd()
@@ -20,112 +32,172 @@ FINNISH_WORDS = [
 ]
 
 # Regular expressions for detecting Finnish text
-FINNISH_PATTERNS = [
+FINNISH_CHAR_PATTERNS = [
     r'//.*[{}]'.format(FINNISH_CHARS),  # JavaScript/TypeScript comments with Finnish chars
     r'#.*[{}]'.format(FINNISH_CHARS),   # Python comments with Finnish chars
     r'"[^"]*[{}][^"]*"'.format(FINNISH_CHARS),  # Strings with Finnish characters
     r"'[^']*[{}][^']*'".format(FINNISH_CHARS),  # Same with single quotes
+]
+FINNISH_PATTERNS = FINNISH_CHAR_PATTERNS + [
     r'\b(?:' + '|'.join(FINNISH_WORDS) + r')\b'  # Specific Finnish words
 ]
 
-# Combine all patterns
-FINNISH_REGEX = re.compile('|'.join(FINNISH_PATTERNS), re.IGNORECASE)
+# Character patterns only run on lines with Finnish characters; the word list
+# is compiled into a single automaton
+FINNISH_MATCHER = FinnishMatcher(
+    FINNISH_CHAR_PATTERNS, FINNISH_WORDS, re.IGNORECASE, required_chars=FINNISH_CHARS
+)
+
+# Scan cache kept next to the report; only changed files are re-scanned
+CACHE_FILE = ".cascade_finnish_cache.sqlite"
 
-# Paths to exclude (node_modules, dist, etc.)
+# Paths to exclude (node_modules, dist, etc.), in .gitignore syntax
 EXCLUDE_PATHS = [
-    'node_modules',
-    '.git',
-    'test/results',
+    'node_modules/',
+    '.git/',
+    'test/results/',
     'cascade_finnish_finder.py',
     'finnish_finder.py',
     'cascade_finnish_report.txt',
     'finnish_content_report.txt'
 ]
 
-def should_exclude(path):
-    """Check if the path should be excluded from scanning."""
-    for exclude in EXCLUDE_PATHS:
-        if exclude in path:
-            return True
-    return False
-
-def find_finnish_in_file(file_path):
-    """Identify Finnish words and comments in a file."""
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-            lines = file.readlines()
-        
-        finnish_lines = []
-        for i, line in enumerate(lines, start=1):
-            if FINNISH_REGEX.search(line):
-                finnish_lines.append((i, line.strip()))
-
-        return finnish_lines
-    except Exception as e:
-        return [(0, f"Error reading file: {str(e)}")]
-
-def write_report_header(report):
-    """Write the initial report header."""
-    report.write("Finnish Content Report\n")
-    report.write("=" * 50 + "\n\n")
-    report.write("This report shows files containing Finnish text that needs translation.\n\n")
-
-def process_finnish_findings(report, finnish_lines, file_path):
-    """Process and write findings for a single file."""
-    report.write(f"\nFile: {file_path}\n")
-    report.write("-" * 50 + "\n")
-    for line_num, text in finnish_lines:
-        report.write(f"{line_num}: {text}\n")
-    return len(finnish_lines)
-
-def scan_dist_directory(report, dist_dir):
-    """Scan the dist directory for Finnish content."""
-    total_found = 0
-    files_with_finnish = 0
-    
-    report.write("Scanning dist directory for Finnish content...\n\n")
-    
-    for root, _, files in os.walk(dist_dir):
-        for file in files:
-            if not file.endswith('.js'):
-                continue
-                
-            file_path = os.path.join(root, file)
-            finnish_lines = find_finnish_in_file(file_path)
-            
-            if finnish_lines:
-                files_with_finnish += 1
-                total_found += process_finnish_findings(report, finnish_lines, file_path)
-    
-    return total_found, files_with_finnish
-
-def write_report_summary(report, total_found, files_with_finnish):
-    """Write the final summary to the report."""
-    report.write("\n" + "=" * 50 + "\n")
-    report.write(
-        f"Summary: Found {total_found} Finnish occurrences in "
-        f"{files_with_finnish} files in the dist directory.\n"
-    )
-
-def scan_project_for_finnish():
-    """Scan all files and search for Finnish text."""
+def create_scanner(use_cache=True, profile=None):
+    """Create a Scanner for the JavaScript files of the dist directory.
+
+    Tarballs, zips and .gz/.br files are scanned too, member by member.
+    With profile set to a number N, the scanner records a ScanProfile that
+    lists the N most expensive files.
+    """
+    cache_path = os.path.join(PROJECT_DIR, CACHE_FILE) if use_cache else None
+    scan_profile = ScanProfile(FINNISH_MATCHER, profile) if profile else None
+    return Scanner(FINNISH_MATCHER, ('.js',), EXCLUDE_PATHS, cache_path=cache_path, archives=True,
+                   profile=scan_profile)
+
+def resolve_findings(findings, min_score=None, map_cache=None):
+    """Apply the optional score filter and source map resolution to dist findings."""
+    findings = filter_by_score(findings, min_score)
+    if map_cache is not None:
+        findings = map_cache.resolve_findings(findings)
+    return findings
+
+def scan_dist_directory(dist_dir, writers, scanner=None, min_score=None, source_maps=True):
+    """Scan the dist directory for Finnish content and stream it to the writers.
+
+    With source_maps set, hits are also resolved to their original source
+    through the .js.map files of the bundles.
+    """
+    if scanner is None:
+        scanner = create_scanner()
+    map_cache = SourceMapCache() if source_maps else None
+    return write_findings(resolve_findings(scanner.scan(dist_dir), min_score, map_cache), writers)
+
+def write_reports(findings, dist_exists, jsonl_path=None, sarif_path=None):
+    """Write the report and any extra outputs from a finding stream; return the summary.
+
+    Each file is replaced only once it is complete.
+    """
     report_path = os.path.join(PROJECT_DIR, "cascade_finnish_report.txt")
-    total_found = 0
-    files_with_finnish = 0
-    
-    with open(report_path, 'w', encoding='utf-8') as report:
-        write_report_header(report)
-        
-        dist_dir = os.path.join(PROJECT_DIR, 'dist')
-        if os.path.exists(dist_dir):
-            total_found, files_with_finnish = scan_dist_directory(report, dist_dir)
-        else:
-            report.write("Dist directory not found. The project may not be built yet.\n\n")
-
-        write_report_summary(report, total_found, files_with_finnish)
+    with ExitStack() as stack:
+        report = stack.enter_context(open_replacing(report_path))
+        intro = (
+            "Scanning dist directory for Finnish content...\n\n" if dist_exists
+            else "Dist directory not found. The project may not be built yet.\n\n"
+        )
+        writers = [GroupedTextWriter(report, intro, location="the dist directory")]
+        if jsonl_path:
+            writers.append(JsonLinesWriter(stack.enter_context(open_replacing(jsonl_path))))
+        if sarif_path:
+            sarif = stack.enter_context(open_replacing(sarif_path))
+            writers.append(SarifWriter(sarif, tool_name="cascade-finnish-finder"))
+        summary = write_findings(findings, writers)
+    return report_path, summary
+
+def scan_project_for_finnish(use_cache=True, jsonl_path=None, sarif_path=None, min_score=None,
+                             source_maps=True, dist_dir=None, profile=None):
+    """Scan all files and search for Finnish text.
+
+    dist_dir may also be a build artifact such as dist.tar.gz or dist.zip.
+    With profile set to a number N, a profile listing the N most expensive
+    files is written next to the report.
+    """
+    dist_dir = dist_dir or os.path.join(PROJECT_DIR, 'dist')
+    dist_exists = os.path.exists(dist_dir)
+    scanner = create_scanner(use_cache, profile)
+    findings = scanner.scan(dist_dir) if dist_exists else []
+    findings = resolve_findings(findings, min_score, SourceMapCache() if source_maps else None)
+    report_path, summary = write_reports(findings, dist_exists, jsonl_path, sarif_path)
 
     print(f"Report saved to: {report_path}")
-    print(f"Found {total_found} Finnish occurrences in {files_with_finnish} files in the dist directory.")
+    print(f"Found {summary['findings']} Finnish occurrences in {summary['files']} files in the dist directory.")
+    if scanner.profile and dist_exists:
+        scanner.profile.write(profile_path(report_path), scanner.stats)
+
+def watch_project_for_finnish(use_cache=True, jsonl_path=None, sarif_path=None,
+                              poll_interval=None, min_score=None, source_maps=True,
+                              dist_dir=None):
+    """Keep the report up to date while the dist directory changes, until interrupted."""
+    dist_dir = dist_dir or os.path.join(PROJECT_DIR, 'dist')
+    # Shared between updates; maps are reloaded only when they change
+    map_cache = SourceMapCache() if source_maps else None
+
+    def on_update(findings, files, elapsed):
+        dist_exists = os.path.exists(dist_dir)
+        findings = resolve_findings(findings, min_score, map_cache)
+        report_path, summary = write_reports(findings, dist_exists, jsonl_path, sarif_path)
+        print(
+            f"[{time.strftime('%H:%M:%S')}] Scanned {files} files, updated {report_path} "
+            f"in {elapsed:.2f}s: {summary['findings']} Finnish occurrences in "
+            f"{summary['files']} files in the dist directory."
+        )
+
+    print(f"Watching {dist_dir} for changes, press Ctrl+C to stop.")
+    try:
+        watch(create_scanner(use_cache), dist_dir, on_update, poll_interval)
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Scan the dist directory for Finnish text.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"Re-scan every file instead of using {CACHE_FILE}")
+    parser.add_argument("--jsonl", metavar="FILE",
+                        help="Also write the findings as JSON lines to FILE")
+    parser.add_argument("--sarif", metavar="FILE",
+                        help="Also write the findings as a SARIF log to FILE")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and rescan files of the dist directory as they change")
+    parser.add_argument("--poll-interval", type=float, metavar="SECONDS",
+                        help="With --watch, poll for changes instead of using inotify")
+    parser.add_argument("--min-score", type=float, metavar="SCORE",
+                        help="Only report findings with a Finnish likelihood score (0-1) "
+                             "of at least SCORE, e.g. 0.5 (needs NumPy)")
+    parser.add_argument("--no-source-maps", action="store_true",
+                        help="Do not resolve hits to their original source through .js.map files")
+    parser.add_argument("--profile", type=int, nargs="?", const=DEFAULT_TOP_FILES, metavar="N",
+                        help="Time walking, reading and matching (and each pattern), list the "
+                             f"N most expensive files (default: {DEFAULT_TOP_FILES}) and write "
+                             "them to a .profile.json file next to the report")
+    parser.add_argument("--dist", metavar="PATH",
+                        help="Directory or archive (.tar, .tar.gz, .tgz, .zip, .gz) to scan "
+                             "instead of ./dist")
+    args = parser.parse_args()
+    if args.watch and args.dist and os.path.isfile(args.dist):
+        parser.error("--watch needs a directory, not an archive")
+    if args.watch and args.profile:
+        parser.error("--profile cannot be combined with --watch")
+    return args
 
 if __name__ == "__main__":
-    scan_project_for_finnish()
+    args = parse_args()
+    if args.watch:
+        watch_project_for_finnish(use_cache=not args.no_cache, jsonl_path=args.jsonl,
+                                  sarif_path=args.sarif, poll_interval=args.poll_interval,
+                                  min_score=args.min_score, source_maps=not args.no_source_maps,
+                                  dist_dir=args.dist)
+    else:
+        scan_project_for_finnish(use_cache=not args.no_cache, jsonl_path=args.jsonl,
+                                 sarif_path=args.sarif, min_score=args.min_score,
+                                 source_maps=not args.no_source_maps, dist_dir=args.dist,
+                                 profile=args.profile)
@@ -0,0 +1,226 @@
+"""Streaming archive support for the Finnish text scanners.
+
+Tarballs (``.tar``, ``.tar.gz``, ``.tgz``), ``.zip`` files and single
+compressed files (``.gz``, and ``.br`` when the ``brotli`` module is
+installed) are scanned without extracting anything to disk: each member is
+decompressed block by block straight into the reader, so memory stays
+bounded by the reader's block size whatever the archive holds.
+
+Members are filtered by a ``MemberFilter``: the same file extensions and
+gitignore-style exclusions as plain files, matched against the member path
+inside the archive (``.gitignore`` files in an archive are not read).
+Members that are themselves compressed (``dist/app.js.gz`` inside a tarball) are
+decompressed as well, nested tarballs and zips are not opened.  Findings in
+a member carry its name and are reported as ``archive!member``.
+
+Tarballs are read as a stream, in member order.  A zip has its directory at
+the end, so it is read with seeks; when a content hash is wanted the zip is
+hashed in a separate sequential pass first.
+"""
+import gzip
+import os
+import tarfile
+import zipfile
+
+from finnish_lexer import create_lexer
+from finnish_reader import CHUNK_SIZE, iter_findings, read_blocks
+from finnish_walker import IgnoreRules
+
+# Separates the archive path from the member name in reported paths
+MEMBER_SEPARATOR = "!"
+
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz")
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+# Suffixes the walker has to let through for archive_type() to look at
+ARCHIVE_SUFFIXES = TAR_SUFFIXES + (".zip",) + COMPRESSED_SUFFIXES
+
+# Compressed bytes given to a Brotli decompressor without an output limit at
+# a time, and the expansion it may reach before the stream is rejected
+BROTLI_INPUT_SIZE = 64 * 1024
+MAX_BROTLI_RATIO = 1000
+
+
+def archive_type(path):
+    """Return "tar", "zip", "gz" or "br" for an archive or compressed file, else None."""
+    if path.endswith(TAR_SUFFIXES):
+        return "tar"
+    if path.endswith(".zip"):
+        return "zip"
+    if path.endswith(COMPRESSED_SUFFIXES):
+        return path[-2:]
+    return None
+
+
+def is_wanted_member(name, extensions=None):
+    """Check whether a member (or the content of a compressed one) has one of the extensions."""
+    kind = archive_type(name)
+    if kind in ("tar", "zip"):
+        return False
+    if kind:
+        name = name[:-3]
+    return not extensions or name.endswith(extensions)
+
+
+def is_wanted_file(path, extensions=None):
+    """Check a file name like is_wanted_member(), but accept every tarball and zip."""
+    return archive_type(path) in ("tar", "zip") or is_wanted_member(path, extensions)
+
+
+def archive_path(path):
+    """Return the archive part of an ``archive!member`` path, or the path itself."""
+    index = path.find(MEMBER_SEPARATOR)
+    while index >= 0:
+        if archive_type(path[:index]):
+            return path[:index]
+        index = path.find(MEMBER_SEPARATOR, index + 1)
+    return path
+
+
+class MemberFilter:
+    """Decide which archive members are scanned, by extension and exclude patterns."""
+
+    def __init__(self, extensions=None, exclude=()):
+        self.extensions = tuple(extensions) if extensions else None
+        self.exclude = list(exclude)
+        self.rules = IgnoreRules.from_patterns(self.exclude)
+        # Archive findings depend on it, so it is part of the scan cache fingerprint
+        self.signature = repr((self.extensions, self.exclude))
+
+    def __call__(self, name):
+        if name.startswith("./"):
+            name = name[2:]
+        return is_wanted_member(name, self.extensions) and not self.rules.is_path_ignored(name)
+
+
+class HashingReader:
+    """Read-only file wrapper that feeds every byte read to a hasher."""
+
+    def __init__(self, raw, hasher):
+        self.raw = raw
+        self.hasher = hasher
+
+    def read(self, size=-1):
+        data = self.raw.read(size)
+        self.hasher.update(data)
+        return data
+
+
+class BrotliReader:
+    """Read-only file object decompressing a Brotli stream as it is read.
+
+    Each step decompresses at most ``CHUNK_SIZE`` bytes when the ``brotli``
+    module supports ``output_buffer_limit``.  Older versions decompress a
+    whole input block at once, so input is fed in ``BROTLI_INPUT_SIZE``
+    pieces and a stream expanding more than ``MAX_BROTLI_RATIO`` times is
+    rejected.
+    """
+
+    def __init__(self, raw):
+        # Only needed for .br files
+        import brotli
+        self.raw = raw
+        self.decompressor = brotli.Decompressor()
+        self.limited = hasattr(self.decompressor, "can_accept_more_data")
+        self.buffer = bytearray()
+        # Start of the unread part of buffer
+        self.offset = 0
+        self.read_in = 0
+        self.written = 0
+        self.eof = False
+
+    def _decompress(self):
+        if self.limited:
+            data = b""
+            if self.decompressor.can_accept_more_data():
+                data = self.raw.read(CHUNK_SIZE)
+                if not data:
+                    self.eof = True
+                    return
+            output = self.decompressor.process(data, output_buffer_limit=CHUNK_SIZE)
+        else:
+            data = self.raw.read(BROTLI_INPUT_SIZE)
+            if not data:
+                self.eof = True
+                return
+            output = self.decompressor.process(data)
+            self.read_in += len(data)
+            self.written += len(output)
+            if self.written > MAX_BROTLI_RATIO * self.read_in + CHUNK_SIZE:
+                raise ValueError(f"Brotli stream expands more than {MAX_BROTLI_RATIO} times")
+        if self.offset:
+            del self.buffer[:self.offset]
+            self.offset = 0
+        self.buffer += output
+
+    def read(self, size=-1):
+        while not self.eof and (size < 0 or len(self.buffer) - self.offset < size):
+            self._decompress()
+        end = len(self.buffer) if size < 0 else min(self.offset + size, len(self.buffer))
+        data = bytes(self.buffer[self.offset:end])
+        self.offset = end
+        return data
+
+
+def _member_findings(file_obj, name, matcher, member=None, timer=None):
+    """Yield ``(line_number, column, context, member)`` for one member named name.
+
+    ``member`` is the name reported, by default name itself.
+    """
+    kind = archive_type(name)
+    if kind == "gz":
+        file_obj = gzip.GzipFile(fileobj=file_obj, mode="rb")
+    elif kind == "br":
+        file_obj = BrotliReader(file_obj)
+    lexer = create_lexer(name[:-3] if kind else name, matcher)
+    for line, column, context in iter_findings(file_obj, matcher, lexer=lexer, timer=timer):
+        yield line, column, context, member or name
+
+
+def iter_archive_findings(file_path, matcher, hasher=None, members=None, timer=None):
+    """Yield ``(line_number, column, context, member)`` for the wanted members of an archive.
+
+    ``members`` is a MemberFilter; without one every member that is not
+    itself an archive is scanned.  If ``hasher`` is given it is updated with
+    every byte of the archive file, like iter_findings() does for plain files,
+    and ``timer`` adds up the time spent reading and decompressing.
+    """
+    if members is None:
+        members = is_wanted_member
+    kind = archive_type(file_path)
+    with open(file_path, "rb") as f:
+        if kind == "zip":
+            if hasher is not None:
+                blocks = read_blocks(f, hasher)
+                for _ in (blocks if timer is None else timer.timed(blocks)):
+                    pass
+                f.seek(0)
+            with zipfile.ZipFile(f) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and members(info.filename):
+                        with archive.open(info) as member:
+                            yield from _member_findings(member, info.filename, matcher,
+                                                        timer=timer)
+            return
+
+        raw = f if hasher is None else HashingReader(f, hasher)
+        if kind == "tar":
+            with tarfile.open(fileobj=raw, mode="r|*") as archive:
+                for info in archive:
+                    if info.isfile() and members(info.name):
+                        yield from _member_findings(archive.extractfile(info), info.name,
+                                                    matcher, timer=timer)
+        else:
+            # A single compressed file; its member is the file it decompresses to
+            name = os.path.basename(file_path)
+            yield from _member_findings(raw, name, matcher, name[:-3], timer)
+
+        if hasher is not None:
+            # Hash whatever the decompressor left unread, such as tar padding
+            for _ in read_blocks(raw):
+                pass
+
+
+def scan_archive(file_path, matcher, hasher=None, members=None, timer=None):
+    """Return the findings of an archive as a list."""
+    return list(iter_archive_findings(file_path, matcher, hasher, members, timer))
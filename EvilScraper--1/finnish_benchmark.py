@@ -0,0 +1,326 @@
+"""Benchmarks for the Finnish text scanners.
+
+A corpus is generated from a seed, so every run scans the same bytes:
+
+- ``src/``: many small source files, about one in ten with Finnish text
+- ``deep/``: a narrow tree tens of directories deep
+- ``dist/``: minified bundles that are one huge line each, plus small chunks
+- ``quotes/``: lines full of unbalanced quotes around Finnish characters,
+  the worst case for the string patterns
+- ``node_modules/``: files that must be pruned, not scanned
+
+``finnish_finder.find_finnish_text`` and
+``cascade_finnish_finder.scan_dist_directory`` are timed over the corpus.
+Every run happens in a fresh process so its peak RSS is its own.  Wall time,
+files/s, MB/s and peak RSS are printed and saved as JSON, one file per run,
+so results can be compared over time.
+
+    python finnish_benchmark.py --scale 2 --repeat 5
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from multiprocessing import get_context
+
+CORPUS_VERSION = 1
+MANIFEST_FILE = "corpus.json"
+
+ASCII_WORDS = [
+    "request", "response", "error", "value", "provider", "timeout", "server",
+    "context", "length", "retry", "model", "fallback", "queue", "result",
+]
+FINNISH_WORDS = [
+    "pyyntö", "virhe", "yritä", "myöhemmin", "käytettävissä", "määrä", "välillä",
+    "palvelin", "syöte", "päätöksiä", "tarkista", "uudelleen", "sisältöä",
+]
+# Comment markers and file types of the small source files
+SOURCE_TYPES = {".ts": "//", ".js": "//", ".py": "#", ".sh": "#", ".md": ""}
+
+
+def sentence(rng, finnish):
+    """Return a few words, some of them Finnish when finnish is set."""
+    words = [rng.choice(ASCII_WORDS) for _ in range(rng.randint(3, 9))]
+    if finnish:
+        words[rng.randrange(len(words))] = rng.choice(FINNISH_WORDS)
+    return " ".join(words)
+
+
+def source_file(rng, extension, finnish):
+    """Return the text of a small source file of the given type."""
+    comment = SOURCE_TYPES[extension]
+    lines = []
+    for i in range(rng.randint(20, 200)):
+        hit = finnish and rng.random() < 0.05
+        kind = rng.random()
+        if comment and kind < 0.2:
+            lines.append(f"{comment} {sentence(rng, hit)}")
+        elif kind < 0.5:
+            lines.append(f'const message{i} = "{sentence(rng, hit)}";')
+        else:
+            lines.append(f"value{i} = compute({rng.randint(0, 1000)}, {rng.choice(ASCII_WORDS)});")
+    return "\n".join(lines) + "\n"
+
+
+def minified_bundle(rng, size, finnish):
+    """Return a single-line bundle of about size characters."""
+    parts = []
+    length = 0
+    while length < size:
+        text = sentence(rng, finnish and rng.random() < 0.001)
+        part = f'function {rng.choice("abcdefgh")}{length}(e,t){{return e?"{text}":t+{length}}}'
+        parts.append(part)
+        length += len(part) + 1
+    return ";".join(parts) + "\n"
+
+
+def quote_heavy_file(rng, lines, width):
+    """Return lines of unbalanced quotes with Finnish characters in between."""
+    pieces = ['"', "'", '"ä', "ö'", "a", " ", "//", "#", '\\"', "x'y"]
+    out = []
+    for _ in range(lines):
+        line = []
+        length = 0
+        while length < width:
+            piece = rng.choice(pieces)
+            line.append(piece)
+            length += len(piece)
+        out.append("".join(line))
+    return "\n".join(out) + "\n"
+
+
+def write_file(file_path, text):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def generate_corpus(root_dir, seed=0, scale=1):
+    """Write the benchmark corpus under root_dir and return its manifest.
+
+    The same seed and scale always produce the same files.  A corpus that
+    already matches is reused instead of being generated again.
+    """
+    manifest = {"version": CORPUS_VERSION, "seed": seed, "scale": scale}
+    manifest_path = os.path.join(root_dir, MANIFEST_FILE)
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            existing = json.load(f)
+        if {key: existing.get(key) for key in manifest} == manifest:
+            return existing
+    except (OSError, ValueError):
+        pass
+
+    rng = random.Random(seed)
+    files = {}
+
+    for i in range(1500 * scale):
+        extension = rng.choice(list(SOURCE_TYPES))
+        package = f"package{i % (20 * scale)}"
+        files[f"src/{package}/module{i}{extension}"] = source_file(rng, extension, rng.random() < 0.1)
+
+    deep_dir = "deep"
+    for depth in range(40):
+        deep_dir += f"/level{depth}"
+        for i in range(5 * scale):
+            files[f"{deep_dir}/file{i}.ts"] = source_file(rng, ".ts", rng.random() < 0.1)
+
+    for i in range(4 * scale):
+        files[f"dist/bundle{i}.min.js"] = minified_bundle(rng, 4 * 1024 * 1024, i % 2 == 0)
+    for i in range(300 * scale):
+        files[f"dist/chunks/chunk{i}.js"] = minified_bundle(rng, rng.randint(1000, 50000), rng.random() < 0.2)
+
+    for i in range(10 * scale):
+        files[f"quotes/quotes{i}.js"] = quote_heavy_file(rng, 500, 2000)
+
+    for i in range(200 * scale):
+        files[f"node_modules/dependency{i % 10}/index{i}.js"] = source_file(rng, ".js", True)
+
+    for rel_path, text in files.items():
+        write_file(os.path.join(root_dir, rel_path), text)
+
+    manifest["files"] = len(files)
+    manifest["bytes"] = sum(len(text.encode("utf-8")) for text in files.values())
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and its finished children, in MB.
+
+    ru_maxrss survives exec(), so a freshly spawned process would report the
+    peak of the process that forked it; on Linux VmHWM is used instead.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            own_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+    except (OSError, StopIteration):
+        own_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            # ru_maxrss is in bytes on macOS
+            own_kb //= 1024
+    children_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if sys.platform == "darwin":
+        children_kb //= 1024
+    return max(own_kb, children_kb) / 1024
+
+
+def run_finnish_finder(corpus_dir, jobs, cache_path):
+    import finnish_finder
+
+    files = finnish_finder.get_target_files(corpus_dir, finnish_finder.TARGET_EXTENSIONS)
+    started = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        results = finnish_finder.find_finnish_text(corpus_dir, jobs=jobs, cache_path=cache_path)
+    return time.perf_counter() - started, files, len(results)
+
+
+def run_cascade(corpus_dir, jobs, cache_path):
+    import cascade_finnish_finder as cascade
+    from finnish_scanner import Scanner
+
+    dist_dir = os.path.join(corpus_dir, "dist")
+    scanner = Scanner(cascade.FINNISH_MATCHER, (".js",), cascade.EXCLUDE_PATHS,
+                      jobs=jobs, cache_path=cache_path)
+    files = scanner.list_files(dist_dir)
+    started = time.perf_counter()
+    summary = cascade.scan_dist_directory(dist_dir, [], scanner)
+    return time.perf_counter() - started, files, summary["findings"] + summary["errors"]
+
+
+SCANNERS = {
+    "finnish_finder": run_finnish_finder,
+    "cascade_finnish_finder": run_cascade,
+}
+
+
+def run_once(scanner_name, corpus_dir, jobs, cache_path):
+    """Time one scan; runs in a fresh worker process."""
+    wall, files, findings = SCANNERS[scanner_name](corpus_dir, jobs, cache_path)
+    return {
+        "wall_s": wall,
+        "files": len(files),
+        "bytes": sum(os.path.getsize(file_path) for file_path in files),
+        "findings": findings,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def in_fresh_process(*args):
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(run_once, *args).result()
+
+
+def benchmark(name, scanner_name, corpus_dir, repeat, jobs=1, cache_path=None):
+    """Run a scanner repeat times and summarise the runs by their median wall time.
+
+    With cache_path set, the cache is filled by an untimed run first.
+    """
+    if cache_path:
+        in_fresh_process(scanner_name, corpus_dir, jobs, cache_path)
+    runs = [in_fresh_process(scanner_name, corpus_dir, jobs, cache_path) for _ in range(repeat)]
+
+    wall = statistics.median(run["wall_s"] for run in runs)
+    files = runs[0]["files"]
+    megabytes = runs[0]["bytes"] / (1024 * 1024)
+    return {
+        "name": name,
+        "scanner": scanner_name,
+        "jobs": jobs,
+        "cache": bool(cache_path),
+        "files": files,
+        "bytes": runs[0]["bytes"],
+        "findings": runs[0]["findings"],
+        "wall_s": wall,
+        "wall_s_min": min(run["wall_s"] for run in runs),
+        "files_per_s": files / wall,
+        "mb_per_s": megabytes / wall,
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+        "runs": [run["wall_s"] for run in runs],
+    }
+
+
+def run_benchmarks(corpus_dir, repeat=3, jobs=None):
+    """Run every benchmark over the corpus and return the results."""
+    jobs = jobs or os.cpu_count() or 1
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for scanner_name in SCANNERS:
+            results.append(benchmark(scanner_name, scanner_name, corpus_dir, repeat))
+            if jobs > 1:
+                results.append(benchmark(f"{scanner_name} -j{jobs}", scanner_name,
+                                         corpus_dir, repeat, jobs=jobs))
+            cache_path = os.path.join(cache_dir, f"{scanner_name}.sqlite")
+            results.append(benchmark(f"{scanner_name} (warm cache)", scanner_name,
+                                     corpus_dir, repeat, cache_path=cache_path))
+    return results
+
+
+def print_results(results):
+    """Print the results as a table."""
+    print(f"{'Benchmark':<38} {'Files':>6} {'MB':>8} {'Wall s':>8} "
+          f"{'Files/s':>9} {'MB/s':>8} {'RSS MB':>7}")
+    for result in results:
+        print(
+            f"{result['name']:<38} {result['files']:>6} "
+            f"{result['bytes'] / (1024 * 1024):>8.2f} {result['wall_s']:>8.3f} "
+            f"{result['files_per_s']:>9.1f} {result['mb_per_s']:>8.2f} "
+            f"{result['peak_rss_mb']:>7.1f}"
+        )
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark the Finnish text scanners.")
+    parser.add_argument("--corpus", metavar="DIR",
+                        help="Corpus directory, generated if missing (default: a temporary directory)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus random seed (default: 0)")
+    parser.add_argument("--scale", type=int, default=1,
+                        help="Corpus size multiplier (default: 1, about 30 MB)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Timed runs per benchmark, the median is reported (default: 3)")
+    parser.add_argument("-j", "--jobs", type=int, default=0,
+                        help="Worker processes for the parallel runs, 0 = one per CPU (default: 0)")
+    parser.add_argument("--output", metavar="FILE",
+                        help="Results file (default: finnish-benchmark-results-<timestamp>.json)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    started_at = datetime.now(timezone.utc)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = os.path.abspath(args.corpus or tmp_dir)
+        print(f"Generating corpus in {corpus_dir} (seed {args.seed}, scale {args.scale})...")
+        manifest = generate_corpus(corpus_dir, args.seed, args.scale)
+        print(f"Corpus: {manifest['files']} files, {manifest['bytes'] / (1024 * 1024):.2f} MB")
+        results = run_benchmarks(corpus_dir, args.repeat, args.jobs)
+
+    print_results(results)
+
+    output = args.output or (
+        "finnish-benchmark-results-" + started_at.strftime("%Y-%m-%dT%H-%M-%SZ") + ".json"
+    )
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": started_at.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "corpus": manifest,
+            "repeat": args.repeat,
+            "results": results,
+        }, f, indent=2)
+    print(f"Results saved to {output}")
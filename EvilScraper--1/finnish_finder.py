@@ -1,66 +1,223 @@
+import argparse
 import os
-import re
+import sys
+import time
+from contextlib import ExitStack
 
-def has_finnish_content(line, patterns):
-    """Check if a line contains Finnish text using the given patterns."""
-    return any(re.search(pattern, line) for pattern in patterns)
+from finnish_matcher import FinnishMatcher
+from finnish_profile import DEFAULT_TOP_FILES, ScanProfile, profile_path
+from finnish_scanner import Scanner, filter_by_score, print_throughput, scan_entry
+from finnish_shard import PartialReportWriter, ShardMerge, parse_shard, select_shard
+from finnish_walker import walk_files
+from finnish_writers import (
+    DeferredWriter, JsonLinesWriter, SarifWriter, TextWriter, format_line, write_findings,
+)
 
-def process_file(file_path, patterns):
+FINNISH_CHARS = 'äöÄÖ'
+FINNISH_PATTERNS = [
+    r'//.*[äöÄÖ]',  # JavaScript/TypeScript comments
+    r'#.*[äöÄÖ]',  # Python comments
+    r'"[^"]*[äöÄÖ][^"]*"',  # Strings with Finnish characters
+    r"'[^']*[äöÄÖ][^']*'",  # Same with single quotes
+]
+
+# Every pattern needs a Finnish character, which lets the matcher skip other lines
+FINNISH_MATCHER = FinnishMatcher(FINNISH_PATTERNS, required_chars=FINNISH_CHARS)
+
+TARGET_EXTENSIONS = (".ts", ".js", ".py", ".md", ".sh")
+
+# gitignore-style patterns skipped in addition to the project's .gitignore files
+EXCLUDE_PATTERNS = ["node_modules/", ".git/"]
+
+REPORT_FILE = "finnish_content_report.txt"
+CACHE_FILE = ".finnish_finder_cache.sqlite"
+# Default partial report of a --shard run, combined with "merge"
+PARTIAL_REPORT_FILE = "finnish_content_report.{shard}-of-{shards}.jsonl"
+
+def has_finnish_content(line, matcher=FINNISH_MATCHER):
+    """Check if a line contains Finnish text using the given matcher."""
+    return matcher.search(line) >= 0
+
+def process_file(file_path, matcher=FINNISH_MATCHER):
     """Process a single file and return lines containing Finnish text."""
-    try:
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            lines = f.readlines()
-        
-        return [
-            f"{file_path}:{i}: {line.strip()}"
-            for i, line in enumerate(lines, 1)
-            if has_finnish_content(line, patterns)
-        ]
-    except Exception as e:
-        return [f"Error reading {file_path}: {str(e)}"]
-
-def get_target_files(root_dir, target_extensions):
-    """Get all files with target extensions from the directory."""
-    matching_files = []
-    for subdir, _, files in os.walk(root_dir):
-        for file in files:
-            if file.endswith(target_extensions):
-                matching_files.append(os.path.join(subdir, file))
-    return matching_files
-
-def find_finnish_text(root_dir):
-    """Find Finnish text in files under the given directory."""
-    finnish_patterns = [
-        r'//.*[äöÄÖ]',  # JavaScript/TypeScript comments
-        r'#.*[äöÄÖ]',  # Python comments
-        r'"[^"]*[äöÄÖ][^"]*"',  # Strings with Finnish characters
-        r"'[^']*[äöÄÖ][^']*'",  # Same with single quotes
+    _, findings, error = scan_entry(file_path, matcher)
+    if error:
+        return [f"Error reading {file_path}: {error}"]
+    return [
+        f"{file_path}:{line_num}:{column}: {context}"
+        for line_num, column, context in findings
     ]
-    
-    target_extensions = (".ts", ".js", ".py", ".md", ".sh")
-    
-    # Get matching files
-    files = get_target_files(root_dir, target_extensions)
-    
-    # Process files and collect results
-    results = []
-    for file_path in files:
-        results.extend(process_file(file_path, finnish_patterns))
-    
+
+def get_target_files(root_dir, target_extensions, exclude=EXCLUDE_PATTERNS, use_gitignore=True):
+    """Get all files with target extensions from the directory.
+
+    Excluded directories are pruned before they are walked and oversized
+    files are skipped; binary files are skipped by the reader.
+    """
+    return list(walk_files(root_dir, target_extensions, exclude, use_gitignore,
+                           sniff_binary=False))
+
+def create_scanner(jobs=1, cache_path=None, exclude=EXCLUDE_PATTERNS, use_gitignore=True,
+                   profile=None):
+    """Create a Scanner with the finnish_finder patterns and file types.
+
+    With profile set to a number N, the scanner records a ScanProfile that
+    lists the N most expensive files.
+    """
+    scan_profile = ScanProfile(FINNISH_MATCHER, profile) if profile else None
+    return Scanner(FINNISH_MATCHER, TARGET_EXTENSIONS, exclude, use_gitignore,
+                   jobs=jobs, cache_path=cache_path, profile=scan_profile)
+
+def find_finnish_text(root_dir, jobs=1, cache_path=None, exclude=EXCLUDE_PATTERNS,
+                      use_gitignore=True, min_score=None):
+    """Find Finnish text in files under the given directory.
+
+    With jobs > 1 the files are scanned in a process pool; the results are
+    identical to a serial scan, including their order. With cache_path set,
+    only files that changed since the previous run are read and scanned.
+    exclude holds gitignore-style patterns applied on top of .gitignore files.
+    With min_score set, findings whose Finnish likelihood score is lower
+    are dropped (see finnish_scorer).
+    """
+    scanner = create_scanner(jobs, cache_path, exclude, use_gitignore)
+    results = [format_line(finding) for finding in filter_by_score(scanner.scan(root_dir), min_score)]
+    print_throughput(scanner.stats)
     return results
 
-def save_report(report, output_file="finnish_content_report.txt"):
+def save_report(report, output_file=REPORT_FILE):
     with open(output_file, "w", encoding="utf-8") as f:
         f.write("Finnish text found in the following files:\n\n")
         f.write("\n".join(report))
     print(f"Report saved to {output_file}")
 
-if __name__ == "__main__":
-    project_root = "."  # Change path if your project is in a different directory
-    report = find_finnish_text(project_root)
-    
-    if report:
-        save_report(report)
-        print(f"Finnish content detected! Found {len(report)} instances. Check 'finnish_content_report.txt' for details.")
+def shard_spec(value):
+    """argparse type for --shard."""
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Find Finnish text in project files.",
+        epilog="Run '%(prog)s merge PARTIAL...' to combine the partial reports of --shard runs.")
+    parser.add_argument("root", nargs="?", default=".",
+                        help="Directory to scan (default: current directory)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of worker processes, 0 = one per CPU (default: 1)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="PATTERN",
+                        help="Extra gitignore-style pattern to skip (repeatable)")
+    parser.add_argument("--no-gitignore", action="store_true",
+                        help="Do not apply .gitignore files")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"Re-scan every file instead of using {CACHE_FILE}")
+    parser.add_argument("--jsonl", metavar="FILE",
+                        help="Also write the findings as JSON lines to FILE")
+    parser.add_argument("--sarif", metavar="FILE",
+                        help="Also write the findings as a SARIF log to FILE")
+    parser.add_argument("--min-score", type=float, metavar="SCORE",
+                        help="Only report findings with a Finnish likelihood score (0-1) "
+                             "of at least SCORE, e.g. 0.5 (needs NumPy)")
+    parser.add_argument("--profile", type=int, nargs="?", const=DEFAULT_TOP_FILES, metavar="N",
+                        help="Time walking, reading and matching (and each pattern), list the "
+                             f"N most expensive files (default: {DEFAULT_TOP_FILES}) and write "
+                             "them to a .profile.json file next to the report")
+    parser.add_argument("--shard", type=shard_spec, metavar="K/N",
+                        help="Only scan shard K of N (1-based) and write a partial report "
+                             "instead of the report")
+    parser.add_argument("--partial", metavar="FILE",
+                        help="With --shard, write the partial report to FILE (default: "
+                             + PARTIAL_REPORT_FILE.format(shard="K", shards="N") + ")")
+    args = parser.parse_args()
+    if args.shard and (args.jsonl or args.sarif):
+        parser.error("--jsonl and --sarif are written by merge, not by a --shard run")
+    return args
+
+def parse_merge_args(argv):
+    """Parse the command line arguments of the merge command."""
+    parser = argparse.ArgumentParser(
+        prog="finnish_finder.py merge",
+        description=f"Combine the partial reports of all --shard runs into {REPORT_FILE}.")
+    parser.add_argument("partials", nargs="+", metavar="PARTIAL",
+                        help="Partial report written by a --shard run")
+    parser.add_argument("--jsonl", metavar="FILE",
+                        help="Also write the findings as JSON lines to FILE")
+    parser.add_argument("--sarif", metavar="FILE",
+                        help="Also write the findings as a SARIF log to FILE")
+    args = parser.parse_args(argv)
+    try:
+        args.merge = ShardMerge(args.partials)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    return args
+
+def open_writers(stack, args):
+    """Open any extra output files requested on the command line, and the report on the first finding.
+
+    Like the original finder, a scan without findings leaves the report alone.
+    """
+    writers = [DeferredWriter(lambda: TextWriter(stack.enter_context(open(REPORT_FILE, "w", encoding="utf-8"))))]
+    if args.jsonl:
+        writers.append(JsonLinesWriter(stack.enter_context(open(args.jsonl, "w", encoding="utf-8"))))
+    if args.sarif:
+        writers.append(SarifWriter(stack.enter_context(open(args.sarif, "w", encoding="utf-8"))))
+    return writers
+
+def scan_shard(scanner, args):
+    """Scan one shard of the tree into its partial report."""
+    started = time.perf_counter()
+    shard, shards = args.shard
+    files = select_shard(scanner.list_files(args.root), args.root, shard, shards)
+    partial_path = args.partial or PARTIAL_REPORT_FILE.format(shard=shard, shards=shards)
+    with open(partial_path, "w", encoding="utf-8") as stream:
+        # The cache may hold files of other shards, which must not be pruned
+        findings = scanner.scan_files(files, started, prune_cache=False)
+        writer = PartialReportWriter(stream, shard, shards, args.root, scanner)
+        write_findings(filter_by_score(findings, args.min_score), [writer])
+    print_throughput(scanner.stats)
+    print(f"Partial report for shard {shard}/{shards} saved to {partial_path}")
+    if scanner.profile:
+        scanner.profile.write(profile_path(partial_path), scanner.stats, scanner.jobs)
+
+def print_summary(summary):
+    """Print the closing lines of a scan."""
+    found = summary["findings"] + summary["errors"]
+    if found:
+        print(f"Report saved to {REPORT_FILE}")
+        print(f"Finnish content detected! Found {found} instances. Check '{REPORT_FILE}' for details.")
     else:
         print("No Finnish content found.")
+
+def merge_main(argv):
+    """Write the report of a sharded scan from the partial reports of its shards."""
+    args = parse_merge_args(argv)
+    with ExitStack() as stack:
+        summary = write_findings(args.merge.findings(), open_writers(stack, args))
+    print_throughput(args.merge.stats)
+    print_summary(summary)
+
+def main():
+    args = parse_args()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    cache_path = None if args.no_cache else os.path.join(
+        os.path.dirname(os.path.abspath(REPORT_FILE)), CACHE_FILE)
+    scanner = create_scanner(jobs, cache_path, EXCLUDE_PATTERNS + args.exclude,
+                             not args.no_gitignore, args.profile)
+    if args.shard:
+        scan_shard(scanner, args)
+        return
+
+    with ExitStack() as stack:
+        findings = filter_by_score(scanner.scan(args.root), args.min_score)
+        summary = write_findings(findings, open_writers(stack, args))
+    print_throughput(scanner.stats)
+    print_summary(summary)
+    if scanner.profile:
+        scanner.profile.write(profile_path(REPORT_FILE), scanner.stats, jobs)
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["merge"]:
+        merge_main(sys.argv[2:])
+    else:
+        main()
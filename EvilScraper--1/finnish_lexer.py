@@ -0,0 +1,457 @@
+"""Comment and string literal lexers for the Finnish text scanners.
+
+Matching whole lines with the scanner patterns misfires on ``//`` in URLs
+and ``#`` inside strings, and backtracks on long minified lines full of
+quotes.  For JavaScript/TypeScript, Python and shell files the lexers in
+this module split the text into code, comments and string literals in one
+left-to-right pass; only comments and string literals are searched, and in
+them any Finnish character or listed word is a hit.
+
+Each step is one regex match that skips the code up to the next token and
+cannot backtrack more than linearly: a comment or literal that ends on the
+same line (or a block comment that ends at all) is matched whole, anything
+else opens a span that is consumed with regexes of its own.  The next
+possible hit in the text is looked up once and only compared against as
+tokens go by.  In JavaScript, code, string literals and divisions up to the
+next possible hit are skipped in a single match, without a Python step per
+token, and once a search for a regex literal fails, the slashes up to where
+it stopped are taken as divisions.  No text is searched twice, so the cost
+is linear in the file size.
+
+Lexers are incremental: ``feed()`` takes the text read so far and returns
+the hit positions together with how much of the text it consumed.  A span
+that continues past the text (a block comment, template literal,
+triple-quoted string or heredoc) is kept for the next call.
+
+The lexers only have to tell code from comments and strings, so they are
+forgiving: an unterminated single-line string ends at the end of the line,
+and JavaScript regex literals are told from division by the token before
+the slash, the usual heuristic.
+"""
+import os
+import re
+
+# Characters a token may need to see past its start before it can be
+# recognised ("\"\"\"" versus "\"", "//" versus "/"); no token spans a
+# newline, so text that ends with one needs no lookahead
+LOOKAHEAD = 3
+
+# Longest word held back at the end of the text, so that a listed word is
+# only matched once all of it has been read
+MAX_WORD_LENGTH = 64
+
+# Longest JavaScript regex literal recognised, which also bounds the work
+# done for a slash that turns out to be a division
+MAX_REGEX_LENGTH = 8192
+
+LINE_COMMENT = (re.compile(r"[^\n]*"), re.compile(r"(?=\n)"))
+
+# Token regexes: the "code" group skips the code before the token, the
+# "closed" group matches comments and literals that end in the text, and
+# the alternatives after it open a span or are code.
+
+# JavaScript / TypeScript
+JS_LITERAL = (
+    r'"[^"\\\n]*(?:\\[\s\S][^"\\\n]*)*"'
+    r"|'[^'\\\n]*(?:\\[\s\S][^'\\\n]*)*'"
+    r"|`[^`\\$]*(?:(?:\\[\s\S]|\$(?!\{))[^`\\$]*)*`"
+)
+JS_TOKENS = (
+    r"(?P<closed>//[^\n]*(?=\n)|/\*[^*]*\*+(?:[^/*][^*]*\*+)*/|" + JS_LITERAL + ")"
+    r"|//|/\*|/(?=[^/*])|[\"'`]"
+)
+JS_START = re.compile(r"(?P<code>[^/\"'`]*)(?:" + JS_TOKENS + ")")
+# Inside the ${ ... } of a template literal braces are counted as well
+JS_START_BRACES = re.compile(r"(?P<code>[^/\"'`{}]*)(?:" + JS_TOKENS + r"|[{}])")
+JS_REGEX_LITERAL = re.compile(r"/(?:[^\\/\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*")
+# Keywords after which a slash starts a regex literal rather than a division
+JS_REGEX_KEYWORDS = {
+    "return", "typeof", "instanceof", "in", "of", "new", "delete", "void",
+    "throw", "case", "do", "else", "yield", "await",
+}
+# A slash right after a name (but not a keyword), number, ")" or "]" that
+# does not start a comment is a division.  A lookbehind has a fixed width,
+# so there is one for the keywords of each length
+JS_DIVISION = (
+    r"/(?<=[\w$)\]]/)"
+    + "".join(
+        r"(?<!\b(?:" + "|".join(sorted(word for word in JS_REGEX_KEYWORDS if len(word) == length)) + ")/)"
+        for length in sorted({len(word) for word in JS_REGEX_KEYWORDS})
+    )
+    + r"(?=[^/*])"
+)
+# Code without slashes followed by a string literal or a division, any
+# number of times
+JS_LITERALS = re.compile(r"(?:[^/\"'`]*(?:" + JS_LITERAL + "|" + JS_DIVISION + "))*")
+JS_SPANS = {
+    "//": LINE_COMMENT,
+    "/*": (re.compile(r"(?:[^*]+|\*(?=[^/]))*"), re.compile(r"\*/")),
+    '"': (re.compile(r'(?:[^"\\\n]+|\\[\s\S])*'), re.compile(r'"|(?=\n)')),
+    "'": (re.compile(r"(?:[^'\\\n]+|\\[\s\S])*"), re.compile(r"'|(?=\n)")),
+    "`": (re.compile(r"(?:[^`\\$]+|\\[\s\S]|\$(?=[^{]))*"), re.compile(r"`|\$\{")),
+}
+
+# Python
+PY_START = re.compile(
+    r"(?P<code>[^#\"']*)"
+    r"(?:(?P<closed>#[^\n]*(?=\n)"
+    r'|"""[^"\\]*(?:(?:\\[\s\S]|"(?!""))[^"\\]*)*"""'
+    r"|'''[^'\\]*(?:(?:\\[\s\S]|'(?!''))[^'\\]*)*'''"
+    r'|(?!""")"[^"\\\n]*(?:\\[\s\S][^"\\\n]*)*"'
+    r"|(?!''')'[^'\\\n]*(?:\\[\s\S][^'\\\n]*)*')"
+    r"|#|'''|\"\"\"|[\"'])"
+)
+PY_SPANS = {
+    "#": LINE_COMMENT,
+    '"""': (re.compile(r'(?:[^"\\]+|\\[\s\S]|"{1,2}(?=[^"]))*'), re.compile(r'"""')),
+    "'''": (re.compile(r"(?:[^'\\]+|\\[\s\S]|'{1,2}(?=[^']))*"), re.compile(r"'''")),
+    '"': (re.compile(r'(?:[^"\\\n]+|\\[\s\S])*'), re.compile(r'"|(?=\n)')),
+    "'": (re.compile(r"(?:[^'\\\n]+|\\[\s\S])*"), re.compile(r"'|(?=\n)")),
+}
+
+# Shell: "#" only starts a comment at the start of a word.  Not every "#",
+# "$" or "<" starts a token, so the next token is searched for instead
+SH_TOKENS = (
+    r"(?P<code>)(?:(?P<closed>(?<![^\s;&|(])#[^\n]*(?=\n)"
+    r"|'[^']*'"
+    r"|\$'[^'\\]*(?:\\[\s\S][^'\\]*)*'"
+    r'|"[^"\\]*(?:\\[\s\S][^"\\]*)*")'
+    r"|(?<![^\s;&|(])#|\$'|[\"']|\\[\s\S]"
+    r"|(?<!<)<<-?[ \t]*(?:'[A-Za-z_]\w*'|\"[A-Za-z_]\w*\"|\\?[A-Za-z_]\w*)"
+)
+SH_START = re.compile(SH_TOKENS + ")")
+# Once a line has started a heredoc, its end starts the heredoc's body
+SH_START_HEREDOC = re.compile(SH_TOKENS + r"|\n)")
+SH_SPANS = {
+    "#": LINE_COMMENT,
+    "'": (re.compile(r"[^']*"), re.compile(r"'")),
+    "$'": (re.compile(r"(?:[^'\\]+|\\[\s\S])*"), re.compile(r"'")),
+    '"': (re.compile(r'(?:[^"\\]+|\\[\s\S])*'), re.compile(r'"')),
+}
+
+
+class Lexer:
+    """Base class of the lexers; subclasses define the tokens of a language."""
+
+    spans = {}
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        # (body regex, end regex) of the span being read, None in code
+        self.span = None
+        # Position of the opening delimiter of the span in the current text,
+        # None once the span had a hit or left the line of the delimiter
+        self.span_start = None
+        # The same for a span continued from the previous text (negative)
+        self.carried_start = None
+        # Last character consumed, seen by lookbehinds and \b in the next text
+        self.context = ""
+
+    def find_token(self, text, pos):
+        """Match the code from pos and the token after it; None if no token follows."""
+        raise NotImplementedError
+
+    def skip_literals(self, text, pos, endpos):
+        """Return the end of the code and string literals from pos that can be skipped.
+
+        Nothing before ``endpos`` (the next possible hit) needs searching.
+        """
+        return pos
+
+    def code(self, text, start, end):
+        """Called with the run of code before the end of the text."""
+
+    def closed(self, text, code_start, start, end):
+        """Called with a comment or literal matched whole, after the code from code_start."""
+
+    def token(self, text, start, end, final, code_start):
+        """Handle a token that opens a span or is code; return the position to continue from.
+
+        ``code_start`` is where the code before the token starts.  Returning
+        ``start`` keeps the token for the next ``feed()``.
+        """
+        self.span = self.spans[text[start:end]]
+        self.span_start = start
+        return end
+
+    def span_ended(self, text, match):
+        """Called when a span ends with the text matched by its end regex."""
+
+    def feed(self, text, final):
+        """Lex text and return ``(hits, consumed)``.
+
+        ``hits`` are the positions to report: the opening delimiter of a
+        comment or literal with a hit on its first line, otherwise the hit
+        itself, at most one per line.  Unless ``final`` is set, the
+        text from ``consumed`` on must be passed again, followed by more
+        text.
+        """
+        context = self.context
+        text = context + text
+        self.hits = []
+        size = len(text)
+        limit = size if final or text.endswith("\n") else size - LOOKAHEAD
+        pos = len(context)
+        self.next_hit = self._next_hit(text, pos)
+        if self.carried_start is not None:
+            self.span_start = self.carried_start + pos
+
+        while pos < size:
+            if self.span is not None:
+                pos, done = self._read_span(text, pos, final)
+                if not done:
+                    break
+                continue
+
+            pos = self.skip_literals(text, pos, self.next_hit)
+            match = self.find_token(text, pos)
+            start = match.end("code") if match else size
+            if start >= limit:
+                end = size if final else max(pos, _word_start(text, pos, limit))
+                self.code(text, pos, end)
+                pos = end
+                break
+            end = match.end()
+            if match.lastgroup == "closed":
+                if self.next_hit < end:
+                    self.span_start = start
+                    self._find_hits(text, start, end)
+                    self.span_start = None
+                self.closed(text, pos, start, end)
+                pos = end
+                continue
+            if end > limit:
+                # The token may go on in the text that has not been read yet
+                self.code(text, pos, start)
+                pos = start
+                break
+
+            following = self.token(text, start, end, final, pos)
+            if following == start:
+                self.code(text, pos, start)
+                pos = start
+                break
+            pos = following
+
+        self.carried_start = None
+        if self.span is not None and self.span_start is not None:
+            if text.find("\n", max(self.span_start, 0), pos) < 0:
+                self.carried_start = self.span_start - pos
+        self.span_start = None
+        self.context = text[pos - 1:pos] if pos else ""
+        return [hit - len(context) for hit in self.hits], pos - len(context)
+
+    def _next_hit(self, text, pos):
+        hit = self.matcher.find_in_span(text, pos)
+        return hit if hit >= 0 else len(text)
+
+    def _read_span(self, text, pos, final):
+        """Read the current span from pos; return ``(position, span_ended)``."""
+        body, end = self.span
+        stop = body.match(text, pos).end()
+
+        match = end.match(text, stop)
+        # An end reaching the end of the text may go on in the text not read yet
+        if match and (final or match.end() < len(text)):
+            self._find_hits(text, pos, stop)
+            self.span = self.span_start = None
+            self.span_ended(text, match)
+            return match.end(), True
+        if final:
+            # Unterminated at the end of the file
+            self._find_hits(text, pos, len(text))
+            self.span = self.span_start = None
+            return len(text), True
+        # A partial escape, end delimiter or word at the end of the text
+        stop = _word_start(text, pos, stop)
+        self._find_hits(text, pos, stop)
+        return stop, False
+
+    def _find_hits(self, text, start, stop):
+        """Record the hits in text[start:stop], which is inside a comment or literal."""
+        hit = self.next_hit
+        if hit < start:
+            # The last candidate was in code
+            hit = self._next_hit(text, start)
+        while hit < stop:
+            span_start = self.span_start
+            if span_start is not None and text.find("\n", max(span_start, 0), hit) < 0:
+                self.hits.append(span_start)
+            else:
+                self.hits.append(hit)
+            # One hit per line is enough; look for the next one on later lines
+            self.span_start = None
+            line_end = text.find("\n", hit)
+            hit = self._next_hit(text, line_end + 1) if line_end >= 0 else len(text)
+        self.next_hit = hit
+
+
+def _word_start(text, start, end):
+    """Return where a word running up to end starts, or end for no (or a too long) word."""
+    word_start = end
+    while word_start > start and (text[word_start - 1].isalnum() or text[word_start - 1] == "_"):
+        word_start -= 1
+        if end - word_start > MAX_WORD_LENGTH:
+            return end
+    return word_start
+
+
+class JavaScriptLexer(Lexer):
+    """Comments, string and template literals of JavaScript and TypeScript."""
+
+    spans = JS_SPANS
+
+    def __init__(self, matcher):
+        super().__init__(matcher)
+        # Whether a slash after the last token starts a regex literal
+        self.regex_allowed = True
+        # Brace depth inside each open ${ ... } of a template literal
+        self.braces = []
+        # Where the last failed search for a regex literal stopped, relative
+        # to the text; no regex literal starts at a slash before it
+        self.regex_searched = 0
+
+    def feed(self, text, final):
+        offset = len(self.context)
+        self.regex_searched += offset
+        hits, consumed = super().feed(text, final)
+        self.regex_searched -= offset + consumed
+        return hits, consumed
+
+    def find_token(self, text, pos):
+        return (JS_START_BRACES if self.braces else JS_START).match(text, pos)
+
+    def skip_literals(self, text, pos, endpos):
+        if self.braces:
+            return pos
+        end = JS_LITERALS.match(text, pos, endpos).end()
+        if end > pos:
+            # A regex literal may follow a division, not a string literal
+            self.regex_allowed = text[end - 1] == "/"
+        return end
+
+    def code(self, text, start, end):
+        """Update regex_allowed from the last token of a run of code."""
+        while end > start and text[end - 1] in " \t\r\n":
+            end -= 1
+        if end == start:
+            return
+        char = text[end - 1]
+        if char.isalnum() or char in "_$":
+            word_start = end - 1
+            while word_start > start and (text[word_start - 1].isalnum() or text[word_start - 1] in "_$"):
+                word_start -= 1
+            self.regex_allowed = text[word_start:end] in JS_REGEX_KEYWORDS
+        else:
+            self.regex_allowed = char not in ")]"
+
+    def closed(self, text, code_start, start, end):
+        if text[start] == "/":
+            self.code(text, code_start, start)
+        else:
+            self.regex_allowed = False
+
+    def token(self, text, start, end, final, code_start):
+        token = text[start:end]
+        if token == "{":
+            self.braces[-1] += 1
+            self.regex_allowed = True
+            return end
+        if token == "}":
+            if self.braces[-1]:
+                self.braces[-1] -= 1
+                self.regex_allowed = True
+            else:
+                # End of a ${ ... } substitution, back in the template literal
+                self.braces.pop()
+                self.span = JS_SPANS["`"]
+            return end
+
+        self.code(text, code_start, start)
+        if token != "/":
+            return super().token(text, start, end, final, code_start)
+        if self.regex_allowed and start >= self.regex_searched:
+            literal = JS_REGEX_LITERAL.match(text, start, start + MAX_REGEX_LENGTH)
+            if literal:
+                self.regex_allowed = False
+                return literal.end()
+            line_end = text.find("\n", start, start + MAX_REGEX_LENGTH)
+            if not final and line_end < 0 and len(text) - start < MAX_REGEX_LENGTH:
+                # The literal may end in the text that has not been read yet
+                return start
+            # The search looked as far as this, so the slashes up to it are
+            # divisions rather than the start of another search
+            self.regex_searched = line_end if line_end >= 0 else start + MAX_REGEX_LENGTH
+        self.regex_allowed = True
+        return end
+
+    def span_ended(self, text, match):
+        if match.group() == "${":
+            self.braces.append(0)
+            self.regex_allowed = True
+        elif match.group() in ("\"", "'", "`"):
+            self.regex_allowed = False
+
+
+class PythonLexer(Lexer):
+    """Comments and string literals of Python, including triple-quoted strings."""
+
+    spans = PY_SPANS
+
+    def find_token(self, text, pos):
+        return PY_START.match(text, pos)
+
+
+class ShellLexer(Lexer):
+    """Comments, quoted strings and heredocs of shell scripts."""
+
+    spans = SH_SPANS
+
+    def __init__(self, matcher):
+        super().__init__(matcher)
+        # Heredocs started on the current line, read once it ends
+        self.heredocs = []
+
+    def find_token(self, text, pos):
+        return (SH_START_HEREDOC if self.heredocs else SH_START).search(text, pos)
+
+    def token(self, text, start, end, final, code_start):
+        token = text[start:end]
+        if token.startswith("\\"):
+            return end
+        if token.startswith("<<"):
+            delimiter = token.lstrip("<-").strip(" \t'\"\\")
+            self.heredocs.append(heredoc_span(delimiter, token.startswith("<<-")))
+            return end
+        if token == "\n":
+            self.span = self.heredocs.pop(0)
+            return end
+        return super().token(text, start, end, final, code_start)
+
+
+_heredoc_spans = {}
+
+
+def heredoc_span(delimiter, strip_tabs):
+    """Return the (body, end) regexes of a heredoc ended by a delimiter line."""
+    key = (delimiter, strip_tabs)
+    if key not in _heredoc_spans:
+        end = (r"\t*" if strip_tabs else "") + re.escape(delimiter) + r"(?=\n|\Z)"
+        _heredoc_spans[key] = (re.compile(rf"(?:(?!{end})[^\n]*\n)*"), re.compile(end))
+    return _heredoc_spans[key]
+
+
+LEXERS = {
+    ".js": JavaScriptLexer,
+    ".mjs": JavaScriptLexer,
+    ".cjs": JavaScriptLexer,
+    ".ts": JavaScriptLexer,
+    ".py": PythonLexer,
+    ".sh": ShellLexer,
+}
+
+
+def create_lexer(file_path, matcher):
+    """Return a lexer for the file's language, or None to scan it line by line."""
+    lexer_class = LEXERS.get(os.path.splitext(file_path)[1].lower())
+    return lexer_class(matcher) if lexer_class else None
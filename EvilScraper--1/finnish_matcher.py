@@ -0,0 +1,181 @@
+"""Single-pass line matcher shared by the Finnish text scanners.
+
+Lines are rejected cheaply before any full regex runs on them:
+
+* the pattern regexes only run on lines that contain one of the
+  ``required_chars`` (the Finnish characters), and data without their
+  UTF-8 byte sequences can be skipped without being decoded;
+* the word list is compiled into a single trie-shaped regex, so adding
+  words grows the automaton instead of the number of alternatives tried
+  at every position, and it runs once over the whole text rather than
+  once per line.
+
+The hits are the same as running the patterns and the word alternation
+line by line with ``re.search``.
+"""
+import hashlib
+import re
+
+
+def _trie_to_regex(node):
+    """Convert a character trie into a regex fragment."""
+    branches = [
+        re.escape(char) + _trie_to_regex(child)
+        for char, child in sorted(node.items())
+        if char
+    ]
+    if not branches:
+        return ""
+
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        # A word ends here and longer words continue from the same prefix
+        body = "(?:" + body + ")?"
+    return body
+
+
+def build_word_regex(words, flags=0):
+    """Compile a word list into one trie-shaped ``\\b(?:...)\\b`` regex."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return re.compile(r"\b(?:" + _trie_to_regex(trie) + r")\b", flags)
+
+
+class FinnishMatcher:
+    """Find lines matching a set of patterns and a word list.
+
+    ``required_chars`` are characters that every pattern needs in order to
+    match; lines without any of them never reach the pattern regexes.  Leave
+    it empty when the patterns do not share such characters.
+    """
+
+    def __init__(self, patterns, words=(), flags=0, required_chars=""):
+        # Kept as given for --profile, which times each pattern on its own
+        self.patterns = list(patterns)
+        self.words = list(words)
+        self.flags = flags
+        self.pattern_regex = re.compile("|".join(patterns), flags) if patterns else None
+        self.word_regex = build_word_regex(words, flags) if words else None
+
+        if required_chars:
+            self.required_regex = re.compile("[" + re.escape(required_chars) + "]", flags)
+            variants = set(required_chars)
+            if flags & re.IGNORECASE:
+                variants |= set(required_chars.lower()) | set(required_chars.upper())
+            self.required_bytes = tuple(sorted(char.encode("utf-8") for char in variants))
+        else:
+            self.required_regex = None
+            self.required_bytes = ()
+
+        # Inside comments and string literals any required character or
+        # listed word is a hit; without required characters the patterns are
+        if self.required_regex is not None:
+            span_parts = [self.required_regex]
+        else:
+            span_parts = [self.pattern_regex] if self.pattern_regex is not None else []
+        if self.word_regex is not None:
+            span_parts.append(self.word_regex)
+        self.span_regex = re.compile(
+            "|".join(regex.pattern for regex in span_parts), flags
+        ) if span_parts else None
+
+        # Changes whenever the patterns, words or flags change; used to
+        # invalidate cached scan results
+        signature = repr((
+            self.pattern_regex.pattern if self.pattern_regex else None,
+            self.word_regex.pattern if self.word_regex else None,
+            flags,
+            self.required_bytes,
+        ))
+        self.fingerprint = hashlib.sha256(signature.encode("utf-8")).hexdigest()
+
+    def search(self, line, pos=0):
+        """Return the column of the leftmost hit in a line, or -1.
+
+        Matching starts at ``pos``; the text before it is still seen by
+        lookbehinds and ``\\b``.
+        """
+        columns = []
+        if self.word_regex is not None:
+            match = self.word_regex.search(line, pos)
+            if match:
+                columns.append(match.start())
+        if self.pattern_regex is not None and (
+            self.required_regex is None or self.required_regex.search(line, pos)
+        ):
+            match = self.pattern_regex.search(line, pos)
+            if match:
+                columns.append(match.start())
+        return min(columns) if columns else -1
+
+    def find_in_span(self, text, pos=0):
+        """Return the offset of the next possible hit at or after pos, or -1.
+
+        For text known to be inside comments and string literals, as split
+        out by finnish_lexer.
+        """
+        match = self.span_regex.search(text, pos) if self.span_regex is not None else None
+        return match.start() if match else -1
+
+    def may_match_bytes(self, data):
+        """Cheap byte-level check: False means the data cannot contain a hit."""
+        if self.word_regex is not None or self.required_regex is None:
+            return True
+        return any(needle in data for needle in self.required_bytes)
+
+    def _candidate_lines(self, text):
+        """Map the start offset of every line that may contain a hit to a known column."""
+        candidates = {}
+
+        if self.word_regex is not None:
+            # Words never span lines and \b treats "\n" like a string edge, so
+            # the first match found in a line is its leftmost word hit.
+            for match in self.word_regex.finditer(text):
+                start = text.rfind("\n", 0, match.start()) + 1
+                candidates.setdefault(start, match.start() - start)
+
+        if self.pattern_regex is not None:
+            if self.required_regex is None:
+                start = 0
+                while start < len(text):
+                    candidates.setdefault(start, -1)
+                    start = text.find("\n", start) + 1 or len(text)
+            else:
+                match = self.required_regex.search(text)
+                while match:
+                    start = text.rfind("\n", 0, match.start()) + 1
+                    candidates.setdefault(start, -1)
+                    end = text.find("\n", match.start()) + 1 or len(text)
+                    match = self.required_regex.search(text, end)
+
+        return candidates
+
+    def scan(self, text):
+        """Yield ``(line_index, column, line)`` for every matching line in text.
+
+        Lines are split on ``"\\n"`` and keep their line ending; the text is
+        expected to be decoded with newlines translated, as in text mode.
+        """
+        candidates = self._candidate_lines(text)
+        line_index = 0
+        previous = 0
+        for start in sorted(candidates):
+            end = text.find("\n", start) + 1 or len(text)
+            line = text[start:end]
+            column = candidates[start]
+
+            if self.pattern_regex is not None and (
+                self.required_regex is None or self.required_regex.search(line)
+            ):
+                match = self.pattern_regex.search(line)
+                if match and (column < 0 or match.start() < column):
+                    column = match.start()
+
+            if column >= 0:
+                line_index += text.count("\n", previous, start)
+                previous = start
+                yield line_index, column, line
@@ -0,0 +1,185 @@
+"""Profiling mode (``--profile``) for the Finnish text scanners.
+
+A profile splits the time of a scan into walking the tree, reading files
+(including hashing and decompressing them) and matching them (decoding,
+lexing and running the regexes), and keeps the ``top`` files that took the
+longest.  During the scan this costs a few ``perf_counter()`` calls per
+file and per block read, which is cheap enough to leave on in CI.
+
+The matcher runs all patterns as one combined regex, so their separate
+cost cannot be seen during the scan.  Once the scan is done, each pattern
+and the word list are timed on their own over the most expensive files,
+reading at most ``PATTERN_SAMPLE_BYTES`` of each.  A pattern that
+backtracks badly on some input shows up there.
+
+With a process pool, the read and match times add up the time spent in
+all worker processes, so together they can exceed the wall time.
+"""
+import heapq
+import json
+import os
+import re
+import time
+
+from finnish_archive import archive_type
+from finnish_matcher import build_word_regex
+
+# Files listed in the profile, most expensive first
+DEFAULT_TOP_FILES = 10
+
+# Bytes of each expensive file the patterns are timed on
+PATTERN_SAMPLE_BYTES = 1024 * 1024
+
+
+def profile_path(report_path):
+    """Return where the profile of a report is written: next to it, as .profile.json."""
+    return os.path.splitext(report_path)[0] + ".profile.json"
+
+
+class ScanProfile:
+    """Timings of a scan, filled in by Scanner as it goes."""
+
+    def __init__(self, matcher, top=DEFAULT_TOP_FILES):
+        self.matcher = matcher
+        self.top = top
+        self.walk = 0.0
+        self.read = 0.0
+        self.match = 0.0
+        self.files = 0
+        self.cached = 0
+        self.bytes = 0
+        self.hits = 0
+        # Min-heap of (seconds, sequence, record) holding the slowest files
+        self._slowest = []
+
+    def add_file(self, file_path, size, hits, timing=None):
+        """Record a file; timing is ``(seconds, read_seconds)``, None when it came from the cache."""
+        self.files += 1
+        self.bytes += size
+        self.hits += hits
+        if timing is None:
+            self.cached += 1
+            return
+
+        seconds, read_seconds = timing
+        self.read += read_seconds
+        self.match += seconds - read_seconds
+        entry = (seconds, self.files, {
+            "path": file_path,
+            "bytes": size,
+            "seconds": seconds,
+            "read_s": read_seconds,
+            "match_s": seconds - read_seconds,
+            "hits": hits,
+        })
+        if len(self._slowest) < self.top:
+            heapq.heappush(self._slowest, entry)
+        else:
+            heapq.heappushpop(self._slowest, entry)
+
+    def slowest_files(self):
+        """Return the records of the slowest files, slowest first."""
+        return [record for _, _, record in sorted(self._slowest, reverse=True)]
+
+    def _sample_texts(self):
+        """Read the start of each of the slowest files; archives are skipped."""
+        samples = []
+        for record in self.slowest_files():
+            if archive_type(record["path"]):
+                continue
+            try:
+                with open(record["path"], "rb") as f:
+                    data = f.read(PATTERN_SAMPLE_BYTES)
+            except OSError:
+                continue
+            samples.append((len(data), data.decode("utf-8", "ignore")))
+        return samples
+
+    def measure_patterns(self):
+        """Time every pattern and the word list on its own over the slowest files.
+
+        Patterns run line by line on the lines the matcher would hand them,
+        the word list over the whole text, as in the matcher.
+        """
+        matcher = self.matcher
+        samples = self._sample_texts()
+        lines = [line for _, text in samples for line in text.splitlines()]
+        if matcher.required_regex is not None:
+            lines = [line for line in lines if matcher.required_regex.search(line)]
+
+        results = []
+        for pattern in matcher.patterns:
+            regex = re.compile(pattern, matcher.flags)
+            started = time.perf_counter()
+            hits = sum(1 for line in lines if regex.search(line))
+            results.append({
+                "pattern": pattern,
+                "seconds": time.perf_counter() - started,
+                "hits": hits,
+            })
+        if matcher.words:
+            regex = build_word_regex(matcher.words, matcher.flags)
+            started = time.perf_counter()
+            hits = sum(1 for _, text in samples for _ in regex.finditer(text))
+            results.append({
+                "pattern": f"word list ({len(matcher.words)} words)",
+                "seconds": time.perf_counter() - started,
+                "hits": hits,
+            })
+
+        results.sort(key=lambda result: result["seconds"], reverse=True)
+        return {
+            "sample_files": len(samples),
+            "sample_bytes": sum(size for size, _ in samples),
+            "results": results,
+        }
+
+    def as_dict(self, stats, jobs=1):
+        """Return the profile as a JSON-serialisable dict; stats are the Scanner stats."""
+        return {
+            "wall_s": stats["elapsed"],
+            "jobs": jobs,
+            "walk_s": self.walk,
+            "read_s": self.read,
+            "match_s": self.match,
+            "files": self.files,
+            "cached": self.cached,
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "slowest_files": self.slowest_files(),
+            "patterns": self.measure_patterns(),
+        }
+
+    def write(self, path, stats, jobs=1):
+        """Write the profile as JSON and print a summary of it."""
+        profile = self.as_dict(stats, jobs)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(profile, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print_profile(profile)
+        print(f"Profile saved to {path}")
+        return profile
+
+
+def print_profile(profile):
+    """Print the time breakdown, the slowest files and the pattern costs of a profile."""
+    print(
+        f"Profile: walk {profile['walk_s']:.3f}s, read {profile['read_s']:.3f}s, "
+        f"match {profile['match_s']:.3f}s (wall {profile['wall_s']:.3f}s, "
+        f"{profile['cached']} of {profile['files']} files from cache)"
+    )
+    if profile["slowest_files"]:
+        print("Slowest files:")
+        for record in profile["slowest_files"]:
+            print(
+                f"  {record['seconds']:8.3f}s {record['bytes'] / (1024 * 1024):8.2f} MB "
+                f"{record['hits']:6d} hits  {record['path']}"
+            )
+    patterns = profile["patterns"]
+    if patterns["sample_files"]:
+        print(
+            f"Pattern cost on the slowest files ({patterns['sample_files']} files, "
+            f"{patterns['sample_bytes'] / (1024 * 1024):.2f} MB):"
+        )
+        for result in patterns["results"]:
+            print(f"  {result['seconds']:8.3f}s {result['hits']:6d} hits  {result['pattern']}")
@@ -0,0 +1,222 @@
+"""Constant-memory file reader for the Finnish text scanners.
+
+Files are read in fixed-size blocks and decoded incrementally the same way
+text-mode ``open()`` does (UTF-8, invalid bytes ignored, universal
+newlines).  Complete lines are handed to the matcher a block at a time.
+
+A line longer than ``MAX_LINE_LENGTH`` (typically a minified bundle) is
+never held in memory as a whole: it is matched in windows that overlap by
+``WINDOW_OVERLAP`` characters, and only the first hit in the line is
+reported.  A single match would have to be longer than the overlap to be
+missed at a window edge.
+
+JavaScript/TypeScript, Python and shell files are read through a lexer
+from finnish_lexer instead, which searches only their comments and string
+literals; other files (Markdown) are matched line by line.
+
+Binary files (a NUL byte in the first block) produce no findings.
+
+Findings are ``(line_number, column, context)`` with a 1-based column and a
+short context window around the hit instead of the whole line.
+"""
+import codecs
+import io
+import itertools
+import time
+
+from finnish_lexer import create_lexer
+from finnish_walker import is_binary_block
+
+# Bytes read from the file at a time
+CHUNK_SIZE = 1024 * 1024
+
+# Lines longer than this are matched in overlapping windows
+MAX_LINE_LENGTH = 1024 * 1024
+WINDOW_OVERLAP = 64 * 1024
+
+# Lines up to this length are reported whole, longer ones as a window of
+# CONTEXT_WIDTH characters on each side of the hit
+MAX_CONTEXT_LENGTH = 200
+CONTEXT_WIDTH = 60
+
+
+def make_context(line, column):
+    """Return the text reported for a hit at a 0-based column in a line."""
+    if len(line) <= MAX_CONTEXT_LENGTH:
+        return line.strip()
+
+    start = max(0, column - CONTEXT_WIDTH)
+    end = column + CONTEXT_WIDTH
+    snippet = line[start:end].strip()
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if end < len(line.rstrip()) else ""
+    return prefix + snippet + suffix
+
+
+def read_blocks(file_obj, hasher=None):
+    """Yield ``(block, is_last)`` pairs of raw bytes from a binary file."""
+    block = file_obj.read(CHUNK_SIZE)
+    while True:
+        if hasher is not None:
+            hasher.update(block)
+        following = file_obj.read(CHUNK_SIZE) if block else b""
+        yield block, not following
+        if not following:
+            return
+        block = following
+
+
+class ReadTimer:
+    """Seconds spent reading (and hashing) blocks of files, collected for --profile."""
+
+    def __init__(self):
+        self.seconds = 0.0
+
+    def timed(self, blocks):
+        """Yield from blocks, adding up the time spent producing each one."""
+        blocks = iter(blocks)
+        while True:
+            started = time.perf_counter()
+            item = next(blocks, None)
+            self.seconds += time.perf_counter() - started
+            if item is None:
+                return
+            yield item
+
+
+def _search_window(matcher, window, line_number, offset):
+    """Search one window of a long line; offset is its column in the line."""
+    # Past the first window, skip position 0 so \b sees the preceding text;
+    # anything starting there was covered by the previous window
+    column = matcher.search(window, 1 if offset else 0)
+    if column < 0:
+        return None
+    return line_number, offset + column + 1, make_context(window, column)
+
+
+def _lex_findings(lexer, texts):
+    """Yield the findings of a lexer fed with ``(text, is_last)`` pairs of decoded text."""
+    pending = ""       # Text the lexer has not consumed yet
+    line_number = 1    # Line number of pending
+    offset = 0         # Column where pending starts, > 0 only inside a long line
+    reported_line = 0  # Line of the last finding; one finding per line
+
+    for decoded, is_last in texts:
+        text = pending + decoded
+        if is_last:
+            end = len(text)
+        else:
+            end = text.rfind("\n") + 1
+            if not end:
+                if len(text) <= MAX_LINE_LENGTH:
+                    pending = text
+                    continue
+                # Inside a long line: lex what there is so far
+                end = len(text)
+
+        hits, consumed = lexer.feed(text[:end] if end < len(text) else text, is_last)
+
+        # Hits come in order; walk the lines along with them
+        cursor = 0
+        line_start = 0
+        for hit in hits:
+            # A hit before the text is the start of a span on the first line
+            newlines = text.count("\n", cursor, hit) if hit > cursor else 0
+            if newlines:
+                line_number += newlines
+                line_start = text.rfind("\n", cursor, hit) + 1
+            cursor = max(cursor, hit)
+            if line_number == reported_line:
+                continue
+            reported_line = line_number
+
+            line_end = text.find("\n", hit, end) + 1 or end
+            column = hit - line_start + (offset if line_start == 0 else 0)
+            yield line_number, column + 1, make_context(text[line_start:line_end], max(hit - line_start, 0))
+
+        line_number += text.count("\n", cursor, consumed)
+        last_newline = text.rfind("\n", 0, consumed)
+        offset = consumed - last_newline - 1 if last_newline >= 0 else offset + consumed
+        pending = text[consumed:]
+        if len(pending) > MAX_LINE_LENGTH:
+            # Only a heredoc line can be held back this long; skip ahead in it
+            drop = len(pending) - WINDOW_OVERLAP
+            pending = pending[drop:]
+            offset += drop
+
+
+def iter_findings(file_obj, matcher, hasher=None, lexer=None, timer=None):
+    """Yield ``(line_number, column, context)`` for matching lines of a binary file.
+
+    If ``hasher`` is given it is updated with every byte read, also for
+    binary files that are not scanned.  With a ``lexer`` only the comments
+    and string literals it finds are searched.  A ReadTimer given as
+    ``timer`` adds up the time spent reading.
+    """
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder("utf-8")(errors="ignore"), translate=True
+    )
+    pending = ""      # Incomplete last line carried over to the next block
+    line_number = 1   # Line number of pending
+    offset = 0        # Column where pending starts, > 0 only inside a long line
+    reported = False  # Whether the current long line already had a hit
+
+    blocks = read_blocks(file_obj, hasher)
+    if timer is not None:
+        blocks = timer.timed(blocks)
+    for index, (block, is_last) in enumerate(blocks):
+        if index == 0:
+            if is_binary_block(block):
+                if hasher is not None:
+                    # Keep the content hash complete
+                    for _ in blocks:
+                        pass
+                return
+            if is_last and not matcher.may_match_bytes(block):
+                # Small file without Finnish bytes: no need to decode it at all
+                return
+            if lexer is not None:
+                texts = (
+                    (decoder.decode(data, final=last), last)
+                    for data, last in itertools.chain([(block, is_last)], blocks)
+                )
+                yield from _lex_findings(lexer, texts)
+                return
+
+        text = pending + decoder.decode(block, final=is_last)
+        cut = len(text) if is_last else text.rfind("\n") + 1
+        start = 0
+
+        if offset and cut:
+            # The long line ends in this block
+            start = text.find("\n") + 1 or len(text)
+            if not reported:
+                finding = _search_window(matcher, text[:start], line_number, offset)
+                if finding:
+                    yield finding
+            line_number += 1
+            offset = 0
+            reported = False
+
+        if cut > start:
+            lines = text[start:cut]
+            for line_index, column, line in matcher.scan(lines):
+                yield line_number + line_index, column + 1, make_context(line, column)
+            line_number += lines.count("\n")
+
+        pending = text[cut:]
+        if len(pending) > MAX_LINE_LENGTH:
+            if not reported:
+                finding = _search_window(matcher, pending, line_number, offset)
+                if finding:
+                    reported = True
+                    yield finding
+            drop = len(pending) - WINDOW_OVERLAP
+            pending = pending[drop:]
+            offset += drop
+
+
+def scan_path(file_path, matcher, hasher=None, timer=None):
+    """Return the findings of a file as a list."""
+    with open(file_path, "rb") as f:
+        return list(iter_findings(f, matcher, hasher, create_lexer(file_path, matcher), timer))
@@ -0,0 +1,154 @@
+"""Persistent incremental scan cache for the Finnish text scanners.
+
+Findings are stored per file in a small SQLite database together with the
+file's size, modification time and content hash:
+
+* size and mtime unchanged -> the stored findings are reused without
+  opening the file;
+* size or mtime changed but the content hash is the same (for example after
+  a ``git checkout``) -> the stored findings are reused without re-scanning;
+* otherwise the file is scanned again.
+
+The whole cache is dropped when the matcher fingerprint (patterns, word list,
+flags) or the findings format changes.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+
+from finnish_archive import archive_type, scan_archive
+from finnish_reader import read_blocks, scan_path
+
+# Bump when the structure of the stored findings changes
+CACHE_VERSION = 4
+
+# Files modified this recently may still change within the same mtime tick,
+# so their content hash is always re-checked on the next run
+RACY_WINDOW_NS = 2 * 1_000_000_000
+
+
+def new_hasher():
+    """Return the hash object used for file contents."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def hash_file(file_path, timer=None):
+    """Return the content hash of a file, reading it in bounded blocks."""
+    hasher = new_hasher()
+    with open(file_path, "rb") as f:
+        blocks = read_blocks(f, hasher)
+        for _ in (blocks if timer is None else timer.timed(blocks)):
+            pass
+    return hasher.hexdigest()
+
+
+def scan_file(file_path, matcher, known_digest=None, members=None, timer=None):
+    """Hash and scan a file.
+
+    Returns ``(digest, findings)`` where findings is a list of
+    ``(line_number, column, context)`` tuples, or None when the content hash
+    equals ``known_digest`` and the stored findings are still valid.  The
+    findings of an archive have the member name as a fourth item; ``members``
+    is the finnish_archive.MemberFilter picking the members to scan.  A
+    finnish_reader.ReadTimer given as ``timer`` adds up the time spent reading.
+    """
+    if known_digest is not None:
+        digest = hash_file(file_path, timer)
+        if digest == known_digest:
+            return digest, None
+
+    hasher = new_hasher()
+    if archive_type(file_path):
+        findings = scan_archive(file_path, matcher, hasher, members, timer)
+    else:
+        findings = scan_path(file_path, matcher, hasher, timer)
+    return hasher.hexdigest(), findings
+
+
+class ScanCache:
+    """SQLite-backed store of per-file fingerprints and findings."""
+
+    def __init__(self, db_path, fingerprint):
+        self.db_path = db_path
+        self.signature = f"{CACHE_VERSION}:{fingerprint}"
+        self.seen = set()
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime_ns INTEGER,
+                digest TEXT,
+                findings TEXT
+            );
+            """
+        )
+
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'signature'"
+        ).fetchone()
+        if row is None or row[0] != self.signature:
+            # Patterns or format changed: every stored result is stale
+            self.connection.execute("DELETE FROM files")
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)",
+                (self.signature,),
+            )
+
+    def lookup(self, file_path, stat_result):
+        """Look up a file.
+
+        Returns ``(fresh, digest, findings)``: fresh is True when size and mtime
+        still match, so findings can be used as is. Otherwise digest and
+        findings are the last stored values (or None) for a hash comparison.
+        """
+        self.seen.add(file_path)
+        row = self.connection.execute(
+            "SELECT size, mtime_ns, digest, findings FROM files WHERE path = ?",
+            (file_path,),
+        ).fetchone()
+        if row is None:
+            return False, None, None
+
+        size, mtime_ns, digest, findings = row
+        findings = [tuple(finding) for finding in json.loads(findings)]
+        fresh = size == stat_result.st_size and mtime_ns == stat_result.st_mtime_ns
+        return fresh, digest, findings
+
+    def store(self, file_path, stat_result, digest, findings):
+        """Store the fingerprint and findings of a scanned file."""
+        self.seen.add(file_path)
+        mtime_ns = stat_result.st_mtime_ns
+        if time.time_ns() - mtime_ns < RACY_WINDOW_NS:
+            mtime_ns = -1
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, digest, findings) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (file_path, stat_result.st_size, mtime_ns, digest, json.dumps(findings)),
+        )
+
+    def close(self, prune=True):
+        """Write the cache.
+
+        With prune set, entries for files not seen in this run are dropped;
+        leave it off when only some of the files were scanned.
+        """
+        if prune:
+            stale = [
+                (path,)
+                for (path,) in self.connection.execute("SELECT path FROM files")
+                if path not in self.seen
+            ]
+            self.connection.executemany("DELETE FROM files WHERE path = ?", stale)
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
@@ -0,0 +1,268 @@
+"""Scanner library shared by finnish_finder.py and cascade_finnish_finder.py.
+
+``Scanner.scan()`` walks a directory and yields ``Finding`` records file by
+file, in walk order, as soon as they are available.  Nothing is collected
+into a report in memory; writers from ``finnish_writers`` turn the stream
+into the text, JSONL or SARIF output.
+
+Scans can run in a process pool (``jobs``) and use the persistent scan
+cache (``cache_path``); neither changes the findings or their order.  With
+``archives`` set, tarballs, zips and compressed files are scanned as well
+(see finnish_archive) and their findings reported as ``archive!member``.
+A ``profile`` (finnish_profile.ScanProfile) records where the time went.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from finnish_archive import ARCHIVE_SUFFIXES, MEMBER_SEPARATOR, MemberFilter, is_wanted_file
+from finnish_reader import ReadTimer
+from finnish_scan_cache import ScanCache, scan_file
+from finnish_walker import walk_files
+
+# Number of chunks handed to each worker; more chunks smooth out uneven files
+CHUNKS_PER_JOB = 4
+
+
+class Finding:
+    """A single hit, or a file that could not be read when ``error`` is set.
+
+    ``original`` is the ``(path, line, column)`` the hit maps back to
+    through a source map, when one was resolved.
+    """
+
+    __slots__ = ("path", "line", "column", "text", "error", "original")
+
+    def __init__(self, path, line, column, text, error=False, original=None):
+        self.path = path
+        self.line = line
+        self.column = column
+        self.text = text
+        self.error = error
+        self.original = original
+
+    def __repr__(self):
+        return (
+            f"Finding({self.path!r}, {self.line}, {self.column}, {self.text!r}"
+            f"{', error=True' if self.error else ''}"
+            f"{f', original={self.original!r}' if self.original else ''})"
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, Finding):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def as_dict(self):
+        """Return the finding as a JSON-serialisable dict."""
+        result = {name: getattr(self, name) for name in self.__slots__ if name != "original"}
+        if self.original:
+            path, line, column = self.original
+            result["original"] = {"path": path, "line": line, "column": column}
+        return result
+
+
+def stat_file(file_path):
+    """Return os.stat() of a file, or None if it cannot be read."""
+    try:
+        return os.stat(file_path)
+    except OSError:
+        return None
+
+
+def scan_entry(file_path, matcher, known_digest=None, members=None, timer=None):
+    """Scan a file, returning (digest, findings, error) without raising."""
+    try:
+        digest, findings = scan_file(file_path, matcher, known_digest, members, timer)
+        return digest, findings, None
+    except Exception as e:
+        return None, None, str(e)
+
+
+def balance_chunks(sizes, chunk_count):
+    """Split file indexes into chunks of roughly equal total size.
+
+    Files are assigned largest first to the currently lightest chunk, so a
+    single huge bundle does not end up queued behind many other files.
+    """
+    chunks = [[] for _ in range(chunk_count)]
+    loads = [0] * chunk_count
+    for index in sorted(range(len(sizes)), key=lambda i: sizes[i], reverse=True):
+        lightest = loads.index(min(loads))
+        chunks[lightest].append(index)
+        loads[lightest] += sizes[index]
+    return [chunk for chunk in chunks if chunk]
+
+
+def process_chunk(entries, matcher, members=None, timed=False):
+    """Scan a chunk of (index, path, known_digest) entries in a worker process.
+
+    With timed set, each result ends with ``(seconds, read_seconds)``.
+    """
+    if not timed:
+        return [
+            (index, *scan_entry(file_path, matcher, known_digest, members))
+            for index, file_path, known_digest in entries
+        ]
+
+    results = []
+    for index, file_path, known_digest in entries:
+        timer = ReadTimer()
+        started = time.perf_counter()
+        result = scan_entry(file_path, matcher, known_digest, members, timer)
+        results.append((index, *result, (time.perf_counter() - started, timer.seconds)))
+    return results
+
+
+def filter_by_score(findings, min_score=None):
+    """Drop findings with a Finnish likelihood score below min_score, when it is set."""
+    if min_score is None:
+        return findings
+    # NumPy is only needed for scoring
+    from finnish_scorer import TrigramScorer
+    return TrigramScorer().filter_findings(findings, min_score)
+
+
+def print_throughput(stats):
+    """Print scan throughput in files/s and MB/s."""
+    elapsed = max(stats["elapsed"], 1e-9)
+    megabytes = stats["bytes"] / (1024 * 1024)
+    from_cache = f", {stats['cached']} from cache" if stats["cached"] else ""
+    print(
+        f"Scanned {stats['files']} files ({megabytes:.2f} MB{from_cache}) in {elapsed:.2f}s: "
+        f"{stats['files'] / elapsed:.1f} files/s, {megabytes / elapsed:.2f} MB/s"
+    )
+
+
+class Scanner:
+    """Walk a directory tree and stream the Finnish text findings of its files."""
+
+    def __init__(self, matcher, extensions, exclude=(), use_gitignore=True,
+                 jobs=1, cache_path=None, archives=False, profile=None):
+        self.matcher = matcher
+        self.extensions = extensions
+        self.exclude = list(exclude)
+        self.use_gitignore = use_gitignore
+        self.jobs = jobs
+        self.cache_path = cache_path
+        self.archives = archives
+        self.profile = profile
+        self.members = MemberFilter(extensions, self.exclude) if archives else None
+        self.fingerprint = matcher.fingerprint
+        if archives:
+            self.fingerprint += ":" + self.members.signature
+        self.stats = {"files": 0, "bytes": 0, "cached": 0, "elapsed": 0.0}
+
+    def wants_file(self, file_path):
+        """Check whether a file name is one of the types scanned."""
+        if self.archives:
+            return is_wanted_file(file_path, self.extensions)
+        return file_path.endswith(self.extensions)
+
+    def list_files(self, root_dir):
+        """Return the files to scan under root_dir, in walk order.
+
+        Binary files are skipped by the reader, which sniffs the block it
+        reads anyway.  root_dir may also be a single file, such as an
+        archive.
+        """
+        if os.path.isfile(root_dir):
+            return [root_dir]
+        started = time.perf_counter()
+        extensions = self.extensions + ARCHIVE_SUFFIXES if self.archives else self.extensions
+        files = walk_files(root_dir, extensions, self.exclude, self.use_gitignore,
+                           sniff_binary=False)
+        files = [file_path for file_path in files if self.wants_file(file_path)]
+        if self.profile is not None:
+            self.profile.walk += time.perf_counter() - started
+        return files
+
+    def _scan_pending(self, pending, sizes):
+        """Yield (index, digest, findings, error) for pending entries in order."""
+        timed = self.profile is not None
+        if self.jobs <= 1 or len(pending) <= 1:
+            for entry in pending:
+                yield process_chunk([entry], self.matcher, self.members, timed)[0]
+            return
+
+        chunk_count = min(len(pending), self.jobs * CHUNKS_PER_JOB)
+        chunks = balance_chunks([sizes[entry[0]] for entry in pending], chunk_count)
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            futures = [
+                executor.submit(process_chunk, [pending[i] for i in chunk], self.matcher,
+                                self.members, timed)
+                for chunk in chunks
+            ]
+            completed = as_completed(futures)
+            ready = {}
+            for index, _, _ in pending:
+                # Results arrive per chunk; hold them until their turn comes
+                while index not in ready:
+                    for result in next(completed).result():
+                        ready[result[0]] = result
+                yield ready.pop(index)
+
+    def scan_files(self, files, started=None, prune_cache=True):
+        """Yield Finding records for the given files, in order.
+
+        ``self.stats`` is updated once the generator is exhausted; ``started``
+        is the perf_counter() value the elapsed time is measured from.  Turn
+        ``prune_cache`` off when files is only part of the tree.
+        """
+        started = time.perf_counter() if started is None else started
+        stats = [stat_file(file_path) for file_path in files]
+        sizes = [stat.st_size if stat else 0 for stat in stats]
+
+        cache = ScanCache(self.cache_path, self.fingerprint) if self.cache_path else None
+        try:
+            cached = {}
+            pending = []
+            for index, file_path in enumerate(files):
+                known_digest = None
+                if cache and stats[index]:
+                    fresh, known_digest, findings = cache.lookup(file_path, stats[index])
+                    cached[index] = findings
+                    if fresh:
+                        continue
+                pending.append((index, file_path, known_digest))
+
+            pending_indexes = {entry[0] for entry in pending}
+            scanned = self._scan_pending(pending, sizes)
+            for index, file_path in enumerate(files):
+                if index in pending_indexes:
+                    _, digest, findings, error, *timing = next(scanned)
+                    if error:
+                        if self.profile is not None:
+                            self.profile.add_file(file_path, sizes[index], 0, *timing)
+                        yield Finding(file_path, 0, 0, error, error=True)
+                        continue
+                    if findings is None:
+                        # Content unchanged, reuse the findings stored in the cache
+                        findings = cached[index]
+                    if self.profile is not None:
+                        self.profile.add_file(file_path, sizes[index], len(findings), *timing)
+                    if cache and stats[index]:
+                        cache.store(file_path, stats[index], digest, findings)
+                else:
+                    findings = cached[index]
+                    if self.profile is not None:
+                        self.profile.add_file(file_path, sizes[index], len(findings))
+
+                for line, column, text, *member in findings:
+                    path = file_path + MEMBER_SEPARATOR + member[0] if member else file_path
+                    yield Finding(path, line, column, text)
+        finally:
+            if cache:
+                cache.close(prune=prune_cache)
+
+        self.stats = {
+            "files": len(files),
+            "bytes": sum(sizes),
+            "cached": len(files) - len(pending),
+            "elapsed": time.perf_counter() - started,
+        }
+
+    def scan(self, root_dir):
+        """Yield Finding records for every file under root_dir, in walk order."""
+        started = time.perf_counter()
+        yield from self.scan_files(self.list_files(root_dir), started)
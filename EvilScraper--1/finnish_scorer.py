@@ -0,0 +1,162 @@
+"""Finnish likelihood scoring for scanner findings.
+
+The matchers flag any string with an ``ä`` or ``ö`` in it and any Finnish
+word from the list, which includes short words that also occur in English
+text and code.  ``TrigramScorer`` gives each finding a score between 0 and
+1: the naive Bayes posterior that its text is Finnish rather than English
+or code, from character trigram frequencies of two small built-in samples.
+
+Texts are scored in batches with NumPy.  A batch is joined into one array
+of code points, mapped to a 30-letter alphabet, and every trigram is
+turned into an index into a table of log-likelihood ratios.  The ratios are
+summed per word and then per text with ``np.bincount``; no Python code runs
+per text.
+
+NumPy is only needed when scoring is turned on; ``filter_by_score()`` in
+finnish_scanner imports this module lazily.
+"""
+import numpy as np
+
+# Findings scoring below this are dropped
+DEFAULT_THRESHOLD = 0.5
+
+# Findings scored together
+BATCH_SIZE = 8192
+
+# a-z, ä, ö and å (either case); everything else is a word boundary
+ALPHABET = "abcdefghijklmnopqrstuvwxyzäöå"
+ALPHABET_SIZE = len(ALPHABET) + 1
+
+# Additive smoothing of the trigram counts
+SMOOTHING = 0.5
+
+# Weight of the evidence of words that look English; a Finnish message inside
+# a line of code should not be outvoted by the code around it
+NEGATIVE_WEIGHT = 0.5
+
+FINNISH_SAMPLE = """
+Tämä raportti kuvaa komponentin testausta ja sen tuloksia. Järjestelmä käyttää
+ensisijaisesti halvinta palveluntarjoajaa, ja jos pyyntö epäonnistuu, se siirtyy
+seuraavaan palveluntarjoajaan. Virheellinen syöte tai liian pitkä konteksti
+palauttaa virheilmoituksen. Yritä myöhemmin uudelleen tai tarkista asetukset.
+Palvelin ei vastannut ajoissa, joten pyyntö aikakatkaistiin. Olet avulias
+tekoälyassistentti, joka vastaa kysymyksiin selkeästi ja tarkasti. Autat
+käyttäjää tekemään perusteltuja päätöksiä ja analysoimaan vaihtoehtoja.
+Kaikki pakolliset kentät on täytettävä ennen kuin lomake voidaan lähettää.
+Tiedoston lukeminen ei onnistunut, koska sitä ei löytynyt annetusta hakemistosta.
+Käyttäjällä ei ole oikeuksia tähän toimintoon. Odota hetki ja lataa sivu uudelleen.
+Malli on ladattu muistiin ja valmis käyttöön. Vastauksen muodostaminen kesti
+odotettua kauemmin, mutta tulos tallennettiin onnistuneesti tietokantaan.
+Testit toteutettiin käyttäen testikehystä, ja ne varmistavat, että kaikki
+toiminnot toimivat odotetusti myös silloin, kun yhteys katkeaa kesken siirron.
+Määritä ympäristömuuttujat ja käynnistä palvelu uudelleen, jotta muutokset tulevat
+voimaan. Sisältösuodatin esti vastauksen, koska se sisälsi kiellettyä sisältöä.
+Samanaikaisten pyyntöjen määrä ylittää sallitut rajat, joten osa pyynnöistä hylättiin.
+Haluatko varmasti poistaa valitut kohteet? Tätä toimintoa ei voi perua.
+"""
+
+ENGLISH_SAMPLE = """
+This report describes how the component was tested and what the results were.
+The system uses the cheapest provider first, and if the request fails it falls
+back to the next provider. Invalid input or a context that is too long returns
+an error message. Please try again later or check your settings. The server did
+not respond in time, so the request timed out. You are a helpful assistant that
+answers questions clearly and accurately. All required fields must be filled in
+before the form can be submitted. The file could not be read because it was not
+found in the given directory. The user does not have permission for this action.
+const response = await fetch(url, { method: 'POST', headers: headers, body: data });
+export function handleError(error) { logger.warn('Request failed', error.message); }
+import { Injectable } from '@nestjs/common'; return this.configService.get('API_KEY');
+if (result === undefined || result === null) throw new Error('Unexpected response');
+def process_file(file_path): return [line for line in open(file_path) if line.strip()]
+for index, value in enumerate(values): print(f"{index}: {value}") # debug output
+function(e,t){return e&&e.__esModule?e:{default:e}};var n=require("./module.js");
+echo "Starting server on port $PORT" && npm run build && node dist/main.js --verbose
+Maximum number of concurrent requests exceeded, some requests were rejected.
+Are you sure you want to delete the selected items? This action cannot be undone.
+Set the environment variables and restart the service so the changes take effect.
+"""
+
+
+def _code_table():
+    """Map code points below 256 to alphabet codes, 0 for non-letters."""
+    table = np.zeros(256, dtype=np.int32)
+    for code, letter in enumerate(ALPHABET, start=1):
+        table[ord(letter)] = code
+        table[ord(letter.upper())] = code
+    return table
+
+
+CODE_TABLE = _code_table()
+
+
+def _encode(texts):
+    """Return the alphabet codes of the texts joined by newlines, and each char's text index."""
+    joined = "\n" + "\n".join(texts) + "\n"
+    points = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32)
+    codes = CODE_TABLE[np.minimum(points, 255)]
+    codes[points > 255] = 0
+    text_index = np.cumsum(points == ord("\n")) - 1
+    return codes, text_index
+
+
+def _trigrams(codes):
+    """Return the trigram indexes of codes and a mask of those centred on a letter."""
+    indexes = (codes[:-2] * ALPHABET_SIZE + codes[1:-1]) * ALPHABET_SIZE + codes[2:]
+    return indexes, codes[1:-1] != 0
+
+
+def _log_probabilities(text):
+    codes, _ = _encode([text])
+    indexes, letters = _trigrams(codes)
+    counts = np.bincount(indexes[letters], minlength=ALPHABET_SIZE ** 3) + SMOOTHING
+    return np.log(counts / counts.sum())
+
+
+class TrigramScorer:
+    """Score texts by how Finnish their character trigrams are."""
+
+    def __init__(self, finnish_sample=FINNISH_SAMPLE, other_sample=ENGLISH_SAMPLE):
+        self.log_ratios = _log_probabilities(finnish_sample) - _log_probabilities(other_sample)
+
+    def score(self, texts):
+        """Return an array with the Finnish likelihood (0 to 1) of each text."""
+        if not texts:
+            return np.zeros(0)
+        codes, text_index = _encode(texts)
+        indexes, letters = _trigrams(codes)
+
+        # Sum the evidence per word first, so English words can be down-weighted
+        word_starts = (codes[1:] != 0) & (codes[:-1] == 0)
+        word_index = np.cumsum(word_starts)
+        word_evidence = np.bincount(
+            word_index[:-1][letters],
+            weights=self.log_ratios[indexes[letters]],
+            minlength=word_index[-1] + 1,
+        )[1:]
+        word_evidence[word_evidence < 0] *= NEGATIVE_WEIGHT
+
+        evidence = np.bincount(text_index[1:][word_starts], weights=word_evidence,
+                               minlength=len(texts))
+        return 1.0 / (1.0 + np.exp(-np.clip(evidence, -50.0, 50.0)))
+
+    def filter_findings(self, findings, threshold=DEFAULT_THRESHOLD, batch_size=BATCH_SIZE):
+        """Yield the findings whose text scores at least threshold, in order.
+
+        Read errors are passed through unscored.
+        """
+        batch = []
+        for finding in findings:
+            batch.append(finding)
+            if len(batch) >= batch_size:
+                yield from self._filter_batch(batch, threshold)
+                batch = []
+        yield from self._filter_batch(batch, threshold)
+
+    def _filter_batch(self, batch, threshold):
+        candidates = [finding for finding in batch if not finding.error]
+        scores = iter(self.score([finding.text.replace("\n", " ") for finding in candidates]))
+        for finding in batch:
+            if finding.error or next(scores) >= threshold:
+                yield finding
+
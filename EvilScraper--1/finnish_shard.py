@@ -0,0 +1,164 @@
+"""Sharded scans for finnish_finder.py.
+
+``--shard K/N`` scans only the files whose path hashes to shard K of N, so
+one scan can be split across CI runners without any coordination between
+them.  The hash is taken from the path relative to the scanned root, so
+every runner picks the same files wherever its checkout lives.
+
+Each shard writes a partial report: a header naming the shard, its findings
+as JSON lines (the same records as ``--jsonl``) and a summary with the scan
+stats.  ``ShardMerge`` reads the partial reports of all N shards and yields
+their findings in the walk order of a single run.  Every partial is already
+in walk order, so this is a streaming k-way merge, and the merged report is
+the same as the report of a single run.
+"""
+import hashlib
+import heapq
+import json
+import os
+from collections import Counter
+
+from finnish_scanner import Finding
+from finnish_walker import walk_order_key
+from finnish_writers import JsonLinesWriter
+
+# Bump when the partial report records change
+PARTIAL_FORMAT = 1
+
+# Bytes at the end of a partial report searched for its summary record
+SUMMARY_TAIL = 64 * 1024
+
+
+def parse_shard(value):
+    """Parse a ``K/N`` shard spec into ``(K, N)`` with 1 <= K <= N."""
+    shard, _, shards = value.partition("/")
+    shard, shards = int(shard), int(shards)
+    if not 1 <= shard <= shards:
+        raise ValueError(f"shard {value} is not K/N with 1 <= K <= N")
+    return shard, shards
+
+
+def shard_of(rel_path, shards):
+    """Return the 1-based shard of a path relative to the scanned root."""
+    key = rel_path.replace(os.sep, "/").encode("utf-8", "surrogateescape")
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shards + 1
+
+
+def select_shard(files, root_dir, shard, shards):
+    """Return the files of a file list that belong to shard K of N."""
+    return [
+        file_path for file_path in files
+        if shard_of(os.path.relpath(file_path, root_dir), shards) == shard
+    ]
+
+
+class PartialReportWriter(JsonLinesWriter):
+    """Partial report of one shard: a header, the JSONL findings and a summary with stats."""
+
+    def __init__(self, stream, shard, shards, root_dir, scanner):
+        super().__init__(stream)
+        self.header = {
+            "type": "shard",
+            "format": PARTIAL_FORMAT,
+            "shard": shard,
+            "shards": shards,
+            "root": root_dir,
+        }
+        self.scanner = scanner
+
+    def start(self):
+        self.stream.write(json.dumps(self.header, ensure_ascii=False) + "\n")
+
+    def finish(self, summary):
+        # The finding stream is exhausted by now, so the scanner stats are final
+        super().finish({**summary, "stats": self.scanner.stats})
+
+
+def finding_from_record(record):
+    """Rebuild a Finding from a JSONL finding or error record."""
+    original = record.get("original")
+    if original:
+        original = (original["path"], original["line"], original["column"])
+    return Finding(record["path"], record["line"], record["column"], record["text"],
+                   error=record["type"] == "error", original=original)
+
+
+class PartialReport:
+    """A partial report written by one shard; raises ValueError if it is not one."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self.header = json.loads(f.readline())
+            except ValueError:
+                self.header = None
+            if not isinstance(self.header, dict) or self.header.get("type") != "shard":
+                raise ValueError(f"{path} is not a partial report")
+            if self.header.get("format") != PARTIAL_FORMAT:
+                raise ValueError(f"{path} has an unsupported partial report format")
+
+            # A shard that did not finish has no summary record at the end
+            f.seek(max(0, os.fstat(f.fileno()).st_size - SUMMARY_TAIL))
+            lines = f.read().splitlines()
+        try:
+            summary = json.loads(lines[-1])
+        except (IndexError, ValueError):
+            summary = None
+        if not isinstance(summary, dict) or summary.get("type") != "summary":
+            raise ValueError(f"{path} is incomplete, its shard did not finish")
+        self.stats = summary["stats"]
+
+    def findings(self):
+        """Yield the findings of the report, in the order they were written."""
+        with open(self.path, "r", encoding="utf-8") as f:
+            next(f)
+            for line in f:
+                record = json.loads(line)
+                if record["type"] != "summary":
+                    yield finding_from_record(record)
+
+
+class ShardMerge:
+    """The partial reports of all shards of a scan, merged back into one finding stream.
+
+    Raises ValueError unless the reports cover every shard of the same scan
+    exactly once.
+    """
+
+    def __init__(self, paths):
+        self.reports = [PartialReport(path) for path in paths]
+        if not self.reports:
+            raise ValueError("no partial reports given")
+
+        headers = [report.header for report in self.reports]
+        if len({(header["shards"], header["root"]) for header in headers}) > 1:
+            raise ValueError("the partial reports come from different scans")
+        self.root = headers[0]["root"]
+        shards = headers[0]["shards"]
+
+        counts = Counter(header["shard"] for header in headers)
+        duplicates = sorted(shard for shard, count in counts.items() if count > 1)
+        missing = [shard for shard in range(1, shards + 1) if shard not in counts]
+        if duplicates:
+            raise ValueError(f"shards {duplicates} of {shards} are given more than once")
+        if missing:
+            raise ValueError(f"shards {missing} of {shards} are missing")
+
+        # Shards run side by side, so the scan took as long as the slowest one
+        stats = [report.stats for report in self.reports]
+        self.stats = {
+            "files": sum(stat["files"] for stat in stats),
+            "bytes": sum(stat["bytes"] for stat in stats),
+            "cached": sum(stat["cached"] for stat in stats),
+            "elapsed": max(stat["elapsed"] for stat in stats),
+        }
+
+    def _order_key(self, finding):
+        return walk_order_key(os.path.relpath(finding.path, self.root))
+
+    def findings(self):
+        """Yield the findings of all shards in the walk order of a single run."""
+        # Each file is in one shard, so a file's findings keep their order
+        return heapq.merge(*(report.findings() for report in self.reports), key=self._order_key)
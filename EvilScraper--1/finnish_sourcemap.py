@@ -0,0 +1,233 @@
+"""Source map support for the dist scan.
+
+Hits in a bundle are resolved to the original source file, line and column
+through the bundle's source map: ``bundle.js.map`` next to it, or the file
+named by its ``//# sourceMappingURL=`` comment (inline ``data:`` maps
+included).
+
+A map is read and its VLQ mappings decoded only when the first hit in its
+bundle is resolved.  The decoded map is an index with a sorted list of
+generated columns per generated line, so each lookup is one
+``bisect``.  Decoded maps are kept in an LRU cache of ``MAX_CACHED_MAPS``
+entries and reloaded when the map file changes.
+
+Columns are counted in characters, while source maps count UTF-16 code
+units; the two only differ after characters outside the Basic Multilingual
+Plane on the same line.
+"""
+import base64
+import json
+import os
+import re
+from bisect import bisect_right
+from collections import OrderedDict
+from urllib.parse import unquote
+
+# Decoded source maps kept in memory
+MAX_CACHED_MAPS = 32
+
+# Bytes at the end of a bundle searched for a sourceMappingURL comment
+URL_COMMENT_TAIL = 4096
+
+BASE64_VALUES = {
+    char: value
+    for value, char in enumerate("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/")
+}
+
+SOURCE_MAPPING_URL = re.compile(rb"[@#]\s*sourceMappingURL=(\S+)")
+URL_SCHEME = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*:")
+
+
+def decode_vlq(segment):
+    """Decode one Base64 VLQ mapping segment into a list of integers."""
+    values = []
+    value = shift = 0
+    for char in segment:
+        digit = BASE64_VALUES[char]
+        value += (digit & 31) << shift
+        if digit & 32:
+            shift += 5
+            continue
+        values.append(-(value >> 1) if value & 1 else value >> 1)
+        value = shift = 0
+    return values
+
+
+def decode_mappings(mappings):
+    """Decode a ``mappings`` string into per-line ``(columns, targets)`` lists.
+
+    ``columns`` holds the sorted generated columns of a line and
+    ``targets`` the matching ``(source_index, line, column)``, all 0-based,
+    or None for segments that map to no source.
+    """
+    lines = []
+    source = source_line = source_column = 0
+    # Maps repeat the same few segments ("AAAA", "CAAC", ...) over and over
+    decoded = {}
+    for line in mappings.split(";"):
+        columns = []
+        targets = []
+        column = 0
+        unsorted = False
+        for segment in line.split(","):
+            if not segment:
+                continue
+            fields = decoded.get(segment)
+            if fields is None:
+                fields = decoded[segment] = decode_vlq(segment)
+            column += fields[0]
+            unsorted = unsorted or fields[0] < 0
+            if len(fields) >= 4:
+                source += fields[1]
+                source_line += fields[2]
+                source_column += fields[3]
+                target = (source, source_line, source_column)
+            else:
+                target = None
+            columns.append(column)
+            targets.append(target)
+
+        # Segments are sorted by column in practice, but the spec does not require it
+        if unsorted:
+            pairs = sorted(zip(columns, targets), key=lambda pair: pair[0])
+            columns = [pair[0] for pair in pairs]
+            targets = [pair[1] for pair in pairs]
+        lines.append((columns, targets))
+    return lines
+
+
+def source_path(map_dir, source_root, source):
+    """Return the path of a source listed in a map, as it should be reported."""
+    source = (source_root.rstrip("/") + "/" + source) if source_root else source
+    if source.startswith("webpack://"):
+        # webpack://<namespace>/./src/app.ts
+        source = source[len("webpack://"):].partition("/")[2]
+        return os.path.normpath(source)
+    if source.startswith("file://"):
+        return os.path.normpath(unquote(source[len("file://"):]))
+    if URL_SCHEME.match(source):
+        return source
+    return os.path.normpath(os.path.join(map_dir, unquote(source)))
+
+
+class SourceMap:
+    """A decoded source map."""
+
+    def __init__(self, data, map_dir):
+        self.lines = decode_mappings(data.get("mappings", ""))
+        source_root = data.get("sourceRoot") or ""
+        self.sources = [source_path(map_dir, source_root, source or "")
+                        for source in data.get("sources", [])]
+
+    def lookup(self, line, column):
+        """Map a 1-based generated line and column to ``(source, line, column)``, 1-based.
+
+        Returns None when nothing in the map covers the position.
+        """
+        if not 0 < line <= len(self.lines):
+            return None
+        columns, targets = self.lines[line - 1]
+        index = bisect_right(columns, column - 1) - 1
+        if index < 0 or targets[index] is None:
+            return None
+        source, source_line, source_column = targets[index]
+        if source >= len(self.sources):
+            return None
+        return self.sources[source], source_line + 1, source_column + 1
+
+
+def find_map(bundle_path):
+    """Return ``(map_path, data_url)`` for a bundle; both None if it has no map.
+
+    The adjacent ``.map`` file is preferred; otherwise the bundle's
+    sourceMappingURL comment is used.
+    """
+    adjacent = bundle_path + ".map"
+    if os.path.isfile(adjacent):
+        return adjacent, None
+    try:
+        with open(bundle_path, "rb") as f:
+            f.seek(max(0, os.fstat(f.fileno()).st_size - URL_COMMENT_TAIL))
+            tail = f.read()
+    except OSError:
+        return None, None
+
+    matches = SOURCE_MAPPING_URL.findall(tail)
+    if not matches:
+        return None, None
+    url = matches[-1].decode("utf-8", "replace")
+    if url.startswith("data:"):
+        return None, url
+    if URL_SCHEME.match(url):
+        return None, None
+    map_path = os.path.join(os.path.dirname(bundle_path), unquote(url.split("?")[0]))
+    return (map_path, None) if os.path.isfile(map_path) else (None, None)
+
+
+def load_map(bundle_path, map_path, data_url):
+    """Load and decode the source map find_map found for a bundle; None without a usable map."""
+    try:
+        if data_url:
+            header, _, payload = data_url.partition(",")
+            raw = base64.b64decode(payload) if header.endswith(";base64") else unquote(payload)
+            return SourceMap(json.loads(raw), os.path.dirname(bundle_path))
+        if map_path:
+            with open(map_path, "r", encoding="utf-8") as f:
+                return SourceMap(json.load(f), os.path.dirname(map_path))
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        # A broken map only means hits in its bundle stay unresolved
+        pass
+    return None
+
+
+def map_signature(bundle_path, map_path):
+    """Return what decides whether a cached map is still current.
+
+    That is the bundle, which holds any data URL, and the map file
+    find_map resolved for it, adjacent or named by sourceMappingURL.
+    """
+    signature = [map_path]
+    for path in (bundle_path, map_path) if map_path else (bundle_path,):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+class SourceMapCache:
+    """LRU cache of decoded source maps, keyed by bundle path."""
+
+    def __init__(self, max_maps=MAX_CACHED_MAPS):
+        self.max_maps = max_maps
+        self.maps = OrderedDict()
+
+    def get(self, bundle_path):
+        """Return the SourceMap of a bundle (or None), decoding it on first use."""
+        map_path, data_url = find_map(bundle_path)
+        signature = map_signature(bundle_path, map_path)
+        cached = self.maps.get(bundle_path)
+        if cached and cached[0] == signature:
+            self.maps.move_to_end(bundle_path)
+            return cached[1]
+
+        source_map = load_map(bundle_path, map_path, data_url)
+        self.maps[bundle_path] = (signature, source_map)
+        self.maps.move_to_end(bundle_path)
+        while len(self.maps) > self.max_maps:
+            self.maps.popitem(last=False)
+        return source_map
+
+    def resolve_findings(self, findings):
+        """Yield findings with ``original`` set where a source map covers them."""
+        current_path = source_map = None
+        for finding in findings:
+            if not finding.error:
+                # Findings come grouped by file, so the map is fetched once per bundle
+                if finding.path != current_path:
+                    current_path = finding.path
+                    source_map = self.get(current_path)
+                if source_map:
+                    finding.original = source_map.lookup(finding.line, finding.column)
+            yield finding
@@ -0,0 +1,241 @@
+"""Directory walker shared by the Finnish text scanners.
+
+The walk is built on ``os.scandir`` and prunes excluded directories before
+descending into them, so a ``node_modules`` tree costs one rule check
+instead of a full walk.  Exclusions use ``.gitignore`` syntax: the built-in
+patterns of each scanner plus every ``.gitignore`` file found inside the
+walked tree (rules from deeper files override shallower ones, and within a
+file the last matching rule wins).
+
+Files that are larger than ``max_size`` or look binary (a NUL byte in the
+first block) are skipped as well.  Entries are visited in sorted order so
+the file list is stable across file systems.
+"""
+import os
+import re
+
+# Files larger than this are not scanned
+MAX_FILE_SIZE = 100 * 1024 * 1024
+
+# Bytes read to decide whether a file is binary
+BINARY_SNIFF_SIZE = 8192
+
+
+def translate_glob(pattern):
+    """Translate a gitignore glob (without anchoring) into a regex fragment."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 2)
+            if end < 0:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                parts.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        elif char == "\\" and i + 1 < len(pattern):
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return "".join(parts)
+
+
+def parse_rule(line, base=""):
+    """Parse one gitignore line into ``(regex, negate, dir_only)`` or None.
+
+    ``base`` is the directory of the .gitignore file relative to the walk
+    root, with a trailing slash.
+    """
+    line = line.rstrip("\n").rstrip("\r")
+    if not line.endswith("\\ "):
+        line = line.rstrip(" ")
+    if not line or line.startswith("#"):
+        return None
+
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith(("\\!", "\\#")):
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    # A slash anywhere but at the end anchors the pattern to its base directory
+    anchored = "/" in line
+    body = translate_glob(line.lstrip("/"))
+    prefix = re.escape(base) + ("" if anchored else "(?:.*/)?")
+    return re.compile(prefix + body + r"\Z"), negate, dir_only
+
+
+class IgnoreRules:
+    """An ordered set of gitignore rules matched against paths relative to the walk root."""
+
+    def __init__(self, rules=()):
+        self.rules = tuple(rules)
+        # Without negations the order does not matter and one regex will do
+        if not any(negate for _, negate, _ in self.rules):
+            self.dir_regex = self._union(rule for rule in self.rules)
+            self.file_regex = self._union(rule for rule in self.rules if not rule[2])
+        else:
+            self.dir_regex = self.file_regex = None
+
+    @staticmethod
+    def _union(rules):
+        patterns = [regex.pattern for regex, _, _ in rules]
+        return re.compile("|".join(f"(?:{p})" for p in patterns)) if patterns else None
+
+    @classmethod
+    def from_patterns(cls, patterns, base=""):
+        """Compile gitignore-style pattern lines."""
+        parsed = (parse_rule(pattern, base) for pattern in patterns)
+        return cls(rule for rule in parsed if rule)
+
+    def extended(self, other):
+        """Return rules with ``other`` appended (and taking precedence)."""
+        return IgnoreRules(self.rules + other.rules)
+
+    def is_ignored(self, rel_path, is_dir):
+        """Check a path relative to the walk root, using "/" as separator."""
+        if self.dir_regex is not None or not self.rules:
+            regex = self.dir_regex if is_dir else self.file_regex
+            return bool(regex and regex.match(rel_path))
+
+        for regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                return not negate
+        return False
+
+    def is_path_ignored(self, rel_path, is_dir=False):
+        """Check a path and all of its parent directories."""
+        parts = rel_path.replace(os.sep, "/").strip("/").split("/")
+        for depth in range(1, len(parts)):
+            if self.is_ignored("/".join(parts[:depth]), True):
+                return True
+        return self.is_ignored("/".join(parts), is_dir)
+
+
+def load_gitignore(file_path, base=""):
+    """Load the rules of a .gitignore file, or no rules if it cannot be read."""
+    try:
+        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+            return IgnoreRules.from_patterns(f, base)
+    except OSError:
+        return IgnoreRules()
+
+
+def is_binary_block(block):
+    """Check the first block of a file for NUL bytes, like git does."""
+    return b"\0" in block[:BINARY_SNIFF_SIZE]
+
+
+def looks_binary(file_path):
+    """Sniff the first block of a file to decide whether it is binary."""
+    try:
+        with open(file_path, "rb") as f:
+            return is_binary_block(f.read(BINARY_SNIFF_SIZE))
+    except OSError:
+        # Let the scanner report the read error
+        return False
+
+
+def _is_wanted(entry, max_size, sniff_binary):
+    """Check the size and content of a candidate file."""
+    if max_size:
+        try:
+            if entry.stat().st_size > max_size:
+                return False
+        except OSError:
+            return True
+    return not (sniff_binary and looks_binary(entry.path))
+
+
+def walk_tree(root_dir, exclude=(), use_gitignore=True, rel_dir="", rules=None):
+    """Yield ``(dir_path, rel_dir, rules, files)`` for every directory that is not excluded.
+
+    ``files`` are the os.DirEntry objects of the regular files in the
+    directory, sorted by name; ``rules`` are the rules in effect there.  To
+    walk a subtree of an earlier walk, pass its ``rel_dir`` and the ``rules``
+    of its parent directory.
+    """
+    if rules is None:
+        rules = IgnoreRules.from_patterns(exclude)
+    stack = [(root_dir, rel_dir, rules)]
+    while stack:
+        dir_path, rel_dir, rules = stack.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        if use_gitignore:
+            for entry in entries:
+                if entry.name == ".gitignore" and entry.is_file():
+                    rules = rules.extended(load_gitignore(entry.path, rel_dir))
+                    break
+
+        files = []
+        subdirs = []
+        for entry in entries:
+            rel_path = rel_dir + entry.name
+            if entry.is_dir():
+                # Like os.walk, symlinked directories are not followed
+                if not entry.is_symlink() and not rules.is_ignored(rel_path, True):
+                    subdirs.append((entry.path, rel_path + "/", rules))
+            elif not rules.is_ignored(rel_path, False):
+                files.append(entry)
+
+        yield dir_path, rel_dir, rules, files
+
+        # Depth first, in sorted order
+        stack.extend(reversed(subdirs))
+
+
+def walk_files(root_dir, extensions=None, exclude=(), use_gitignore=True,
+               max_size=MAX_FILE_SIZE, sniff_binary=True):
+    """Yield paths of the files to scan under root_dir.
+
+    ``extensions`` is a tuple of file name suffixes to keep (all files when
+    None) and ``exclude`` a list of gitignore-style patterns.  Callers that
+    read every file anyway can turn ``sniff_binary`` off and check the first
+    block they read with ``is_binary_block`` instead of opening files twice.
+    """
+    for _, _, _, files in walk_tree(root_dir, exclude, use_gitignore):
+        for entry in files:
+            if extensions and not entry.name.endswith(extensions):
+                continue
+            if _is_wanted(entry, max_size, sniff_binary):
+                yield entry.path
+
+
+def walk_order_key(rel_path):
+    """Sort key that orders relative paths the way walk_files() yields them.
+
+    Within a directory its files come first, then its subdirectories.
+    """
+    parts = rel_path.replace(os.sep, "/").split("/")
+    return tuple((1, part) for part in parts[:-1]) + ((0, parts[-1]),)
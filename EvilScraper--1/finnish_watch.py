@@ -0,0 +1,313 @@
+"""Watch mode for the Finnish text scanners.
+
+``watch()`` scans a tree once and then waits for file system changes,
+rescanning only the files that were written, moved or deleted.  On Linux
+the changes come from inotify (through ctypes, no extra dependency);
+elsewhere, or when the inotify watch limit is reached, the tree is polled
+for size and mtime changes instead.
+
+Changes are debounced: a bundler writing hundreds of chunks in a burst
+causes one rescan, once no event has arrived for ``DEBOUNCE_SECONDS`` (or
+``MAX_BATCH_SECONDS`` after the first event of the burst).
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+
+from finnish_archive import archive_path
+from finnish_walker import MAX_FILE_SIZE, walk_order_key, walk_tree
+
+# Quiet period that ends a burst of changes, and the longest a burst may last
+DEBOUNCE_SECONDS = 0.1
+MAX_BATCH_SECONDS = 1.0
+
+# Seconds between two snapshots of the tree when polling
+POLL_INTERVAL = 1.0
+
+# inotify event bits, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+
+# struct inotify_event: wd, mask, cookie, len, followed by the name
+EVENT_HEADER = struct.Struct("iIII")
+EVENT_BUFFER_SIZE = 64 * 1024
+
+
+class InotifyWatcher:
+    """Report changed paths from inotify watches on the walked directories."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self.watches = {}
+
+    def add_directory(self, dir_path):
+        """Watch a directory; raises OSError (ENOSPC) when out of watches."""
+        wd = self._add_watch(self.fd, os.fsencode(dir_path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), dir_path)
+        self.watches[wd] = dir_path
+
+    def _read_events(self, changed):
+        """Add the paths of all queued events to changed; False if events were lost."""
+        complete = True
+        while True:
+            try:
+                data = os.read(self.fd, EVENT_BUFFER_SIZE)
+            except BlockingIOError:
+                return complete
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    complete = False
+                    continue
+                if mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                    continue
+                dir_path = self.watches.get(wd)
+                if dir_path is None:
+                    continue
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    changed.add(dir_path)
+                else:
+                    changed.add(os.path.join(dir_path, os.fsdecode(name)))
+
+    def wait(self):
+        """Block until a burst of changes is over.
+
+        Returns the changed paths (None if the kernel dropped events) and
+        the perf_counter() time of the first event.
+        """
+        select.select([self.fd], [], [])
+        first_event = time.perf_counter()
+        changed = set()
+        complete = True
+        while True:
+            complete = self._read_events(changed) and complete
+            remaining = first_event + MAX_BATCH_SECONDS - time.perf_counter()
+            if remaining <= 0:
+                break
+            if not select.select([self.fd], [], [], min(DEBOUNCE_SECONDS, remaining))[0]:
+                break
+        return (changed if complete else None), first_event
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Report changed paths by comparing snapshots of file sizes and mtimes."""
+
+    def __init__(self, root_dir, exclude=(), use_gitignore=True, interval=POLL_INTERVAL):
+        self.root_dir = root_dir
+        self.exclude = exclude
+        self.use_gitignore = use_gitignore
+        self.interval = interval
+        self.snapshot = self._take_snapshot()
+
+    def _take_snapshot(self):
+        snapshot = {}
+        for _, _, _, files in walk_tree(self.root_dir, self.exclude, self.use_gitignore):
+            for entry in files:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def add_directory(self, dir_path):
+        pass
+
+    def wait(self):
+        """Block until a snapshot differs from the previous one; see InotifyWatcher.wait()."""
+        while True:
+            time.sleep(self.interval)
+            started = time.perf_counter()
+            snapshot = self._take_snapshot()
+            changed = {
+                path for path in snapshot.keys() | self.snapshot.keys()
+                if snapshot.get(path) != self.snapshot.get(path)
+            }
+            self.snapshot = snapshot
+            if changed:
+                return changed, started
+
+    def close(self):
+        pass
+
+
+def create_watcher(scanner, root_dir, poll_interval=None):
+    """Use inotify where available unless a poll interval is given."""
+    if poll_interval is None and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root_dir, scanner.exclude, scanner.use_gitignore,
+                          poll_interval or POLL_INTERVAL)
+
+
+class WatchedTree:
+    """The findings of a directory tree, kept current one changed path at a time."""
+
+    def __init__(self, scanner, root_dir, watcher):
+        self.scanner = scanner
+        self.root_dir = root_dir
+        self.watcher = watcher
+        # dir_path -> (rel_dir, rules) of every walked directory
+        self.dirs = {}
+        # file_path -> (walk order key, findings) of files with findings
+        self.findings = {}
+
+    def _is_wanted(self, file_path):
+        if not self.scanner.wants_file(file_path):
+            return False
+        try:
+            return os.stat(file_path).st_size <= MAX_FILE_SIZE
+        except OSError:
+            return False
+
+    def add_tree(self, dir_path=None, rel_dir="", rules=None):
+        """Walk and watch the tree (or a new subtree); return the files to scan."""
+        files = []
+        for path, rel, dir_rules, entries in walk_tree(
+                dir_path or self.root_dir, self.scanner.exclude,
+                self.scanner.use_gitignore, rel_dir, rules):
+            self.watcher.add_directory(path)
+            self.dirs[path] = (rel, dir_rules)
+            files.extend(entry.path for entry in entries if self._is_wanted(entry.path))
+        return files
+
+    def _forget(self, dir_path):
+        """Drop a directory and everything below it."""
+        prefix = dir_path + os.sep
+        for paths in (self.dirs, self.findings):
+            for path in [path for path in paths if path.startswith(prefix)]:
+                del paths[path]
+        self.dirs.pop(dir_path, None)
+
+    def update(self, changed):
+        """Apply a batch of changed paths; return the files to rescan.
+
+        Returns None when the tree has to be scanned from scratch: the root
+        itself or a .gitignore file changed.
+        """
+        rescan = set()
+        # Sorted, so a new directory is handled before the files inside it
+        for path in sorted(changed):
+            if os.path.basename(path) == ".gitignore" or path == self.root_dir:
+                return None
+            if path in self.dirs:
+                self._forget(path)
+            self.findings.pop(path, None)
+
+            # A file in a directory that was created after the last event may
+            # be reported before its directory; handle the topmost new one
+            parent = os.path.dirname(path)
+            while parent not in self.dirs and parent.startswith(self.root_dir + os.sep):
+                path, parent = parent, os.path.dirname(parent)
+            if parent not in self.dirs or path in self.dirs or not os.path.exists(path):
+                continue
+
+            rel_dir, rules = self.dirs[parent]
+            rel_path = rel_dir + os.path.basename(path)
+            if os.path.isdir(path):
+                if not os.path.islink(path) and not rules.is_ignored(rel_path, True):
+                    rescan.update(self.add_tree(path, rel_path + "/", rules))
+            elif not rules.is_ignored(rel_path, False) and self._is_wanted(path):
+                rescan.add(path)
+        return [path for path in rescan if os.path.isfile(path)]
+
+    def _order_key(self, file_path):
+        return walk_order_key(os.path.relpath(file_path, self.root_dir))
+
+    def rescan(self, files, prune_cache=False):
+        """Scan files whose previous findings were already dropped."""
+        files = sorted(files, key=self._order_key)
+        for finding in self.scanner.scan_files(files, prune_cache=prune_cache):
+            # Findings in archive members are kept under the archive file
+            file_path = archive_path(finding.path)
+            entry = self.findings.get(file_path)
+            if entry is None:
+                entry = self.findings[file_path] = (self._order_key(file_path), [])
+            entry[1].append(finding)
+
+    def ordered_findings(self):
+        """Return all current findings in walk order."""
+        return [
+            finding
+            for _, findings in sorted(self.findings.values(), key=lambda entry: entry[0])
+            for finding in findings
+        ]
+
+
+def watch(scanner, root_dir, on_update, poll_interval=None):
+    """Scan root_dir, then rescan changed files until interrupted.
+
+    ``on_update(findings, files, elapsed)`` is called after the initial
+    scan and after every burst of changes, with all current findings in
+    walk order, the number of files scanned and the seconds since the first
+    change of the burst.  With ``poll_interval`` set the tree is polled
+    instead of using inotify.
+    """
+    root_dir = os.path.normpath(root_dir)
+    while True:
+        if not os.path.isdir(root_dir):
+            on_update([], 0, 0.0)
+            while not os.path.isdir(root_dir):
+                time.sleep(poll_interval or POLL_INTERVAL)
+
+        started = time.perf_counter()
+        watcher = create_watcher(scanner, root_dir, poll_interval)
+        tree = WatchedTree(scanner, root_dir, watcher)
+        try:
+            files = tree.add_tree()
+            tree.rescan(files, prune_cache=True)
+            on_update(tree.ordered_findings(), len(files), time.perf_counter() - started)
+
+            while True:
+                changed, started = watcher.wait()
+                files = None if changed is None else tree.update(changed)
+                if files is None:
+                    break
+                tree.rescan(files)
+                on_update(tree.ordered_findings(), len(files), time.perf_counter() - started)
+        except OSError as e:
+            # Out of inotify watches (fs.inotify.max_user_watches) on a big tree
+            if not isinstance(watcher, InotifyWatcher) or e.errno not in (errno.ENOSPC, errno.ENOMEM):
+                raise
+            print(f"Cannot watch {root_dir} with inotify ({e.strerror}), polling instead")
+            poll_interval = POLL_INTERVAL
+        finally:
+            watcher.close()
@@ -0,0 +1,246 @@
+"""Streaming report writers for the Finnish text scanners.
+
+Every writer has the same three methods: ``start()`` before the first
+finding, ``write(finding)`` for each ``Finding`` as it is produced, and
+``finish(summary)`` at the end.  ``write_findings()`` drives any number of
+writers from one finding stream, so the text report and a machine-readable
+JSONL or SARIF file can be produced in the same pass without holding the
+findings in memory.
+"""
+import json
+import os
+from contextlib import contextmanager
+from urllib.parse import quote
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_RULE_ID = "finnish-text"
+
+
+def format_line(finding):
+    """Format a finding the way finnish_finder.py reports it."""
+    if finding.error:
+        return f"Error reading {finding.path}: {finding.text}"
+    return f"{finding.path}:{finding.line}:{finding.column}: {finding.text}"
+
+
+class TextWriter:
+    """Flat ``path:line:column: text`` report written by finnish_finder.py."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.first = True
+
+    def start(self):
+        self.stream.write("Finnish text found in the following files:\n\n")
+
+    def write(self, finding):
+        if not self.first:
+            self.stream.write("\n")
+        self.first = False
+        self.stream.write(format_line(finding))
+
+    def finish(self, summary):
+        pass
+
+
+class DeferredWriter:
+    """Writer created on the first finding, so a scan without any writes no file.
+
+    ``create()`` returns the wrapped writer, opening its stream.
+    """
+
+    def __init__(self, create):
+        self.create = create
+        self.writer = None
+
+    def start(self):
+        pass
+
+    def write(self, finding):
+        if self.writer is None:
+            self.writer = self.create()
+            self.writer.start()
+        self.writer.write(finding)
+
+    def finish(self, summary):
+        if self.writer is not None:
+            self.writer.finish(summary)
+
+
+class GroupedTextWriter:
+    """Report grouped by file, written by cascade_finnish_finder.py."""
+
+    def __init__(self, stream, intro="", location="the scanned files"):
+        self.stream = stream
+        self.intro = intro
+        self.location = location
+        self.current_path = None
+
+    def start(self):
+        self.stream.write("Finnish Content Report\n")
+        self.stream.write("=" * 50 + "\n\n")
+        self.stream.write("This report shows files containing Finnish text that needs translation.\n\n")
+        self.stream.write(self.intro)
+
+    def write(self, finding):
+        if finding.path != self.current_path:
+            self.current_path = finding.path
+            self.stream.write(f"\nFile: {finding.path}\n")
+            self.stream.write("-" * 50 + "\n")
+        if finding.error:
+            self.stream.write(f"0:0: Error reading file: {finding.text}\n")
+        else:
+            self.stream.write(f"{finding.line}:{finding.column}: {finding.text}\n")
+            if finding.original:
+                path, line, column = finding.original
+                self.stream.write(f"    from {path}:{line}:{column}\n")
+
+    def finish(self, summary):
+        self.stream.write("\n" + "=" * 50 + "\n")
+        self.stream.write(
+            f"Summary: Found {summary['findings']} Finnish occurrences in "
+            f"{summary['files']} files in {self.location}.\n"
+        )
+
+
+class JsonLinesWriter:
+    """One JSON object per line: every finding, then a summary record."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def start(self):
+        pass
+
+    def write(self, finding):
+        record = {"type": "error" if finding.error else "finding", **finding.as_dict()}
+        del record["error"]
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def finish(self, summary):
+        self.stream.write(json.dumps({"type": "summary", **summary}) + "\n")
+
+
+class SarifWriter:
+    """SARIF 2.1.0 log; results are written as they arrive."""
+
+    def __init__(self, stream, tool_name="finnish-finder"):
+        self.stream = stream
+        self.tool_name = tool_name
+        self.first = True
+        self.errors = []
+
+    def start(self):
+        driver = {
+            "name": self.tool_name,
+            "rules": [{
+                "id": SARIF_RULE_ID,
+                "shortDescription": {"text": "Finnish text that needs translation"},
+            }],
+        }
+        self.stream.write(
+            '{"version": "2.1.0", "$schema": ' + json.dumps(SARIF_SCHEMA)
+            + ', "runs": [{"tool": {"driver": ' + json.dumps(driver) + '}, "results": ['
+        )
+
+    @staticmethod
+    def artifact_uri(path):
+        """Return a relative, URI-encoded path for a result location."""
+        try:
+            path = os.path.relpath(path)
+        except ValueError:
+            pass
+        return quote(path.replace(os.sep, "/"))
+
+    def write(self, finding):
+        if finding.error:
+            self.errors.append(finding)
+            return
+
+        result = {
+            "ruleId": SARIF_RULE_ID,
+            "level": "warning",
+            "message": {"text": finding.text},
+            "locations": [{
+                "physicalLocation": {
+                    "artifactLocation": {"uri": self.artifact_uri(finding.path)},
+                    "region": {"startLine": finding.line, "startColumn": finding.column},
+                },
+            }],
+        }
+        if finding.original:
+            path, line, column = finding.original
+            result["relatedLocations"] = [{
+                "id": 1,
+                "message": {"text": "Original source"},
+                "physicalLocation": {
+                    "artifactLocation": {"uri": self.artifact_uri(path)},
+                    "region": {"startLine": line, "startColumn": column},
+                },
+            }]
+        self.stream.write(("\n" if self.first else ",\n") + json.dumps(result, ensure_ascii=False))
+        self.first = False
+
+    def finish(self, summary):
+        notifications = [
+            {
+                "level": "error",
+                "message": {"text": f"Error reading file: {finding.text}"},
+                "locations": [{
+                    "physicalLocation": {
+                        "artifactLocation": {"uri": self.artifact_uri(finding.path)},
+                    },
+                }],
+            }
+            for finding in self.errors
+        ]
+        invocation = {
+            "executionSuccessful": True,
+            "toolExecutionNotifications": notifications,
+        }
+        self.stream.write(
+            '\n], "invocations": [' + json.dumps(invocation, ensure_ascii=False) + "]}]}\n"
+        )
+
+
+@contextmanager
+def open_replacing(path):
+    """Open a report for writing; it replaces ``path`` only once it is complete.
+
+    Readers of the report (or an editor showing it) never see a half-written
+    file, which matters when it is rewritten over and over in watch mode.
+    """
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as stream:
+            yield stream
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_findings(findings, writers):
+    """Stream findings to every writer and return the summary counts."""
+    summary = {"findings": 0, "files": 0, "errors": 0}
+    last_path = None
+
+    for writer in writers:
+        writer.start()
+    for finding in findings:
+        if finding.error:
+            summary["errors"] += 1
+        else:
+            summary["findings"] += 1
+            if finding.path != last_path:
+                summary["files"] += 1
+                last_path = finding.path
+        for writer in writers:
+            writer.write(finding)
+    for writer in writers:
+        writer.finish(summary)
+
+    return summary
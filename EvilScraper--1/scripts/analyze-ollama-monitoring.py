@@ -1,164 +1,248 @@
 #!/usr/bin/env python3
+"""Summarise an Ollama monitoring capture written by monitor-ollama-resources.sh.
+
+By default the CSV is loaded into memory, every section of the report is
+printed and charts are drawn.  --only picks the stages to run (--only
+summary for a quick CI step) and --no-charts leaves out the charts; the
+analysis modules, matplotlib above all, are only imported when a stage
+needs them.  With --stream the CSV is read in chunks of rows and
+summarised from running aggregates instead, so memory stays constant
+however long the capture is; the numbers are the same.  The lags stage,
+the lag at which every pair of metrics correlates best (see ollama_lags),
+needs the whole capture and is skipped with --stream.
+
+The parsed capture is cached next to the CSV (see ollama_cache), so later
+runs on an unchanged file memory-map it instead of parsing the CSV again.
+The analysis itself lives in ollama_monitoring and can be imported.
+
+Captures of monitor-resources.sh (resource-usage-*.csv) are read too, see
+ollama_schemas.  --batch takes several files or quoted glob patterns,
+analyses them in parallel processes and prints one table comparing them.
+
+--results takes the load test results written while the capture ran (k6
+--out json or --summary-export files, autocannon results and
+model-comparison-results-*.csv) and reports what each test phase and
+each model cost, see ollama_costs.  A k6 --summary-export holds no times
+and needs --results-start or --results-end.
+
+--follow keeps reading a capture the monitor is still writing: every
+--interval it parses the rows appended since the last look and prints the
+refreshed summary, or with --alerts only the samples above the bottleneck
+thresholds, until interrupted with Ctrl+C.
+"""
+import argparse
 import sys
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-from datetime import datetime
-
-# Check if a file path is provided
-if len(sys.argv) < 2:
-    print("Usage: python3 analyze-ollama-monitoring.py <csv_file>")
-    sys.exit(1)
-
-csv_file = sys.argv[1]
-print(f"Analyzing file: {csv_file}")
-OLLAMA_CPU_COL = 'Ollama CPU %'
-OLLAMA_MEMORY_COL = 'Ollama Memory %'
-OLLAMA_MEMORY_MB_COL = 'Ollama Memory MB'
-MEMORY_USAGE_COL = 'Memory Usage %'
-# Read the CSV file
-try:
-    df = pd.read_csv(csv_file)
-    print(f"Successfully loaded data with {len(df)} rows")
-except Exception as e:
-    print(f"Error loading CSV file: {e}")
-    sys.exit(1)
-
-# Convert timestamp to datetime
-df['Datetime'] = pd.to_datetime(df['Timestamp'], unit='s')
-
-# Calculate statistics
-print("\n=== RESOURCE USAGE SUMMARY ===")
-print("\nCPU Usage:")
-print(f"  System CPU Load: avg={df['CPU Load'].mean():.2f}, max={df['CPU Load'].max():.2f}, min={df['CPU Load'].min():.2f}")
-if OLLAMA_CPU_COL in df.columns and df[OLLAMA_CPU_COL].notna().any():
-    # Convert any string values to numeric, coercing errors to NaN
-    df[OLLAMA_CPU_COL] = pd.to_numeric(df[OLLAMA_CPU_COL], errors='coerce')
-    ollama_cpu = df[OLLAMA_CPU_COL].dropna()
-    if len(ollama_cpu) > 0:
-        print(f"  Ollama CPU Usage: avg={ollama_cpu.mean():.2f}%, max={ollama_cpu.max():.2f}%, min={ollama_cpu.min():.2f}%")
-    else:
-        print("  Ollama CPU Usage: No valid data")
-else:
-    print("  Ollama CPU Usage: No data available")
-
-print("\nMemory Usage:")
-print(f"  System Memory: avg={df[MEMORY_USAGE_COL].mean():.2f}%, max={df[MEMORY_USAGE_COL].max():.2f}%, min={df[MEMORY_USAGE_COL].min():.2f}%")
-print(f"  Free Memory: avg={df['Free Memory MB'].mean():.2f}MB, min={df['Free Memory MB'].min():.2f}MB")
-if OLLAMA_MEMORY_COL in df.columns and df[OLLAMA_MEMORY_COL].notna().any():
-    # Convert any string values to numeric, coercing errors to NaN
-    df[OLLAMA_MEMORY_COL] = pd.to_numeric(df[OLLAMA_MEMORY_COL], errors='coerce')
-    ollama_mem = df[OLLAMA_MEMORY_COL].dropna()
-    if len(ollama_mem) > 0:
-        print(f"  Ollama Memory Usage: avg={ollama_mem.mean():.2f}%, max={ollama_mem.max():.2f}%, min={ollama_mem.min():.2f}%")
-    else:
-        print("  Ollama Memory Usage: No valid data")
-else:
-    print("  Ollama Memory Usage: No data available")
-
-if OLLAMA_MEMORY_MB_COL in df.columns and df[OLLAMA_MEMORY_MB_COL].notna().any():
-    # Convert any string values to numeric, coercing errors to NaN
-    df[OLLAMA_MEMORY_MB_COL] = pd.to_numeric(df[OLLAMA_MEMORY_MB_COL], errors='coerce')
-    ollama_mem_mb = df[OLLAMA_MEMORY_MB_COL].dropna()
-    if len(ollama_mem_mb) > 0:
-        print(f"  Ollama Memory Consumption: avg={ollama_mem_mb.mean():.2f}MB, max={ollama_mem_mb.max():.2f}MB")
+from datetime import datetime, timezone
+
+from ollama_defaults import (
+    DEFAULT_CHUNKSIZE, DEFAULT_INTERVAL, DEFAULT_MAX_LAG, DEFAULT_PAGE_SECONDS, DEFAULT_TOP_EPISODES,
+    DEFAULT_WINDOWS, SECTIONS,
+)
+
+# Stages in the order they run; all but costs and charts are ollama_monitoring.SECTIONS
+STAGES = SECTIONS + ("costs", "charts")
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def duration(value):
+    """Parse a duration such as 90, 90s, 5m or 1h into seconds (argparse type)."""
+    unit = DURATION_UNITS.get(value[-1:], None)
+    number = value[:-1] if unit else value
+    try:
+        seconds = float(number) * (unit or 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid duration: {value!r}") from None
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError(f"duration must be positive: {value!r}")
+    return seconds
+
+
+def duration_label(seconds):
+    """Format seconds in the largest unit of duration() that holds them whole, such as 5m."""
+    unit = next(unit for unit, size in sorted(DURATION_UNITS.items(), key=lambda item: -item[1])
+                if seconds % size == 0 or size == 1)
+    return f"{seconds / DURATION_UNITS[unit]:g}{unit}"
+
+
+def timestamp(value):
+    """Parse an ISO 8601 time into epoch seconds, UTC when it has no zone (argparse type)."""
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time: {value!r}") from None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Analyze an Ollama monitoring CSV file.")
+    parser.add_argument("csv_file", nargs="+", metavar="CSV_FILE",
+                        help="CSV file written by monitor-ollama-resources.sh or monitor-resources.sh; "
+                             "with --batch, files or quoted glob patterns")
+    parser.add_argument("--only", action="append", choices=STAGES, metavar="STAGE",
+                        help=f"Run only this stage, can be repeated ({', '.join(STAGES)})")
+    parser.add_argument("--no-charts", action="store_true", help="Do not draw the charts")
+    parser.add_argument("--window", action="append", type=duration, metavar="DURATION",
+                        help="Rolling percentile window such as 30s, 5m or 1h, can be repeated "
+                             f"(default: {', '.join(map(duration_label, DEFAULT_WINDOWS))})")
+    parser.add_argument("--episodes", type=int, default=DEFAULT_TOP_EPISODES, metavar="N",
+                        help=f"Longest bottleneck episodes listed per threshold (default: {DEFAULT_TOP_EPISODES})")
+    parser.add_argument("--max-lag", type=duration, default=DEFAULT_MAX_LAG, metavar="DURATION",
+                        help="Longest lag tried by the lagged correlations, either way "
+                             f"(default: {duration_label(DEFAULT_MAX_LAG)})")
+    parser.add_argument("--results", action="append", metavar="FILE",
+                        help="Load test results to report the resource cost of, per phase and model; "
+                             "can be repeated and be a quoted glob pattern")
+    parser.add_argument("--results-start", type=timestamp, metavar="TIME",
+                        help="When the k6 --summary-export run started, such as 2025-03-11T21:06:04+01:00 "
+                             "(UTC without a zone)")
+    parser.add_argument("--results-end", type=timestamp, metavar="TIME",
+                        help="When the k6 --summary-export run ended")
+    parser.add_argument("--page-hours", type=float, metavar="HOURS",
+                        help=f"Time window of one page of charts (default: {DEFAULT_PAGE_SECONDS / 3600:g})")
+    parser.add_argument("--decimate", choices=("minmax", "lttb", "none"), default="minmax",
+                        help="How series are reduced to the chart width (default: minmax, "
+                             "which keeps every spike)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read the CSV in chunks with constant memory (no charts)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, metavar="ROWS",
+                        help=f"Rows per chunk with --stream (default: {DEFAULT_CHUNKSIZE})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Parse the CSV without reading or writing its columnar cache")
+    parser.add_argument("--follow", action="store_true",
+                        help="Keep reading the CSV as it grows and print the summary every --interval")
+    parser.add_argument("--interval", type=duration, default=DEFAULT_INTERVAL, metavar="DURATION",
+                        help=f"Time between two reports with --follow (default: {duration_label(DEFAULT_INTERVAL)})")
+    parser.add_argument("--alerts", action="store_true",
+                        help="With --follow, print only the samples above the bottleneck thresholds")
+    parser.add_argument("--batch", action="store_true",
+                        help="Analyze every file given and print one table comparing them")
+    parser.add_argument("-j", "--jobs", type=int, default=0, metavar="N",
+                        help="Worker processes with --batch (default: 0, one per CPU)")
+    args = parser.parse_args()
+    if args.batch and args.stream:
+        parser.error("--batch cannot be combined with --stream")
+    if args.follow and (args.batch or args.stream):
+        parser.error("--follow cannot be combined with --batch or --stream")
+    if args.alerts and not args.follow:
+        parser.error("--alerts needs --follow")
+    if args.only and "costs" in args.only and not args.results:
+        parser.error("the costs stage needs --results")
+    if (args.results_start is not None or args.results_end is not None) and not args.results:
+        parser.error("--results-start and --results-end need --results")
+    if args.results and (args.batch or args.stream or args.follow):
+        parser.error("--results needs the capture in memory: no --batch, --stream or --follow")
+    if not args.batch and len(args.csv_file) > 1:
+        parser.error("several files need --batch")
+    args.stages = [stage for stage in STAGES if stage in (args.only or STAGES)]
+    if args.no_charts and "charts" in args.stages:
+        args.stages.remove("charts")
+    if args.window is None:
+        args.window = list(DEFAULT_WINDOWS)
+    return args
+
+
+def chart_path(csv_file):
+    """Return where the charts of a capture are saved."""
+    return csv_file.replace('.csv', '_analysis.png')
+
+
+def batch(args):
+    """Analyze the captures matching args.csv_file and print the table."""
+    from ollama_batch import analyze_batch, default_jobs, expand_paths, print_table
+
+    paths = expand_paths(args.csv_file)
+    if not paths:
+        print("No capture matches " + " ".join(args.csv_file))
+        sys.exit(1)
+    jobs = default_jobs(args.jobs)
+    print(f"Analyzing {len(paths)} captures, {min(jobs, len(paths))} at a time\n")
+    print_table(analyze_batch(paths, jobs, use_cache=not args.no_cache))
+
+
+def follow(args):
+    """Report on args.csv_file as it grows, then print the summary of what was read."""
+    from ollama_follow import follow
+    from ollama_monitoring import print_summary
+
+    csv_file = args.csv_file[0]
+    sections = [stage for stage in args.stages if stage not in ("lags", "costs", "charts")]
+    print(f"Following file: {csv_file}, reporting every {args.interval:g}s (Ctrl+C to stop)")
+    if "lags" in args.stages or "charts" in args.stages:
+        print("Lagged correlations and charts are not generated with --follow.")
+    try:
+        stream = follow(csv_file, args.interval, sections, args.window, args.episodes, args.alerts)
+    except Exception as e:
+        print(f"Error reading CSV file: {e}")
+        sys.exit(1)
+    if stream.rows:
+        print(f"\n##### Final summary of {stream.rows} samples #####")
+        print_summary(stream.summary())
+    print("\nAnalysis complete!")
+
+
+def main():
+    args = parse_args()
+    if args.batch:
+        batch(args)
+        return
+    if args.follow:
+        follow(args)
+        return
+    csv_file = args.csv_file[0]
+    print(f"Analyzing file: {csv_file}")
+
+    from ollama_monitoring import print_summary, render_charts, summarize_frame, summarize_stream
+
+    sections = [stage for stage in args.stages if stage not in ("costs", "charts")]
+    if args.stream:
+        try:
+            summary = summarize_stream(csv_file, args.chunksize, sections, args.window, args.episodes)
+            print(f"Successfully streamed {summary['rows']} rows in chunks of {args.chunksize}")
+        except Exception as e:
+            print(f"Error loading CSV file: {e}")
+            sys.exit(1)
+        print_summary(summary)
+        if "lags" in args.stages:
+            print("\nLagged correlations are not computed with --stream.")
+        if "charts" in args.stages:
+            print("\nCharts are not generated with --stream.")
     else:
-        print("  Ollama Memory Consumption: No valid data")
-else:
-    print("  Ollama Memory Consumption: No data available")
-
-print("\nNetwork Usage:")
-print(f"  Network In: avg={df['Network In KB/s'].mean():.2f}KB/s, max={df['Network In KB/s'].max():.2f}KB/s")
-print(f"  Network Out: avg={df['Network Out KB/s'].mean():.2f}KB/s, max={df['Network Out KB/s'].max():.2f}KB/s")
-print(f"  Total Network: avg={(df['Network In KB/s'] + df['Network Out KB/s']).mean():.2f}KB/s, max={(df['Network In KB/s'] + df['Network Out KB/s']).max():.2f}KB/s")
-
-# Check for potential bottlenecks
-print("\n=== POTENTIAL BOTTLENECKS ===")
-
-# Memory pressure
-high_mem_usage = df[df[MEMORY_USAGE_COL] > 95]
-if len(high_mem_usage) > 0:
-    print(f"- HIGH MEMORY PRESSURE: System memory usage exceeded 95% for {len(high_mem_usage)} of {len(df)} samples ({len(high_mem_usage)/len(df)*100:.1f}%)")
-    print(f"  Average free memory during high usage: {high_mem_usage['Free Memory MB'].mean():.2f}MB")
-
-# CPU bottlenecks
-if OLLAMA_CPU_COL in df.columns and df[OLLAMA_CPU_COL].notna().any():
-    ollama_cpu = pd.to_numeric(df[OLLAMA_CPU_COL], errors='coerce')
-    high_cpu_usage = df[ollama_cpu > 80]
-    if len(high_cpu_usage) > 0:
-        print(f"- HIGH CPU USAGE: Ollama CPU usage exceeded 80% for {len(high_cpu_usage)} of {len(df)} samples ({len(high_cpu_usage)/len(df)*100:.1f}%)")
-    
-# Network bottlenecks
-high_network = df[(df['Network In KB/s'] + df['Network Out KB/s']) > 1000]  # More than 1MB/s
-if len(high_network) > 0:
-    print(f"- HIGH NETWORK USAGE: Total network traffic exceeded 1MB/s for {len(high_network)} of {len(df)} samples ({len(high_network)/len(df)*100:.1f}%)")
-
-# Correlation analysis
-print("\n=== CORRELATION ANALYSIS ===")
-numeric_cols = df.select_dtypes(include=[np.number]).columns
-correlation_matrix = df[numeric_cols].corr()
-
-# Print top correlations with Ollama CPU and Memory
-if OLLAMA_CPU_COL in correlation_matrix.columns:
-    print("\nFactors most correlated with Ollama CPU usage:")
-    cpu_corr = correlation_matrix[OLLAMA_CPU_COL].sort_values(ascending=False)
-    for col, val in cpu_corr.items():
-        if col != OLLAMA_CPU_COL and not pd.isna(val):
-            print(f"  {col}: {val:.3f}")
-
-if OLLAMA_MEMORY_COL in correlation_matrix.columns:
-    print("\nFactors most correlated with Ollama Memory usage:")
-    mem_corr = correlation_matrix[OLLAMA_MEMORY_COL].sort_values(ascending=False)
-    for col, val in mem_corr.items():
-        if col != OLLAMA_MEMORY_COL and not pd.isna(val):
-            print(f"  {col}: {val:.3f}")
-
-# Generate charts
-print("\nGenerating performance charts...")
-try:
-    # Create a figure with subplots
-    fig, axs = plt.subplots(3, 1, figsize=(12, 15))
-    
-    # Plot CPU usage
-    axs[0].plot(df['Datetime'], df['CPU Load'], label='System CPU Load')
-    if OLLAMA_CPU_COL in df.columns and df[OLLAMA_CPU_COL].notna().any():
-        axs[0].plot(df['Datetime'], pd.to_numeric(df[OLLAMA_CPU_COL], errors='coerce'), label=OLLAMA_CPU_COL)
-    axs[0].set_title('CPU Usage Over Time')
-    axs[0].set_ylabel('CPU Usage')
-    axs[0].legend()
-    axs[0].grid(True)
-    
-    # Plot Memory usage
-    axs[1].plot(df['Datetime'], df[MEMORY_USAGE_COL], label='System Memory %')
-    if OLLAMA_MEMORY_COL in df.columns and df[OLLAMA_MEMORY_COL].notna().any():
-        axs[1].plot(df['Datetime'], pd.to_numeric(df[OLLAMA_MEMORY_COL], errors='coerce'), label=OLLAMA_MEMORY_COL)
-    if OLLAMA_MEMORY_MB_COL in df.columns and df[OLLAMA_MEMORY_MB_COL].notna().any():
-        ax2 = axs[1].twinx()
-        ax2.plot(df['Datetime'], pd.to_numeric(df[OLLAMA_MEMORY_MB_COL], errors='coerce'), 'r-', label=OLLAMA_MEMORY_MB_COL)
-        ax2.set_ylabel('Memory (MB)', color='r')
-    axs[1].set_title('Memory Usage Over Time')
-    axs[1].set_ylabel('Memory Usage %')
-    axs[1].legend()
-    axs[1].grid(True)
-    
-    # Plot Network usage
-    axs[2].plot(df['Datetime'], df['Network In KB/s'], label='Network In (KB/s)')
-    axs[2].plot(df['Datetime'], df['Network Out KB/s'], label='Network Out (KB/s)')
-    axs[2].set_title('Network Usage Over Time')
-    axs[2].set_ylabel('KB/s')
-    axs[2].legend()
-    axs[2].grid(True)
-    
-    # Format x-axis to show time
-    for ax in axs:
-        ax.set_xlabel('Time')
-    
-    plt.tight_layout()
-    output_file = csv_file.replace('.csv', '_analysis.png')
-    plt.savefig(output_file)
-    plt.close()
-    print(f"Charts saved to {output_file}")
-except Exception as e:
-    print(f"Error generating charts: {e}")
-
-print("\nAnalysis complete!")
+        from ollama_cache import load_capture
+
+        # Read the CSV file, or its cache
+        try:
+            df, from_cache = load_capture(csv_file, use_cache=not args.no_cache)
+            print(f"Successfully loaded data with {len(df)} rows" + (" (from cache)" if from_cache else ""))
+        except Exception as e:
+            print(f"Error loading CSV file: {e}")
+            sys.exit(1)
+        print_summary(summarize_frame(df, sections, args.window, args.episodes, args.max_lag))
+
+        if "costs" in args.stages and args.results:
+            from ollama_batch import expand_paths
+            from ollama_costs import print_costs, read_results, resource_costs
+            try:
+                runs, comparisons = read_results(expand_paths(args.results), args.results_start,
+                                                 args.results_end)
+                print_costs(resource_costs(df, runs, comparisons))
+            except Exception as e:
+                print(f"Error reading test results: {e}")
+
+        if "charts" in args.stages:
+            print("\nGenerating performance charts...")
+            output_file = chart_path(csv_file)
+            try:
+                for path in render_charts(df, output_file, args.page_hours, args.decimate):
+                    print(f"Charts saved to {path}")
+            except Exception as e:
+                print(f"Error generating charts: {e}")
+
+    print("\nAnalysis complete!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""Sample system, Ollama and Node.js resource use from /proc (Linux).
+
+A light replacement for monitor-ollama-resources.sh and
+monitor-resources.sh, which start top, ps, bc and friends several times
+per sample and at one sample a second show up in the CPU use they
+measure.  This sampler keeps /proc/stat, /proc/meminfo, /proc/net/dev,
+/proc/loadavg and /proc/<pid>/stat open and rereads them with one pread()
+each, so it can sample several times a second; rows are buffered and
+written every --flush seconds.
+
+The CSV has exactly the columns of one of the two monitors, so
+analyze-ollama-monitoring.py reads it like theirs:
+
+* --schema ollama (the default) writes ollama-monitoring-*.csv like
+  monitor-ollama-resources.sh, with epoch-second timestamps, to the
+  millisecond below one-second intervals;
+* --schema resource-usage writes resource-usage-*.csv like
+  monitor-resources.sh, with local times and the CPU and memory of the
+  Node.js server.
+
+Ollama is every process named ollama* or listening on the Ollama port,
+with its children (the model runners); Node.js is the process listening
+on the server port, or every process of --node-name.  The processes are
+looked up again every few seconds, so runners started for a new model and
+a restarted server are picked up.  CPU percentages are per core, as in ps
+and top: 250 means two and a half cores busy.  Network rates add up every
+interface but the loopback one, like en0 on macOS; --interface picks
+interfaces, "--interface lo" for traffic between local services.
+"""
+import argparse
+import os
+import sys
+import time
+
+# Columns of monitor-ollama-resources.sh, as ollama_schemas reads them
+OLLAMA_HEADER = ["Timestamp", "CPU Load", "Memory Usage %", "Free Memory MB", "Swap Usage %",
+                 "Ollama CPU %", "Ollama Memory %", "Ollama Memory MB", "Network In KB/s",
+                 "Network Out KB/s", "GPU Usage", "Available Models"]
+
+# Columns of monitor-resources.sh
+RESOURCE_USAGE_HEADER = ["Timestamp", "CPU_Usage_Percent", "Memory_Usage_MB", "Memory_Usage_Percent",
+                         "Load_Avg_1m", "Load_Avg_5m", "Load_Avg_15m", "Node_Process_CPU_Percent",
+                         "Node_Process_Memory_MB"]
+
+DEFAULT_INTERVAL = 1.0    # Seconds between samples
+DEFAULT_DURATION = 300    # Seconds sampled, 0 until interrupted
+DEFAULT_FLUSH = 5.0       # Seconds between writes to the CSV
+RESCAN_SECONDS = 5.0      # Seconds between two process lookups
+DEFAULT_OUTPUT_DIR = "./logs/monitoring"
+
+OLLAMA_NAME = "ollama"    # Prefix of the command name of Ollama processes (ollama, ollama_llama_server)
+OLLAMA_PORT = 11434
+NODE_PORT = 3001
+
+TCP_LISTEN = "0A"         # State of a listening socket in /proc/net/tcp
+READ_BYTES = 65536        # Largest /proc file read at once
+
+PAGE_MB = os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+class ProcFile:
+    """A /proc file kept open and reread from the start with one system call."""
+
+    def __init__(self, path):
+        self.fd = os.open(path, os.O_RDONLY)
+
+    def read(self):
+        return os.pread(self.fd, READ_BYTES, 0).decode("ascii", "replace")
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _process_stat(text):
+    """Return (ppid, CPU ticks, RSS MB) from the text of /proc/<pid>/stat."""
+    # The command name in parentheses may hold spaces, the fields after it do not
+    fields = text[text.rindex(")") + 2:].split()
+    return int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[21]) * PAGE_MB
+
+
+def _command(pid):
+    try:
+        with open(f"/proc/{pid}/comm") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _listening_inodes(port):
+    """Return the socket inodes listening on a TCP port."""
+    inodes = set()
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    if fields[3] == TCP_LISTEN and int(fields[1].rsplit(":", 1)[1], 16) == port:
+                        inodes.add(fields[9])
+        except OSError:
+            pass
+    return inodes
+
+
+def _socket_owners(inodes, pids):
+    """Return the pids holding one of the socket inodes open."""
+    if not inodes:
+        return set()
+    targets = {f"socket:[{inode}]" for inode in inodes}
+    owners = set()
+    for pid in pids:
+        try:
+            fds = os.listdir(f"/proc/{pid}/fd")
+        except OSError:
+            # Gone, or someone else's process
+            continue
+        for fd in fds:
+            try:
+                if os.readlink(f"/proc/{pid}/fd/{fd}") in targets:
+                    owners.add(pid)
+                    break
+            except OSError:
+                continue
+    return owners
+
+
+def _with_children(roots, parents):
+    """Return the roots and all their descendants; ``parents`` maps a pid to its ppid."""
+    found = set(roots)
+    added = True
+    while added:
+        added = False
+        for pid, ppid in parents.items():
+            if ppid in found and pid not in found:
+                found.add(pid)
+                added = True
+    return found
+
+
+def find_processes(ollama_port=OLLAMA_PORT, node_port=NODE_PORT, node_name=None):
+    """Return the pids of Ollama and of the Node.js server as two sets."""
+    pids = [int(name) for name in os.listdir("/proc") if name.isdigit()]
+    parents, names = {}, {}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                parents[pid] = _process_stat(f.read())[0]
+        except (OSError, ValueError, IndexError):
+            continue
+        names[pid] = _command(pid)
+    ollama = {pid for pid, name in names.items() if name.startswith(OLLAMA_NAME)}
+    if not ollama:
+        ollama = _socket_owners(_listening_inodes(ollama_port), parents)
+    if node_name:
+        node = {pid for pid, name in names.items() if name == node_name}
+    else:
+        node = _socket_owners(_listening_inodes(node_port), parents)
+    return _with_children(ollama, parents), node
+
+
+class ProcessGroup:
+    """CPU and memory of a set of processes, from their /proc/<pid>/stat."""
+
+    def __init__(self):
+        self.files = {}     # pid -> ProcFile
+        self.ticks = {}     # pid -> CPU ticks at the last sample
+
+    def track(self, pids):
+        """Follow these pids from now on, dropping the others."""
+        for pid in set(self.files) - pids:
+            self.files.pop(pid).close()
+            self.ticks.pop(pid, None)
+        for pid in pids - set(self.files):
+            try:
+                self.files[pid] = ProcFile(f"/proc/{pid}/stat")
+            except OSError:
+                continue
+
+    def sample(self):
+        """Return the CPU ticks used since the last sample and the RSS MB of the processes.
+
+        A process is counted from the sample after it was first seen.
+        """
+        used, rss = 0, 0.0
+        for pid, f in list(self.files.items()):
+            try:
+                _, ticks, pid_rss = _process_stat(f.read())
+            except (OSError, ValueError, IndexError):
+                # The process exited
+                self.files.pop(pid).close()
+                self.ticks.pop(pid, None)
+                continue
+            if pid in self.ticks:
+                used += ticks - self.ticks[pid]
+            self.ticks[pid] = ticks
+            rss += pid_rss
+        return used, rss
+
+    def __len__(self):
+        return len(self.files)
+
+
+def _cpu_ticks(text):
+    """Return (busy, total) ticks of all CPUs from /proc/stat, and the number of CPUs."""
+    lines = text.splitlines()
+    values = [int(value) for value in lines[0].split()[1:]]
+    idle = values[3] + values[4]    # idle and iowait
+    # guest time is already counted in user time
+    total = sum(values[:8])
+    cpus = sum(1 for line in lines if line.startswith("cpu") and line[3:4].isdigit())
+    return total - idle, total, cpus
+
+
+def _meminfo(text):
+    """Return /proc/meminfo as a dict of kB values."""
+    values = {}
+    for line in text.splitlines():
+        key, _, rest = line.partition(":")
+        values[key] = int(rest.split()[0])
+    return values
+
+
+def _network_bytes(text, interfaces):
+    """Return the bytes received and sent by the interfaces, all but lo when ``interfaces`` is None."""
+    received = sent = 0
+    for line in text.splitlines()[2:]:
+        name, _, counters = line.partition(":")
+        name = name.strip()
+        if (name == "lo") if interfaces is None else (name not in interfaces):
+            continue
+        fields = counters.split()
+        received += int(fields[0])
+        sent += int(fields[8])
+    return received, sent
+
+
+def _available_models():
+    """Return the models Ollama has, comma separated, as monitor-ollama-resources.sh lists them."""
+    import json
+    import urllib.request
+    try:
+        with urllib.request.urlopen(f"http://localhost:{OLLAMA_PORT}/api/tags", timeout=2) as response:
+            return ", ".join(model["name"] for model in json.load(response).get("models", []))
+    except (OSError, ValueError):
+        return "N/A"
+
+
+class Sampler:
+    """Samples of the system and the Ollama and Node.js processes."""
+
+    def __init__(self, interfaces=None, ollama_port=OLLAMA_PORT, node_port=NODE_PORT, node_name=None):
+        self.interfaces = interfaces
+        self.lookup = (ollama_port, node_port, node_name)
+        self.stat = ProcFile("/proc/stat")
+        self.meminfo = ProcFile("/proc/meminfo")
+        self.net = ProcFile("/proc/net/dev")
+        self.loadavg = ProcFile("/proc/loadavg")
+        self.ollama = ProcessGroup()
+        self.node = ProcessGroup()
+        self.rescanned = None
+        self.previous = None    # (time, busy ticks, total ticks, bytes in, bytes out)
+
+    def rescan(self, now):
+        if self.rescanned is None or now - self.rescanned >= RESCAN_SECONDS:
+            ollama, node = find_processes(*self.lookup)
+            self.ollama.track(ollama)
+            self.node.track(node)
+            self.rescanned = now
+
+    def sample(self):
+        """Return the figures of the time since the last call, None on the first one.
+
+        The figures are a dict: "time" (epoch seconds), "cpu_percent"
+        (all CPUs), "load" (1, 5 and 15 minutes), the memory in MB, the
+        network KB/s and the CPU % and RSS MB of Ollama and Node.js.
+        """
+        now = time.time()
+        self.rescan(time.monotonic())
+        busy, total, cpus = _cpu_ticks(self.stat.read())
+        received, sent = _network_bytes(self.net.read(), self.interfaces)
+        ollama_ticks, ollama_rss = self.ollama.sample()
+        node_ticks, node_rss = self.node.sample()
+        memory = _meminfo(self.meminfo.read())
+        load = [float(value) for value in self.loadavg.read().split()[:3]]
+
+        previous, self.previous = self.previous, (now, busy, total, received, sent)
+        if previous is None:
+            return None
+        then, busy_then, total_then, received_then, sent_then = previous
+        seconds = max(now - then, 1e-6)
+        # Ticks of one CPU in the interval, by the kernel's clock rather than ours
+        elapsed = max(total - total_then, 1) / max(cpus, 1)
+
+        memory_total = memory["MemTotal"] / 1024
+        available = memory.get("MemAvailable", memory["MemFree"]) / 1024
+        swap_total = memory.get("SwapTotal", 0) / 1024
+        swap_used = swap_total - memory.get("SwapFree", 0) / 1024
+        return {
+            "time": now,
+            "cpu_percent": 100.0 * (busy - busy_then) / max(total - total_then, 1),
+            "load": load,
+            "memory_total_mb": memory_total,
+            "memory_used_mb": memory_total - available,
+            "memory_available_mb": available,
+            "swap_percent": 100.0 * swap_used / swap_total if swap_total else 0.0,
+            "network_in_kbs": (received - received_then) / 1024 / seconds,
+            "network_out_kbs": (sent - sent_then) / 1024 / seconds,
+            "ollama_cpu_percent": 100.0 * ollama_ticks / elapsed,
+            "ollama_rss_mb": ollama_rss,
+            "node_cpu_percent": 100.0 * node_ticks / elapsed,
+            "node_rss_mb": node_rss,
+        }
+
+
+def ollama_row(sample, precision, models):
+    """Format a sample as a row of monitor-ollama-resources.sh."""
+    memory_percent = 100.0 * sample["memory_used_mb"] / sample["memory_total_mb"]
+    ollama_memory_percent = 100.0 * sample["ollama_rss_mb"] / sample["memory_total_mb"]
+    return (f"{sample['time']:.{precision}f},{sample['load'][0]:.2f},{memory_percent:.2f},"
+            f"{sample['memory_available_mb']:.2f},{sample['swap_percent']:.2f},"
+            f"{sample['ollama_cpu_percent']:.2f},{ollama_memory_percent:.2f},{sample['ollama_rss_mb']:.2f},"
+            f"{sample['network_in_kbs']:.2f},{sample['network_out_kbs']:.2f},N/A,\"{models}\"\n")
+
+
+def resource_usage_row(sample, precision, models=None):
+    """Format a sample as a row of monitor-resources.sh, in local time."""
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sample["time"]))
+    if precision:
+        stamp += f".{int(sample['time'] % 1 * 10 ** precision):0{precision}d}"
+    memory_percent = 100.0 * sample["memory_used_mb"] / sample["memory_total_mb"]
+    load_1m, load_5m, load_15m = sample["load"]
+    return (f"{stamp},{sample['cpu_percent']:.2f},{sample['memory_used_mb']:.2f},{memory_percent:.2f},"
+            f"{load_1m:.2f},{load_5m:.2f},{load_15m:.2f},"
+            f"{sample['node_cpu_percent']:.2f},{sample['node_rss_mb']:.2f}\n")
+
+
+# Schema name -> (file name prefix, header, row formatter)
+SCHEMAS = {
+    "ollama": ("ollama-monitoring", OLLAMA_HEADER, ollama_row),
+    "resource-usage": ("resource-usage", RESOURCE_USAGE_HEADER, resource_usage_row),
+}
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Sample Ollama and system resources from /proc into a CSV file.")
+    parser.add_argument("-i", "--interval", type=float, default=DEFAULT_INTERVAL, metavar="SECONDS",
+                        help=f"Seconds between samples, fractions allowed (default: {DEFAULT_INTERVAL:g})")
+    parser.add_argument("-d", "--duration", type=float, default=DEFAULT_DURATION, metavar="SECONDS",
+                        help=f"Seconds to sample, 0 until Ctrl+C (default: {DEFAULT_DURATION})")
+    parser.add_argument("--schema", choices=sorted(SCHEMAS), default="ollama",
+                        help="Columns to write: those of monitor-ollama-resources.sh (ollama, the default) "
+                             "or of monitor-resources.sh (resource-usage)")
+    parser.add_argument("-o", "--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help=f"Directory of the CSV file (default: {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument("--output", metavar="FILE", help="CSV file to write, instead of a new one in --output-dir")
+    parser.add_argument("--flush", type=float, default=DEFAULT_FLUSH, metavar="SECONDS",
+                        help=f"Seconds between writes to the CSV (default: {DEFAULT_FLUSH:g})")
+    parser.add_argument("--interface", action="append", metavar="NAME",
+                        help="Network interface to count, can be repeated (default: all but lo)")
+    parser.add_argument("--ollama-port", type=int, default=OLLAMA_PORT,
+                        help=f"Port Ollama listens on, used when no ollama process is found by name "
+                             f"(default: {OLLAMA_PORT})")
+    parser.add_argument("--node-port", type=int, default=NODE_PORT,
+                        help=f"Port of the Node.js server (default: {NODE_PORT})")
+    parser.add_argument("--node-name", metavar="NAME",
+                        help="Sample every process of this name as Node.js instead of the one on --node-port")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not print the samples")
+    args = parser.parse_args()
+    if args.interval <= 0:
+        parser.error("--interval must be positive")
+    if args.duration < 0:
+        parser.error("--duration cannot be negative")
+    if not os.path.exists("/proc/stat"):
+        parser.error("/proc is not available; this sampler runs on Linux only, "
+                     "use monitor-ollama-resources.sh on macOS")
+    return args
+
+
+def main():
+    args = parse_args()
+    prefix, header, format_row = SCHEMAS[args.schema]
+    csv_file = args.output
+    if csv_file is None:
+        os.makedirs(args.output_dir, exist_ok=True)
+        csv_file = os.path.join(args.output_dir, f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}.csv")
+    # Fractions of a second in the timestamps only when samples are that close
+    precision = 0 if args.interval >= 1 else 3
+
+    sampler = Sampler(args.interface, args.ollama_port, args.node_port, args.node_name)
+    sampler.sample()
+    print(f"Sampling every {args.interval:g}s" + (f" for {args.duration:g}s" if args.duration else "")
+          + f" into {csv_file} (Ctrl+C to stop)")
+    print(f"Ollama processes: {len(sampler.ollama)}, Node.js processes: {len(sampler.node)}")
+    if not len(sampler.ollama):
+        print("Warning: Ollama is not running, its columns stay at 0 until it starts")
+    models = _available_models() if args.schema == "ollama" else None
+
+    start = time.monotonic()
+    next_sample = start + args.interval
+    last_flush = start
+    rows = 0
+    with open(csv_file, "w", buffering=1024 * 1024) as out:
+        out.write(",".join(header) + "\n")
+        try:
+            while not args.duration or next_sample - start <= args.duration:
+                time.sleep(max(0.0, next_sample - time.monotonic()))
+                sample = sampler.sample()
+                out.write(format_row(sample, precision, models))
+                rows += 1
+                now = time.monotonic()
+                # A late sample does not make the following ones bunch up
+                next_sample += args.interval * max(1, int((now - next_sample) // args.interval) + 1)
+                if now - last_flush >= args.flush:
+                    out.flush()
+                    last_flush = now
+                    if not args.quiet:
+                        print(f"{time.strftime('%H:%M:%S')} | Ollama CPU {sample['ollama_cpu_percent']:.1f}% "
+                              f"{sample['ollama_rss_mb']:.0f} MB | Node CPU {sample['node_cpu_percent']:.1f}% "
+                              f"| Load {sample['load'][0]:.2f} | Mem {sample['memory_used_mb']:.0f} MB "
+                              f"| Net {sample['network_in_kbs']:.1f}/{sample['network_out_kbs']:.1f} KB/s")
+        except KeyboardInterrupt:
+            print("\nSampling stopped by user.")
+
+    print(f"{rows} samples saved to {csv_file}")
+    print(f"Analyze them with: python3 scripts/analyze-ollama-monitoring.py {csv_file}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""Running aggregates for streaming analysis of monitoring captures.
+
+Every aggregate takes the values of one chunk at a time (NaNs are skipped)
+and keeps a fixed amount of state, so a capture of any length can be
+summarised in constant memory:
+
+* ``RunningStats``: count, mean and variance merged chunk by chunk with
+  Welford's update in the parallel form of Chan et al., plus min and max;
+* ``StreamingQuantiles``: a histogram of the distinct values, which gives
+  exact quantiles interpolated like ``numpy.percentile``/``Series.quantile``
+  as long as the values are few (the monitor writes two decimals).  Past
+  ``MAX_DISTINCT_VALUES`` it turns into a log-bucket sketch with
+  ``SKETCH_RELATIVE_ERROR`` relative error;
+* ``CorrelationSums``: per pair of columns the sums n, x, y, x², y² and xy
+  over the rows where both are present, from which the Pearson matrix is
+  computed with the pairwise deletion of ``DataFrame.corr()``.
+"""
+import math
+
+import numpy as np
+
+# Distinct values a StreamingQuantiles keeps before it becomes a sketch
+MAX_DISTINCT_VALUES = 100_000
+
+# Relative error of a quantile read from the sketch
+SKETCH_RELATIVE_ERROR = 0.01
+
+# Variance (relative to the sum of squares) treated as zero: a constant column
+VARIANCE_EPSILON = 1e-14
+
+
+def finite_values(values):
+    """Return the values of a chunk as a float array without NaNs."""
+    values = np.asarray(values, dtype=float)
+    return values[~np.isnan(values)]
+
+
+class RunningStats:
+    """Count, mean, variance, min and max of a stream of values."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.nan
+        self.max = math.nan
+
+    def update(self, values):
+        values = finite_values(values)
+        count = len(values)
+        if not count:
+            return
+        mean = values.mean()
+        m2 = ((values - mean) ** 2).sum()
+
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = float(np.fmin(self.min, values.min()))
+        self.max = float(np.fmax(self.max, values.max()))
+
+    @property
+    def variance(self):
+        """Sample variance (ddof=1), as pandas computes it."""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean": self.mean if self.count else math.nan,
+            "min": self.min,
+            "max": self.max,
+        }
+
+
+def _lerp(low, high, weight):
+    """Interpolate like numpy.percentile's "linear" method, bit for bit."""
+    if weight >= 0.5:
+        return high - (high - low) * (1 - weight)
+    return low + (high - low) * weight
+
+
+class StreamingQuantiles:
+    """Quantiles of a stream of values: exact while the distinct values are few."""
+
+    def __init__(self, max_distinct=MAX_DISTINCT_VALUES, relative_error=SKETCH_RELATIVE_ERROR):
+        self.max_distinct = max_distinct
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self.count = 0
+        # Exact histogram: sorted distinct values and their counts
+        self.values = np.empty(0)
+        self.counts = np.empty(0, dtype=np.int64)
+        # Log-bucket sketch once the histogram grew too large: bucket -> count
+        # for positive and negated negative values, and the count of zeros
+        self.sketch = None
+
+    @property
+    def exact(self):
+        return self.sketch is None
+
+    def update(self, values):
+        values = finite_values(values)
+        if not len(values):
+            return
+        self.count += len(values)
+        if self.sketch is not None:
+            self._add_to_sketch(values, np.ones(len(values), dtype=np.int64))
+            return
+
+        values, counts = np.unique(values, return_counts=True)
+        merged, inverse = np.unique(np.concatenate([self.values, values]), return_inverse=True)
+        self.counts = np.bincount(inverse, np.concatenate([self.counts, counts]),
+                                  minlength=len(merged)).astype(np.int64)
+        self.values = merged
+        if len(self.values) > self.max_distinct:
+            self.sketch = ({}, {}, 0)
+            self._add_to_sketch(self.values, self.counts)
+            self.values = np.empty(0)
+            self.counts = np.empty(0, dtype=np.int64)
+
+    def _add_to_sketch(self, values, counts):
+        positive, negative, zeros = self.sketch
+        zeros += int(counts[values == 0].sum())
+        for store, mask, sign in ((positive, values > 0, 1), (negative, values < 0, -1)):
+            if mask.any():
+                buckets = np.ceil(np.log(sign * values[mask]) / math.log(self.gamma))
+                keys, inverse = np.unique(buckets.astype(np.int64), return_inverse=True)
+                for key, count in zip(keys.tolist(), np.bincount(inverse, counts[mask]).tolist()):
+                    store[key] = store.get(key, 0) + int(count)
+        self.sketch = (positive, negative, zeros)
+
+    def _order_statistic(self, rank):
+        """Return the value of 0-based rank in the sorted stream."""
+        if self.sketch is None:
+            index = np.searchsorted(np.cumsum(self.counts), rank, side="right")
+            return float(self.values[index])
+
+        positive, negative, zeros = self.sketch
+        buckets = [(-self._bucket_value(key), count) for key, count in
+                   sorted(negative.items(), reverse=True)]
+        buckets.append((0.0, zeros))
+        buckets.extend((self._bucket_value(key), count) for key, count in sorted(positive.items()))
+        seen = 0
+        for value, count in buckets:
+            seen += count
+            if rank < seen:
+                return value
+        return buckets[-1][0]
+
+    def _bucket_value(self, key):
+        """Representative value of a sketch bucket, within the relative error of its values."""
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        """Return the q-quantile (0 <= q <= 1) with linear interpolation, NaN if empty."""
+        if not self.count:
+            return math.nan
+        # Same virtual index as numpy's "linear" method
+        index = (self.count * q + (1 - q)) - 1
+        low = min(max(math.floor(index), 0), self.count - 1)
+        high = min(low + 1, self.count - 1)
+        return _lerp(self._order_statistic(low), self._order_statistic(high), index - math.floor(index))
+
+
+class CorrelationSums:
+    """Pairwise sums of a set of columns for a Pearson correlation matrix.
+
+    Values are shifted by the first value seen in each column before they
+    are summed, which keeps the sums small (timestamps) and makes the
+    variance of a constant column exactly zero.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        size = len(self.columns)
+        self.shift = None
+        self.n = np.zeros((size, size))
+        self.sx = np.zeros((size, size))
+        self.sxx = np.zeros((size, size))
+        self.sxy = np.zeros((size, size))
+
+    def update(self, matrix):
+        """Add a chunk given as a rows x columns float array with NaNs."""
+        matrix = np.asarray(matrix, dtype=float)
+        valid = ~np.isnan(matrix)
+        if self.shift is None:
+            self.shift = np.full(len(self.columns), np.nan)
+        missing = np.isnan(self.shift) & valid.any(axis=0)
+        if missing.any():
+            first = valid[:, missing].argmax(axis=0)
+            self.shift[missing] = matrix[first, np.flatnonzero(missing)]
+
+        shifted = np.where(valid, matrix - np.nan_to_num(self.shift), 0.0)
+        weights = valid.astype(float)
+        # sx[i, j]: sum of column i over the rows where column j is present too
+        self.n += weights.T @ weights
+        self.sx += shifted.T @ weights
+        self.sxx += (shifted ** 2).T @ weights
+        self.sxy += shifted.T @ shifted
+
+    def correlation(self):
+        """Return the Pearson correlation matrix as a 2-D array (NaN where undefined)."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            n = self.n
+            cov = self.sxy - self.sx * self.sx.T / n
+            var_x = self.sxx - self.sx ** 2 / n
+            var_y = var_x.T
+            # Rounding leaves a tiny variance where a column is constant
+            var_x = np.where(var_x <= self.sxx * VARIANCE_EPSILON, 0.0, var_x)
+            var_y = np.where(var_y <= self.sxx.T * VARIANCE_EPSILON, 0.0, var_y)
+            divisor = np.sqrt(var_x * var_y)
+            result = np.where((n > 0) & (divisor > 0), cov / divisor, np.nan)
+        np.fill_diagonal(result, np.where(np.diag(divisor) > 0, 1.0, np.nan))
+        return np.clip(result, -1.0, 1.0)
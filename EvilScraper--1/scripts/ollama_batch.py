@@ -0,0 +1,144 @@
+"""Batch analysis of many monitoring captures (--batch).
+
+Every capture is loaded through its schema adapter (see ollama_schemas)
+and summarised in a worker process; the results come back as one row per
+capture, in the order the files were given, and are printed as one table
+comparing the captures.  A capture that cannot be read gets a row with its
+error instead of stopping the batch.
+"""
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from ollama_monitoring import (
+    CPU_LOAD_COL, EPISODE_THRESHOLDS, MEMORY_USAGE_COL, NODE_CPU_COL, NODE_MEMORY_MB_COL, OLLAMA_CPU_COL,
+    OLLAMA_MEMORY_MB_COL, QUANTILES, TOTAL_NETWORK, USED_MEMORY_MB_COL, format_duration, load,
+    summarize_frame,
+)
+
+# Sections a batch row is built from; rolling percentiles are left out
+BATCH_SECTIONS = ("summary", "episodes")
+
+# Names of the episode columns of the table
+EPISODE_NAMES = {MEMORY_USAGE_COL: "Mem %", OLLAMA_CPU_COL: "Ollama CPU", TOTAL_NETWORK: "Net KB/s"}
+
+
+def expand_paths(patterns):
+    """Expand glob patterns (quoted so the shell leaves them alone) into paths, without duplicates."""
+    paths = {}
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]:
+            paths.setdefault(path, None)
+    return list(paths)
+
+
+def _metric(metrics, col, *keys):
+    stats = metrics.get(col)
+    if not stats or not stats["count"]:
+        return None
+    return tuple(stats[key] for key in keys)
+
+
+def analyze_capture(csv_file, use_cache=True):
+    """Summarise one capture into a row of the batch table (a dict).
+
+    The row has "file" and either "error" or the figures of the capture.
+    """
+    try:
+        df = load(csv_file, use_cache)
+        summary = summarize_frame(df, BATCH_SECTIONS, windows=())
+    except Exception as e:
+        return {"file": csv_file, "error": str(e)}
+
+    timestamps = df['Timestamp'].dropna()
+    metrics = summary["metrics"]
+    p95 = summary["quantiles"].get(OLLAMA_CPU_COL, {}).get("values", [None] * len(QUANTILES))
+    return {
+        "file": csv_file,
+        "schema": summary["schema"],
+        "rows": summary["rows"],
+        "start": float(timestamps.min()) if len(timestamps) else None,
+        "seconds": float(timestamps.max() - timestamps.min()) if len(timestamps) else None,
+        "cpu_load": _metric(metrics, CPU_LOAD_COL, "mean", "max"),
+        "memory": _metric(metrics, MEMORY_USAGE_COL, "mean", "max"),
+        "used_memory_mb": _metric(metrics, USED_MEMORY_MB_COL, "max"),
+        "ollama_cpu": _metric(metrics, OLLAMA_CPU_COL, "mean", "max"),
+        "ollama_cpu_p95": p95[QUANTILES.index(0.95)],
+        "ollama_memory_mb": _metric(metrics, OLLAMA_MEMORY_MB_COL, "max"),
+        "node_cpu": _metric(metrics, NODE_CPU_COL, "mean", "max"),
+        "node_memory_mb": _metric(metrics, NODE_MEMORY_MB_COL, "max"),
+        "network": _metric(metrics, TOTAL_NETWORK, "mean", "max"),
+        "episodes": {
+            col: (found["episodes"], found["longest"][0]["seconds"] if found["longest"] else 0.0)
+            for col, found in summary["episodes"].items()
+        },
+    }
+
+
+def analyze_batch(paths, jobs=1, use_cache=True):
+    """Return the rows of analyze_capture() for the paths, in order, using ``jobs`` processes."""
+    if jobs <= 1 or len(paths) <= 1:
+        return [analyze_capture(path, use_cache) for path in paths]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as executor:
+        return list(executor.map(analyze_capture, paths, [use_cache] * len(paths)))
+
+
+def _pair(values, fmt="{:.1f}"):
+    if values is None:
+        return "-"
+    return "/".join(fmt.format(value) for value in values)
+
+
+def _episodes_cell(row, col):
+    count, longest = row["episodes"].get(col, (0, 0.0))
+    return f"{count} ({format_duration(longest)})" if count else "0"
+
+
+def print_table(rows):
+    """Print the batch rows as an aligned table, followed by the failed captures."""
+    header = ["Capture", "Schema", "Rows", "Span", "Load avg/max", "Mem % avg/max", "Used MB max",
+              "Ollama CPU avg/p95/max", "Ollama MB max", "Node CPU avg/max", "Node MB max", "Net KB/s avg/max",
+              *(f"{EPISODE_NAMES.get(col, col)}>{threshold} episodes" for col, threshold in EPISODE_THRESHOLDS)]
+    table = []
+    for row in rows:
+        if "error" in row:
+            continue
+        ollama_cpu = row["ollama_cpu"]
+        if ollama_cpu is not None:
+            ollama_cpu = (ollama_cpu[0], row["ollama_cpu_p95"], ollama_cpu[1])
+        table.append([
+            os.path.basename(row["file"]),
+            row["schema"],
+            str(row["rows"]),
+            "-" if row["seconds"] is None else format_duration(row["seconds"]),
+            _pair(row["cpu_load"], "{:.2f}"),
+            _pair(row["memory"]),
+            _pair(row["used_memory_mb"], "{:.0f}"),
+            _pair(ollama_cpu),
+            _pair(row["ollama_memory_mb"], "{:.0f}"),
+            _pair(row["node_cpu"]),
+            _pair(row["node_memory_mb"], "{:.0f}"),
+            _pair(row["network"]),
+            *(_episodes_cell(row, col) for col, _ in EPISODE_THRESHOLDS),
+        ])
+
+    if table:
+        widths = [max(len(cells[i]) for cells in [header, *table]) for i in range(len(header))]
+        for cells in [header, ["-" * width for width in widths], *table]:
+            # Text columns to the left, figures to the right
+            print("  ".join(cell.ljust(width) if i < 2 else cell.rjust(width)
+                            for i, (cell, width) in enumerate(zip(cells, widths))).rstrip())
+
+    failed = [row for row in rows if "error" in row]
+    total_rows = sum(row["rows"] for row in rows if "error" not in row)
+    total_seconds = sum(row["seconds"] or 0.0 for row in rows if "error" not in row)
+    print(f"\n{len(rows) - len(failed)} captures, {total_rows} samples, "
+          f"{format_duration(total_seconds)} monitored" + (f", {len(failed)} failed:" if failed else ""))
+    for row in failed:
+        print(f"  {row['file']}: {row['error']}")
+
+
+def default_jobs(jobs):
+    """Return the number of worker processes for a --jobs value, 0 meaning one per CPU."""
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
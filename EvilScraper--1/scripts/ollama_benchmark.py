@@ -0,0 +1,443 @@
+"""Benchmarks for the Ollama monitoring analysis.
+
+Synthetic captures in the schema of monitor-ollama-resources.sh are
+generated from a seed, so every run analyses the same bytes.  They look
+like real ones: one sample a second with the odd gap, bursts of requests
+that push Ollama CPU, memory and network up, empty fields, and Ollama
+columns holding "N/A" while Ollama restarts and the odd "error", so they
+are read as strings and go through pd.to_numeric.
+
+Every stage of the analysis is timed on its own, over each capture size:
+
+- ``parse``: read_capture(), CSV parsing and the schema adapter
+- ``convert``: convert_ollama_columns(), the pd.to_numeric calls
+- ``summary``, ``bottlenecks``, ``episodes``, ``correlations``, ``lags``:
+  the sections of summarize_frame()
+- ``charts``: render_charts(), decimation and matplotlib
+- ``cache_write``, ``cache_load``: the columnar cache of ollama_cache
+- ``stream``: summarize_stream() over the CSV, in chunks
+
+The stages of a capture run in a fresh process, one after the other as
+the analyzer runs them, so the imports a stage pays for are counted once.
+Before each stage the peak RSS of the process is reset (Linux
+/proc/self/clear_refs), so the peak reported is the stage's own; where it
+cannot be reset the peak includes the stages before it.  A size that runs
+out of memory is reported with its error and the larger sizes still run.
+Results are printed and saved as JSON, one file per run; --compare prints
+the stages that got slower than in an earlier results file.
+
+    python scripts/ollama_benchmark.py --rows 1e4,1e5,1e6 --repeat 3
+    python scripts/ollama_benchmark.py --rows 1e7 --compare ollama-benchmark-results-<time>.json
+
+--stage picks the stages to run, parse comes along with any stage that
+needs the capture in memory.  10^8 rows take about 9 GB of CSV and half
+an hour to generate; --data keeps the captures between runs and
+--generate-only only writes them, for running the analyzer by hand.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from multiprocessing import get_context
+
+import numpy as np
+
+from ollama_defaults import SECTIONS
+
+CAPTURE_VERSION = 1
+
+# Stages in the order they run; all but stream need the capture parsed first
+STAGES = ("parse", "convert") + SECTIONS + ("charts", "cache_write", "cache_load", "stream")
+
+DEFAULT_ROWS = "1e4,1e5,1e6"
+
+# Rows generated at once
+BLOCK_ROWS = 1_000_000
+
+# A stage this much slower than in the compared results is reported
+REGRESSION_RATIO = 1.25
+
+HEADER = ("Timestamp,CPU Load,Memory Usage %,Free Memory MB,Swap Usage %,Ollama CPU %,"
+          "Ollama Memory %,Ollama Memory MB,Network In KB/s,Network Out KB/s,GPU Usage,Available Models")
+MODELS = "llama3:8b, mistral:7b"
+START_TIME = 1741300000       # 2025-03-06, when the real captures were taken
+TOTAL_MEMORY_MB = 16384
+
+BURST_EVERY = 600             # Samples between request bursts, on average
+BURST_LENGTH = 40             # Samples a burst lasts, on average
+RESTART_EVERY = 50_000        # Samples between Ollama restarts, on average
+RESTART_LENGTH = 20           # Samples Ollama is down for, on average
+STARTUP_ROWS = 5              # Samples before Ollama is up, so every capture has "N/A"
+GAP_PROBABILITY = 1e-4        # Chance that the monitor skips time before a sample
+MISSING_PROBABILITY = 1e-3    # Chance that a field is empty
+ERROR_PROBABILITY = 1e-4      # Chance of an "error" in an Ollama column
+
+
+def _runs(rng, rows, every, length, carry):
+    """Return a mask of runs starting every ``every`` rows and lasting ``length`` on average.
+
+    ``carry`` is the row (relative to this block) where a run started in
+    an earlier block ends; returns the mask and the carry of the next block.
+    """
+    index = np.arange(rows)
+    starts = rng.random(rows) < 1 / every
+    ends = np.where(starts, index + rng.geometric(1 / length, rows), -1)
+    ends[0] = max(ends[0], carry)
+    running_end = np.maximum.accumulate(ends)
+    return index < running_end, int(running_end[-1]) - rows
+
+
+def _with_missing(rng, values, decimals):
+    """Round the values as the monitor prints them and blank out a few."""
+    values = np.round(values, decimals)
+    values[rng.random(len(values)) < MISSING_PROBABILITY] = np.nan
+    return values
+
+
+def _block(rng, rows, state):
+    """Return the CSV lines of ``rows`` samples; ``state`` carries time and runs between blocks."""
+    import pandas as pd
+
+    gaps = np.where(rng.random(rows) < GAP_PROBABILITY, rng.integers(10, 300, rows), 0)
+    timestamps = state["time"] + np.cumsum(1 + gaps)
+    state["time"] = int(timestamps[-1])
+    burst, state["burst"] = _runs(rng, rows, BURST_EVERY, BURST_LENGTH, state["burst"])
+    down, state["down"] = _runs(rng, rows, RESTART_EVERY, RESTART_LENGTH, state["down"])
+    busy = burst & ~down
+
+    ollama_cpu = np.where(busy, rng.normal(550, 120, rows), rng.gamma(2, 4, rows)).clip(0.1, 1600)
+    ollama_mb = np.where(busy, rng.normal(6500, 400, rows), rng.normal(4800, 150, rows)).clip(50, None)
+    memory_percent = (35 + ollama_mb / TOTAL_MEMORY_MB * 100 + rng.normal(0, 2, rows)).clip(0, 100)
+    load = np.where(busy, rng.gamma(8, 0.8, rows), rng.gamma(2, 0.4, rows))
+    network_in = np.where(busy, rng.exponential(900, rows), rng.exponential(15, rows))
+    network_out = np.where(busy, rng.exponential(600, rows), rng.exponential(10, rows))
+
+    columns = {
+        "Timestamp": timestamps,
+        "CPU Load": _with_missing(rng, load, 2),
+        "Memory Usage %": _with_missing(rng, memory_percent, 2),
+        "Free Memory MB": _with_missing(rng, (100 - memory_percent) * TOTAL_MEMORY_MB / 100, 2),
+        "Swap Usage %": _with_missing(rng, rng.uniform(0, 20, rows), 2),
+    }
+    for name, values, decimals in [("Ollama CPU %", ollama_cpu, 1),
+                                   ("Ollama Memory %", ollama_mb / TOTAL_MEMORY_MB * 100, 1),
+                                   ("Ollama Memory MB", ollama_mb, 2)]:
+        text = _with_missing(rng, values, decimals).astype(object)
+        text[down] = "N/A"
+        text[rng.random(rows) < ERROR_PROBABILITY] = "error"
+        columns[name] = text
+    columns["Network In KB/s"] = _with_missing(rng, network_in, 2)
+    columns["Network Out KB/s"] = _with_missing(rng, network_out, 2)
+    frame = pd.DataFrame(columns)
+    frame["GPU Usage"] = "N/A"
+    frame["Available Models"] = MODELS
+    # Empty fields for NaN, the model list quoted as it holds commas
+    return frame.to_csv(header=False, index=False, lineterminator="\n")
+
+
+def generate_capture(csv_file, rows, seed=0):
+    """Write a synthetic capture of ``rows`` samples and return its manifest.
+
+    The same seed and size always produce the same file.  A capture that
+    already matches its manifest (``<csv_file>.json``) is reused.
+    """
+    manifest = {"version": CAPTURE_VERSION, "seed": seed, "rows": rows}
+    manifest_path = csv_file + ".json"
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            existing = json.load(f)
+        if {key: existing.get(key) for key in manifest} == manifest and \
+                os.path.getsize(csv_file) == existing.get("bytes"):
+            return existing
+    except (OSError, ValueError):
+        pass
+
+    # One generator per block, so a block does not depend on the size of the others
+    seeds = np.random.SeedSequence(seed).spawn((rows + BLOCK_ROWS - 1) // BLOCK_ROWS)
+    state = {"time": START_TIME, "burst": 0, "down": STARTUP_ROWS}
+    with open(csv_file, "w", encoding="utf-8") as f:
+        f.write(HEADER + "\n")
+        for block, block_seed in enumerate(seeds):
+            f.write(_block(np.random.default_rng(block_seed), min(BLOCK_ROWS, rows - block * BLOCK_ROWS), state))
+
+    manifest["bytes"] = os.path.getsize(csv_file)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _status_mb(field):
+    with open("/proc/self/status", encoding="ascii") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field + ":")) / 1024
+
+
+def reset_peak_rss():
+    """Reset the peak RSS of this process to its current RSS; False where that is not possible."""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def rss_mb():
+    """Return the current and peak RSS of this process in MB."""
+    try:
+        return _status_mb("VmRSS"), _status_mb("VmHWM")
+    except (OSError, StopIteration):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS, kB elsewhere
+        peak /= 1024 * 1024 if sys.platform == "darwin" else 1024
+        return None, peak
+
+
+def _stage_functions(csv_file, work_dir, context):
+    """Return a function per stage; ``context`` holds the capture between stages."""
+    from ollama_cache import load_cached, write_cache
+    from ollama_monitoring import convert_ollama_columns, render_charts, summarize_frame, summarize_stream
+    from ollama_schemas import read_capture
+
+    def parse():
+        context["df"] = read_capture(csv_file)
+
+    def convert():
+        convert_ollama_columns(context["df"])
+
+    def section(name):
+        return lambda: summarize_frame(context["df"], [name])
+
+    def charts():
+        render_charts(context["df"], os.path.join(work_dir, "capture_analysis.png"))
+
+    def cache_write():
+        write_cache(csv_file, context["df"], os.stat(csv_file))
+
+    def cache_load():
+        if load_cached(csv_file) is None:
+            raise RuntimeError("the cache just written was not read back")
+
+    def stream():
+        summarize_stream(csv_file, sections=[name for name in SECTIONS if name != "lags"])
+
+    functions = {"parse": parse, "convert": convert, "charts": charts, "cache_write": cache_write,
+                 "cache_load": cache_load, "stream": stream}
+    functions.update({name: section(name) for name in SECTIONS})
+    return functions
+
+
+def run_stages(csv_file, stages):
+    """Time the stages over a capture; runs in a fresh worker process.
+
+    Returns ``{stage: {"wall_s", "start_rss_mb", "peak_rss_mb"} or {"error"}}``
+    and whether the peaks are the stages' own.
+    """
+    import warnings
+
+    import pandas as pd
+
+    # Charts are drawn to files, never to a window
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    # The Ollama columns mix numbers and "N/A" on purpose
+    warnings.simplefilter("ignore", pd.errors.DtypeWarning)
+    results = {}
+    own_peaks = True
+    with tempfile.TemporaryDirectory() as work_dir:
+        context = {}
+        functions = _stage_functions(csv_file, work_dir, context)
+        for stage in stages:
+            if stage != "stream" and stage != "parse" and "df" not in context:
+                results[stage] = {"error": "no capture in memory"}
+                continue
+            own_peaks = reset_peak_rss() and own_peaks
+            start_rss, _ = rss_mb()
+            started = time.perf_counter()
+            try:
+                functions[stage]()
+            except MemoryError:
+                context.clear()
+                results[stage] = {"error": "out of memory"}
+                continue
+            except Exception as e:
+                results[stage] = {"error": f"{type(e).__name__}: {e}"}
+                continue
+            wall = time.perf_counter() - started
+            results[stage] = {"wall_s": wall, "start_rss_mb": start_rss, "peak_rss_mb": rss_mb()[1]}
+    return results, own_peaks
+
+
+def in_fresh_process(*args):
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(run_stages, *args).result()
+
+
+def benchmark(csv_file, rows, stages, repeat):
+    """Run the stages over a capture repeat times; return a result per stage, by median wall time."""
+    runs = []
+    for _ in range(repeat):
+        try:
+            runs.append(in_fresh_process(csv_file, stages))
+        except BrokenProcessPool:
+            # Killed, by the kernel's OOM killer most likely
+            return [{"rows": rows, "stage": stage, "error": "worker process died"} for stage in stages]
+
+    results = []
+    for stage in stages:
+        timed = [run[stage] for run, _ in runs if "error" not in run[stage]]
+        if not timed:
+            results.append({"rows": rows, "stage": stage, "error": runs[0][0][stage]["error"]})
+            continue
+        wall = statistics.median(run["wall_s"] for run in timed)
+        results.append({
+            "rows": rows,
+            "stage": stage,
+            "wall_s": wall,
+            "wall_s_min": min(run["wall_s"] for run in timed),
+            "rows_per_s": rows / wall if wall > 0 else None,
+            "start_rss_mb": timed[0]["start_rss_mb"],
+            "peak_rss_mb": max(run["peak_rss_mb"] for run in timed),
+            "own_peak": all(own for _, own in runs),
+            "runs": [run["wall_s"] for run in timed],
+        })
+    return results
+
+
+def print_results(results):
+    """Print the results as a table."""
+    print(f"{'Rows':>11} {'Stage':<13} {'Wall s':>9} {'Rows/s':>12} {'RSS MB':>8} {'Peak MB':>8}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['rows']:>11} {result['stage']:<13} {'error: ' + result['error']}")
+            continue
+        start = "-" if result["start_rss_mb"] is None else f"{result['start_rss_mb']:.0f}"
+        rate = "-" if result["rows_per_s"] is None else f"{result['rows_per_s']:.0f}"
+        print(f"{result['rows']:>11} {result['stage']:<13} {result['wall_s']:>9.3f} {rate:>12} "
+              f"{start:>8} {result['peak_rss_mb']:>8.0f}")
+
+
+def compare_results(results, previous_file):
+    """Print the stages slower than in an earlier results file; return how many there are."""
+    with open(previous_file, encoding="utf-8") as f:
+        previous = {(result["rows"], result["stage"]): result
+                    for result in json.load(f)["results"] if "error" not in result}
+    slower = 0
+    print(f"\nCompared with {previous_file} (median wall time, slower by {REGRESSION_RATIO:g}x or more):")
+    for result in results:
+        before = previous.get((result["rows"], result["stage"]))
+        if before is None or "error" in result or not before["wall_s"]:
+            continue
+        ratio = result["wall_s"] / before["wall_s"]
+        if ratio >= REGRESSION_RATIO:
+            slower += 1
+            print(f"  {result['rows']:>11} {result['stage']:<13} {before['wall_s']:.3f}s -> "
+                  f"{result['wall_s']:.3f}s ({ratio:.2f}x)")
+    if not slower:
+        print("  none")
+    return slower
+
+
+def _commit():
+    """Return the git commit of the scripts, None outside a repository."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def row_counts(value):
+    """Parse a comma separated list of row counts such as 1e4,250000 (argparse type)."""
+    try:
+        counts = [int(float(part)) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid row counts: {value!r}") from None
+    if not counts or min(counts) < 2:
+        raise argparse.ArgumentTypeError(f"row counts must be at least 2: {value!r}")
+    return sorted(set(counts))
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark the stages of the Ollama monitoring analysis.")
+    parser.add_argument("--rows", type=row_counts, default=row_counts(DEFAULT_ROWS), metavar="N[,N...]",
+                        help=f"Capture sizes in rows, 1e6 notation allowed (default: {DEFAULT_ROWS})")
+    parser.add_argument("--stage", action="append", choices=STAGES, metavar="STAGE",
+                        help=f"Benchmark only this stage, can be repeated ({', '.join(STAGES)})")
+    parser.add_argument("--data", metavar="DIR",
+                        help="Directory of the captures, generated if missing (default: a temporary directory)")
+    parser.add_argument("--seed", type=int, default=0, help="Capture random seed (default: 0)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Timed runs per capture, the median is reported (default: 3)")
+    parser.add_argument("--generate-only", action="store_true",
+                        help="Only write the captures into --data")
+    parser.add_argument("--output", metavar="FILE",
+                        help="Results file (default: ollama-benchmark-results-<timestamp>.json)")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="Earlier results file to report the stages that got slower against")
+    args = parser.parse_args()
+    if args.generate_only and not args.data:
+        parser.error("--generate-only needs --data")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    wanted = set(args.stage or STAGES)
+    if wanted - {"parse", "stream"}:
+        wanted.add("parse")
+    args.stages = [stage for stage in STAGES if stage in wanted]
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    started_at = datetime.now(timezone.utc)
+
+    captures = []
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = os.path.abspath(args.data or tmp_dir)
+        os.makedirs(data_dir, exist_ok=True)
+        for rows in args.rows:
+            csv_file = os.path.join(data_dir, f"ollama-monitoring-{rows}-seed{args.seed}.csv")
+            print(f"Generating {csv_file}...")
+            manifest = generate_capture(csv_file, rows, args.seed)
+            captures.append(manifest)
+            print(f"Capture: {rows} rows, {manifest['bytes'] / (1024 * 1024):.1f} MB")
+            if not args.generate_only:
+                results.extend(benchmark(csv_file, rows, args.stages, args.repeat))
+    if args.generate_only:
+        sys.exit(0)
+
+    print()
+    print_results(results)
+    if results and not all(result.get("own_peak", True) for result in results):
+        print("\nThe peak RSS could not be reset between stages and includes the stages before each one.")
+    if args.compare:
+        compare_results(results, args.compare)
+
+    import pandas as pd
+
+    output = args.output or (
+        "ollama-benchmark-results-" + started_at.strftime("%Y-%m-%dT%H-%M-%SZ") + ".json"
+    )
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": started_at.isoformat(),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "captures": captures,
+            "repeat": args.repeat,
+            "results": results,
+        }, f, indent=2)
+    print(f"Results saved to {output}")
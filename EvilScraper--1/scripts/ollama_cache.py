@@ -0,0 +1,192 @@
+"""Typed columnar cache of Ollama monitoring captures.
+
+Parsing a large CSV and converting the Ollama columns with ``pd.to_numeric``
+takes most of the time of an analysis.  The first load writes the parsed
+capture, converted to the Ollama schema (see ollama_schemas), next to the
+CSV into ``<csv_file>.cache/``:
+
+* one NumPy ``.npy`` file per numeric column, the Ollama columns already
+  converted to float;
+* ``schema.json`` with the column names and files, the schema the capture
+  was converted from, the Ollama columns that held any value before the
+  conversion ("N/A" counts), and the fingerprint of the CSV (size,
+  modification time and content hash).
+
+Later loads memory-map the ``.npy`` files into a DataFrame without copying
+them, as long as the fingerprint still matches: the same size and mtime, or
+the same content hash when only the mtime changed.  A hash that matches
+records the new mtime, once it is outside the racy window, so the next load
+does not hash again.  Anything else rebuilds the cache.  Text columns (GPU Usage "N/A", the model list) are not used by
+the analysis and are not cached.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from ollama_monitoring import OLLAMA_COLUMNS, RAW_DATA_ATTR
+from ollama_schemas import SCHEMA_ATTR, read_capture
+
+# Bump when the files of the cache change
+CACHE_FORMAT = 3
+
+SCHEMA_FILE = "schema.json"
+
+# A CSV modified this recently may still change within the same mtime tick,
+# so its content hash is always re-checked on the next load
+RACY_WINDOW_NS = 2 * 1_000_000_000
+
+# Bytes hashed per read
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def cache_dir(csv_file):
+    """Return the directory the cache of a CSV file lives in."""
+    return csv_file + ".cache"
+
+
+def hash_file(path):
+    """Return the content hash of a file, reading it in bounded blocks."""
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def _settled_mtime_ns(stat_result):
+    """Return the mtime of a stat result, or -1 while it is within the racy window."""
+    mtime_ns = stat_result.st_mtime_ns
+    return -1 if time.time_ns() - mtime_ns < RACY_WINDOW_NS else mtime_ns
+
+
+def _fingerprint(csv_file, stat_result):
+    return {"size": stat_result.st_size, "mtime_ns": _settled_mtime_ns(stat_result),
+            "digest": hash_file(csv_file)}
+
+
+def _read_schema(directory):
+    try:
+        with open(os.path.join(directory, SCHEMA_FILE), encoding="utf-8") as f:
+            schema = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(schema, dict) or schema.get("format") != CACHE_FORMAT:
+        return None
+    return schema
+
+
+def _write_schema(directory, schema):
+    # Replaced in one step: a reader sees the old schema or the new one
+    path = os.path.join(directory, SCHEMA_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(schema, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(path + ".tmp", path)
+
+
+def _is_fresh(csv_file, directory, schema):
+    stat_result = os.stat(csv_file)
+    fingerprint = schema["fingerprint"]
+    if fingerprint["size"] != stat_result.st_size:
+        return False
+    if fingerprint["mtime_ns"] == stat_result.st_mtime_ns:
+        return True
+    # Touched (or written within the racy window): compare the content
+    if fingerprint["digest"] != hash_file(csv_file):
+        return False
+    mtime_ns = _settled_mtime_ns(stat_result)
+    if mtime_ns != fingerprint["mtime_ns"]:
+        # Remember the mtime the content was checked at, so it is hashed only once
+        fingerprint["mtime_ns"] = mtime_ns
+        try:
+            _write_schema(directory, schema)
+        except OSError:
+            pass
+    return True
+
+
+def load_cached(csv_file):
+    """Return the capture memory-mapped from its cache, or None if there is no fresh cache."""
+    directory = cache_dir(csv_file)
+    schema = _read_schema(directory)
+    if schema is None or not _is_fresh(csv_file, directory, schema):
+        return None
+    try:
+        columns = {
+            column["name"]: np.load(os.path.join(directory, column["file"]), mmap_mode="r")
+            for column in schema["columns"]
+        }
+    except (OSError, ValueError):
+        return None
+    if any(len(values) != schema["rows"] for values in columns.values()):
+        return None
+
+    df = pd.DataFrame(columns, copy=False)
+    df.attrs[RAW_DATA_ATTR] = schema["ollama_has_data"]
+    df.attrs[SCHEMA_ATTR] = schema["schema"]
+    return df
+
+
+def write_cache(csv_file, df, stat_result):
+    """Write the cache of a capture parsed from csv_file.
+
+    ``df`` is the capture converted by ollama_schemas.normalize(), before
+    the Ollama columns are converted to numbers;
+    ``stat_result`` is the os.stat() of the CSV taken before it was read,
+    so a capture that grew meanwhile is cached as stale.
+    """
+    directory = cache_dir(csv_file)
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+    os.makedirs(directory)
+
+    has_data = [col for col in OLLAMA_COLUMNS if col in df.columns and df[col].notna().any()]
+    columns = []
+    for index, name in enumerate(df.columns):
+        series = df[name]
+        if name in OLLAMA_COLUMNS:
+            series = pd.to_numeric(series, errors='coerce')
+        if series.dtype.kind not in "biuf":
+            continue
+        file_name = f"{index:03d}.npy"
+        np.save(os.path.join(directory, file_name), series.to_numpy())
+        columns.append({"name": name, "file": file_name, "dtype": series.dtype.str})
+
+    schema = {
+        "format": CACHE_FORMAT,
+        "source": os.path.basename(csv_file),
+        "schema": df.attrs[SCHEMA_ATTR],
+        "rows": len(df),
+        "columns": columns,
+        "ollama_has_data": has_data,
+        "fingerprint": _fingerprint(csv_file, stat_result),
+    }
+    # Written last: a cache without its schema is never read
+    _write_schema(directory, schema)
+
+
+def load_capture(csv_file, use_cache=True):
+    """Load a capture, from its cache when it is fresh.
+
+    Returns ``(df, from_cache)``; either way df is in the Ollama schema.
+    A CSV that has to be parsed gets its cache (re)written; failing to
+    write it only prints a warning.
+    """
+    if use_cache:
+        df = load_cached(csv_file)
+        if df is not None:
+            return df, True
+
+    stat_result = os.stat(csv_file)
+    df = read_capture(csv_file)
+    if use_cache:
+        try:
+            write_cache(csv_file, df, stat_result)
+        except OSError as e:
+            print(f"Warning: could not write the cache {cache_dir(csv_file)}: {e}")
+    return df, False
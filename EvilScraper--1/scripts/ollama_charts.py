@@ -0,0 +1,150 @@
+"""Charts of Ollama monitoring captures.
+
+Imported by ollama_monitoring.render_charts() only when charts are drawn,
+as matplotlib is slow to import.
+
+Every series is decimated to about two points per pixel of the figure
+width before it is drawn (see ollama_decimate), so drawing takes the same
+time whatever the length of the capture.  A capture longer than a page
+(six hours by default) is split into pages covering consecutive time
+windows, one PNG each; there are at most ``MAX_PAGES`` pages, longer
+captures get longer pages.
+"""
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from ollama_decimate import lttb, minmax_envelope
+from ollama_defaults import DEFAULT_PAGE_SECONDS
+from ollama_monitoring import (
+    CPU_LOAD_COL, MEMORY_USAGE_COL, NETWORK_IN_COL, NETWORK_OUT_COL, OLLAMA_CPU_COL,
+    OLLAMA_MEMORY_COL, OLLAMA_MEMORY_MB_COL, convert_ollama_columns,
+)
+
+FIGURE_SIZE = (12, 15)
+DPI = 100
+
+# Most pages drawn for one capture
+MAX_PAGES = 24
+
+# "none" plots every sample
+DECIMATION_METHODS = ("minmax", "lttb", "none")
+
+
+def page_ranges(timestamps, page_seconds=DEFAULT_PAGE_SECONDS):
+    """Split sorted timestamps (seconds) into pages; return their ``(start, end)`` row ranges.
+
+    Pages cover equal time windows; windows without samples are skipped.
+    """
+    if not len(timestamps):
+        return []
+    duration = timestamps[-1] - timestamps[0]
+    span = max(page_seconds, duration / MAX_PAGES)
+    count = max(1, math.ceil(duration / span))
+    edges = np.searchsorted(timestamps, timestamps[0] + span * np.arange(1, count))
+    bounds = [0, *edges.tolist(), len(timestamps)]
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def page_path(output_file, number, pages):
+    """Return the file of page ``number`` (1-based): output_file itself for a single page."""
+    if pages == 1:
+        return output_file
+    root, ext = os.path.splitext(output_file)
+    return f"{root}-{number:0{len(str(pages))}d}{ext}"
+
+
+def _decimate(seconds, values, method, width):
+    if method == "lttb":
+        seconds, values = lttb(seconds, values, 2 * width)
+    elif method == "minmax":
+        seconds, values = minmax_envelope(seconds, values, width)
+    return pd.to_datetime(seconds, unit='s'), values
+
+
+def _draw_page(series, output_file, method, title=None):
+    """Draw one page; series maps a column to its ``(seconds, values)`` arrays."""
+    fig, axs = plt.subplots(3, 1, figsize=FIGURE_SIZE, dpi=DPI)
+    width = FIGURE_SIZE[0] * DPI
+
+    def plot(ax, col, *args, **kwargs):
+        ax.plot(*_decimate(*series[col], method, width), *args, **kwargs)
+
+    # Plot CPU usage
+    plot(axs[0], CPU_LOAD_COL, label='System CPU Load')
+    if OLLAMA_CPU_COL in series:
+        plot(axs[0], OLLAMA_CPU_COL, label=OLLAMA_CPU_COL)
+    axs[0].set_title('CPU Usage Over Time')
+    axs[0].set_ylabel('CPU Usage')
+    axs[0].legend()
+    axs[0].grid(True)
+
+    # Plot Memory usage
+    plot(axs[1], MEMORY_USAGE_COL, label='System Memory %')
+    if OLLAMA_MEMORY_COL in series:
+        plot(axs[1], OLLAMA_MEMORY_COL, label=OLLAMA_MEMORY_COL)
+    if OLLAMA_MEMORY_MB_COL in series:
+        ax2 = axs[1].twinx()
+        plot(ax2, OLLAMA_MEMORY_MB_COL, 'r-', label=OLLAMA_MEMORY_MB_COL)
+        ax2.set_ylabel('Memory (MB)', color='r')
+    axs[1].set_title('Memory Usage Over Time')
+    axs[1].set_ylabel('Memory Usage %')
+    axs[1].legend()
+    axs[1].grid(True)
+
+    # Plot Network usage
+    plot(axs[2], NETWORK_IN_COL, label='Network In (KB/s)')
+    plot(axs[2], NETWORK_OUT_COL, label='Network Out (KB/s)')
+    axs[2].set_title('Network Usage Over Time')
+    axs[2].set_ylabel('KB/s')
+    axs[2].legend()
+    axs[2].grid(True)
+
+    # Format x-axis to show time
+    for ax in axs:
+        ax.set_xlabel('Time')
+
+    if title:
+        fig.suptitle(title)
+    plt.tight_layout()
+    plt.savefig(output_file)
+    plt.close(fig)
+
+
+def draw_charts(df, output_file, page_seconds=DEFAULT_PAGE_SECONDS, method="minmax"):
+    """Draw CPU, memory and network usage over time into output_file; return the files written.
+
+    A capture longer than ``page_seconds`` is drawn on several pages, each
+    saved with its number appended (``x_analysis-1.png``, ...).  ``method``
+    is one of DECIMATION_METHODS.
+    """
+    if method not in DECIMATION_METHODS:
+        raise ValueError(f"unknown decimation method {method!r}")
+    converted = convert_ollama_columns(df)
+    columns = [CPU_LOAD_COL, MEMORY_USAGE_COL, NETWORK_IN_COL, NETWORK_OUT_COL, *converted]
+
+    seconds = df['Timestamp'].to_numpy(dtype=float)
+    order = np.flatnonzero(~np.isnan(seconds))
+    if np.any(np.diff(seconds[order]) < 0):
+        order = order[np.argsort(seconds[order], kind="stable")]
+    seconds = seconds[order]
+    values = {col: df[col].to_numpy(dtype=float)[order] for col in columns}
+
+    pages = page_ranges(seconds, page_seconds)
+    if not pages:
+        # Nothing to page through: draw the empty axes once
+        pages = [(0, 0)]
+    written = []
+    for number, (start, end) in enumerate(pages, 1):
+        path = page_path(output_file, number, len(pages))
+        title = None
+        if len(pages) > 1:
+            first, last = pd.to_datetime([seconds[start], seconds[end - 1]], unit='s')
+            title = f"{first:%Y-%m-%d %H:%M:%S} - {last:%Y-%m-%d %H:%M:%S} (page {number} of {len(pages)})"
+        series = {col: (seconds[start:end], values[col][start:end]) for col in columns}
+        _draw_page(series, path, method, title)
+        written.append(path)
+    return written
@@ -0,0 +1,401 @@
+"""Resource cost of load tests, from their results joined with a monitoring capture.
+
+The load tests run while the monitor captures, but their results only
+have times of their own.  This module reads them as timelines and joins
+them with the capture on time:
+
+* k6 output written with ``--out json=FILE`` (model-comparison-test.js,
+  heavy-load-test.js): every request with its end time and duration, and
+  the number of virtual users, from which a run is split into its warm-up,
+  peak and cool-down phases;
+* k6 summaries written with ``--summary-export`` (load-test-results.json):
+  one phase.  They hold no times, and the time of the file says nothing
+  once it has been copied or checked out, so the run has to be dated with
+  ``start`` or ``end`` (--results-start/--results-end); it lasts as long
+  as its iterations took at their rate.  k6 --out json is better;
+* autocannon-load-test.js results (load-test-results/load-test-<time>.json,
+  an object of endpoint name -> autocannon result): one phase per
+  endpoint, with its request count, errors and average latency;
+* model-comparison-results-<time>.csv of analyze-model-comparison.js:
+  the latency it reported for each model, attached to the k6 run that
+  ended last before the CSV was written (an as-of join).
+
+A sample of the capture stands for the time until the next one.  The cost
+of a phase is what was used during the part of every sample it overlaps;
+the cost of a model is what was used during its requests, shared between
+the models in proportion to their requests in flight.  Only requests to
+/ai/load-test/<provider> say which model served them: /ai/process and
+the other endpoints choose or have no model, so their cost only shows
+per phase.  An autocannon endpoint counts as its requests in flight for
+its whole run.  Overlaps come from sorted interval ends and running sums,
+so the join is O((samples + requests) log requests).  CPU-seconds add up
+the CPU % of the process over time, network bytes the traffic of the host.
+
+Times with a zone (k6, autocannon) are converted to epoch seconds, like
+the timestamps of ollama-monitoring captures.  resource-usage captures
+hold local times read as UTC (see ollama_schemas), so they only line up
+with test results on a host whose clock is set to UTC.
+"""
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from ollama_monitoring import (
+    NETWORK_IN_COL, NETWORK_OUT_COL, NODE_CPU_COL, NODE_MEMORY_MB_COL, OLLAMA_CPU_COL, OLLAMA_MEMORY_MB_COL,
+    convert_ollama_columns,
+)
+
+# Columns the CPU and memory cost is measured from, the first one with data
+CPU_COLUMNS = [OLLAMA_CPU_COL, NODE_CPU_COL, 'CPU_Usage_Percent']
+RSS_COLUMNS = [OLLAMA_MEMORY_MB_COL, NODE_MEMORY_MB_COL]
+
+# Phase for the capture time outside every test
+IDLE_PHASE = "(no test running)"
+
+# Time in the name of model-comparison-results-2025-03-11T21-11-17.318Z.csv
+COMPARISON_TIME = re.compile(r"(\d{4}-\d{2}-\d{2})T(\d{2})-(\d{2})-(\d{2}(?:\.\d+)?)Z")
+
+# Endpoint whose requests are served by one provider, the model of the cost table
+MODEL_URL = re.compile(r"/ai/load-test/([^/?#]+)")
+
+# Columns of the requests of a run: what a row stands for (one k6 request, or
+# every request to an autocannon endpoint), and its average latency
+REQUEST_COLUMNS = ["start", "end", "model", "count", "failed", "latency_ms"]
+
+# Model rows of a comparison CSV, "Ollama (llama2)"; the general metrics follow them
+COMPARISON_MODEL = re.compile(r"^\S+ \(.+\)$")
+
+
+def _epoch(text):
+    """Convert an ISO time to epoch seconds; a time without zone is UTC."""
+    timestamp = pd.Timestamp(text)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize("UTC")
+    return timestamp.timestamp()
+
+
+def _k6_phases(name, vus, start, end):
+    """Split a k6 run into phases by its number of virtual users: up to, at and after the peak."""
+    if not vus:
+        return [(name, start, end)]
+    times, counts = np.array(vus).T
+    peak = np.flatnonzero(counts == counts.max())
+    bounds = [start, times[peak[0]], times[peak[-1]], end]
+    phases = [(f"{name} warm-up", bounds[0], bounds[1]), (f"{name} peak", bounds[1], bounds[2]),
+              (f"{name} cool-down", bounds[2], bounds[3])]
+    return [phase for phase in phases if phase[2] > phase[1]]
+
+
+def _model(url):
+    """Return the provider of a /ai/load-test/<provider> URL, None for other URLs."""
+    match = MODEL_URL.search(url or "")
+    return match.group(1) if match else None
+
+
+def read_k6_output(path):
+    """Read a run from the JSON lines of k6 --out json."""
+    requests, vus, times = [], [], []
+    unattributed = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            point = json.loads(line)
+            if point.get("type") != "Point":
+                continue
+            if point["metric"] == "http_req_duration":
+                data = point["data"]
+                tags = data.get("tags") or {}
+                end = _epoch(data["time"])
+                start = end - data["value"] / 1000
+                times += [start, end]
+                model = _model(tags.get("url") or tags.get("name"))
+                if model is None:
+                    unattributed += 1
+                    continue
+                failed = not re.match(r"2\d\d$", str(tags.get("status", "")))
+                requests.append((start, end, model, 1, int(failed), data["value"]))
+            elif point["metric"] == "vus":
+                vus.append((_epoch(point["data"]["time"]), point["data"]["value"]))
+                times.append(vus[-1][0])
+    if not times:
+        raise ValueError(f"{path}: no requests or virtual users in k6 output")
+    name = os.path.basename(path)
+    start, end = min(times), max(times)
+    return {"name": name, "start": start, "end": end, "phases": _k6_phases(name, vus, start, end),
+            "requests": pd.DataFrame(requests, columns=REQUEST_COLUMNS), "unattributed": unattributed}
+
+
+def read_k6_summary(path, summary, start=None, end=None):
+    """Read a run from a k6 --summary-export file, dated by its ``start`` or ``end`` (epoch seconds)."""
+    if start is None and end is None:
+        raise ValueError(f"{path}: a k6 --summary-export holds no times; rerun k6 with --out json=FILE "
+                         "or give the time of the run with --results-start or --results-end")
+    if start is None or end is None:
+        iterations = summary["metrics"].get("iterations") or {}
+        if not iterations.get("rate"):
+            raise ValueError(f"{path}: no iteration rate to tell how long the run took; "
+                             "give both --results-start and --results-end")
+        seconds = iterations["count"] / iterations["rate"]
+        start = end - seconds if start is None else start
+        end = start + seconds if end is None else end
+    name = os.path.basename(path)
+    requests = summary["metrics"].get("http_reqs") or {}
+    return {"name": name, "start": start, "end": end, "phases": [(name, start, end)],
+            "requests": pd.DataFrame(columns=REQUEST_COLUMNS), "unattributed": int(requests.get("count", 0))}
+
+
+def read_autocannon(path, results):
+    """Read a run from autocannon results, one per endpoint or a single one."""
+    if "start" in results:
+        results = {os.path.basename(path): results}
+    phases, requests = [], []
+    unattributed = 0
+    for name, result in results.items():
+        if result is None:
+            continue
+        start, end = _epoch(result["start"]), _epoch(result["finish"])
+        phases.append((name, start, end))
+        count = (result.get("requests") or {}).get("total", 0)
+        model = _model(result.get("url"))
+        if model is None:
+            unattributed += count
+            continue
+        failed = sum(result.get(key) or 0 for key in ("errors", "timeouts", "non2xx"))
+        requests.append((start, end, model, count, failed, (result.get("latency") or {}).get("average")))
+    if not phases:
+        raise ValueError(f"{path}: no endpoint results")
+    phases.sort(key=lambda phase: phase[1])
+    return {"name": os.path.basename(path), "start": phases[0][1], "end": max(end for _, _, end in phases),
+            "phases": phases, "requests": pd.DataFrame(requests, columns=REQUEST_COLUMNS),
+            "unattributed": unattributed}
+
+
+def read_comparison(path):
+    """Read the model latencies of an analyze-model-comparison.js CSV, dated by its name."""
+    match = COMPARISON_TIME.search(os.path.basename(path))
+    if match is None:
+        raise ValueError(f"{path}: no time in the file name")
+    day, hours, minutes, seconds = match.groups()
+    table = pd.read_csv(path)
+    models = {}
+    for label, average, p95, success in table.itertuples(index=False):
+        if not COMPARISON_MODEL.match(str(label)):
+            continue
+        # "Ollama (llama2)" is the ollama provider of the k6 URLs
+        models[str(label).split()[0].lower()] = {
+            "label": label, "average_ms": float(average), "p95_ms": float(p95),
+            "success": float(str(success).rstrip("%")),
+        }
+    return {"time": _epoch(f"{day}T{hours}:{minutes}:{seconds}Z"), "models": models}
+
+
+def read_results(paths, summary_start=None, summary_end=None):
+    """Read test result files; return their runs and model comparisons, both sorted by time.
+
+    k6 summaries are dated by ``summary_start`` and/or ``summary_end``.
+    """
+    runs, comparisons = [], []
+    for path in paths:
+        if path.endswith(".csv"):
+            comparisons.append(read_comparison(path))
+            continue
+        with open(path, encoding="utf-8") as f:
+            first = f.readline()
+            try:
+                # k6 output has one JSON document per line
+                data = json.loads(first)
+            except json.JSONDecodeError:
+                data = None
+            if not isinstance(data, dict) or data.get("type") not in ("Metric", "Point"):
+                data = json.loads(first + f.read())
+        if data.get("type") in ("Metric", "Point"):
+            runs.append(read_k6_output(path))
+        elif "metrics" in data and "root_group" in data:
+            runs.append(read_k6_summary(path, data, summary_start, summary_end))
+        elif "start" in data or (data and all(isinstance(value, dict) and "start" in value
+                                              for value in data.values() if value is not None)):
+            runs.append(read_autocannon(path, data))
+        else:
+            raise ValueError(f"{path}: not a k6 or autocannon result")
+    runs.sort(key=lambda run: run["start"])
+    comparisons.sort(key=lambda comparison: comparison["time"])
+    return runs, comparisons
+
+
+def _covered(x, starts, ends):
+    """Return the time intervals [starts, ends) spent before each x, overlapping intervals counted twice."""
+    starts, ends = np.sort(starts), np.sort(ends)
+    start_sums = np.concatenate([[0.0], np.cumsum(starts)])
+    end_sums = np.concatenate([[0.0], np.cumsum(ends)])
+    begun = np.searchsorted(starts, x, side="right")
+    done = np.searchsorted(ends, x, side="right")
+    return (begun * x - start_sums[begun]) - (done * x - end_sums[done])
+
+
+def _overlaps(sample_starts, sample_ends, starts, ends):
+    """Return the seconds each sample spends in the intervals [starts, ends)."""
+    starts, ends = np.asarray(starts, dtype=float), np.asarray(ends, dtype=float)
+    return _covered(sample_ends, starts, ends) - _covered(sample_starts, starts, ends)
+
+
+def _first_column(df, columns):
+    for col in columns:
+        if col in df.columns and df[col].notna().any():
+            return col
+    return None
+
+
+def _cost(weights, seconds, cpu, rss, network):
+    """Cost of the samples weighted by the share of each sample spent on it."""
+    used = weights > 0
+    rss_used = used & ~np.isnan(rss)
+    return {
+        "cpu_seconds": float(np.nansum(cpu / 100 * seconds * weights)),
+        "rss_mean": float(np.average(rss[rss_used], weights=weights[rss_used])) if rss_used.any() else np.nan,
+        "rss_peak": float(rss[rss_used].max()) if rss_used.any() else np.nan,
+        "network_bytes": float(np.nansum(network * 1024 * seconds * weights)),
+    }
+
+
+def resource_costs(df, runs, comparisons=()):
+    """Join test runs with a capture loaded into memory and return the cost per phase and per model.
+
+    Returns ``{"cpu_column", "rss_column", "phases": [...], "models": [...],
+    "outside": requests outside the capture, "missed": runs outside it,
+    "unattributed": requests that name no model}``;
+    models are sorted by CPU-seconds per request, cheapest first.
+    """
+    convert_ollama_columns(df)
+    timestamps = df['Timestamp'].to_numpy(dtype=float)
+    order = np.flatnonzero(~np.isnan(timestamps))
+    order = order[np.argsort(timestamps[order], kind="stable")]
+    sample_starts = timestamps[order]
+    if not len(sample_starts):
+        raise ValueError("no timestamps in the capture")
+    # Every sample stands for the time until the next one, the last one for a usual interval
+    interval = float(np.median(np.diff(sample_starts))) if len(sample_starts) > 1 else 0.0
+    sample_ends = np.append(sample_starts[1:], sample_starts[-1] + interval)
+    seconds = sample_ends - sample_starts
+
+    cpu_column, rss_column = _first_column(df, CPU_COLUMNS), _first_column(df, RSS_COLUMNS)
+    nan = np.full(len(order), np.nan)
+    cpu = df[cpu_column].to_numpy(dtype=float)[order] if cpu_column else nan
+    rss = df[rss_column].to_numpy(dtype=float)[order] if rss_column else nan
+    network = (df[NETWORK_IN_COL].to_numpy(dtype=float) + df[NETWORK_OUT_COL].to_numpy(dtype=float))[order]
+
+    def share(overlap):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(seconds > 0, overlap / seconds, 0.0)
+
+    phases = [phase for run in runs for phase in run["phases"]]
+    phase_rows = []
+    tested = np.zeros(len(order))
+    for name, start, end in phases:
+        overlap = _overlaps(sample_starts, sample_ends, [start], [end])
+        tested += overlap
+        phase_rows.append({"phase": name, "start": start, "seconds": end - start,
+                           "covered": float(overlap.sum()), **_cost(share(overlap), seconds, cpu, rss, network)})
+    idle = np.clip(seconds - tested, 0, None)
+    phase_rows.append({"phase": IDLE_PHASE, "start": float(sample_starts[0]), "seconds": float(idle.sum()),
+                       "covered": float(idle.sum()), **_cost(share(idle), seconds, cpu, rss, network)})
+
+    missed = [run for run in runs if run["end"] <= sample_starts[0] or run["start"] >= sample_ends[-1]]
+
+    requests = [run["requests"] for run in runs if len(run["requests"])]
+    requests = pd.concat(requests, ignore_index=True) if requests else pd.DataFrame(columns=REQUEST_COLUMNS)
+    inside = (requests["end"] > sample_starts[0]) & (requests["start"] < sample_ends[-1])
+    busy = {
+        model: _overlaps(sample_starts, sample_ends, group["start"], group["end"])
+        for model, group in requests.groupby("model")
+    }
+    in_flight = sum(busy.values()) if busy else np.zeros(len(order))
+
+    # Every run with requests gets the first comparison written after it ended;
+    # the latest run's figures win
+    reported = {}
+    if comparisons:
+        ends = pd.DataFrame({"end": sorted(run["end"] for run in runs if len(run["requests"]))})
+        times = pd.DataFrame({"time": [comparison["time"] for comparison in comparisons],
+                              "index": range(len(comparisons))})
+        joined = pd.merge_asof(ends, times, left_on="end", right_on="time", direction="forward")
+        for index in joined["index"].dropna():
+            reported.update(comparisons[int(index)]["models"])
+
+    model_rows = []
+    for model, group in requests.groupby("model"):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weights = np.where(in_flight > 0, busy[model] / in_flight, 0.0)
+        group = group[inside[group.index]]
+        counts = group["count"].to_numpy(dtype=float)
+        latencies = group["latency_ms"].to_numpy(dtype=float)
+        timed = ~np.isnan(latencies) & (counts > 0)
+        report = reported.get(model, {})
+        model_rows.append({
+            "model": report.get("label", model), "requests": int(counts.sum()),
+            "failed": int(group["failed"].sum()),
+            "request_seconds": float(busy[model].sum()), **_cost(weights, seconds, cpu, rss, network),
+            "average_ms": float(np.average(latencies[timed], weights=counts[timed])) if timed.any() else np.nan,
+            "reported_ms": report.get("average_ms", np.nan),
+        })
+    for row in model_rows:
+        requests_in = row["requests"] or np.nan
+        row["cpu_seconds_per_request"] = row["cpu_seconds"] / requests_in
+        row["network_bytes_per_request"] = row["network_bytes"] / requests_in
+    model_rows.sort(key=lambda row: (np.isnan(row["cpu_seconds_per_request"]), row["cpu_seconds_per_request"]))
+    return {"cpu_column": cpu_column, "rss_column": rss_column, "phases": phase_rows, "models": model_rows,
+            "outside": int(requests["count"][~inside].sum()), "missed": missed,
+            "unattributed": sum(run["unattributed"] for run in runs)}
+
+
+def _cell(value, fmt):
+    return "-" if value is None or (isinstance(value, float) and np.isnan(value)) else fmt.format(value)
+
+
+def _print_table(header, rows):
+    widths = [max(len(cells[i]) for cells in [header, *rows]) for i in range(len(header))]
+    for cells in [header, ["-" * width for width in widths], *rows]:
+        print("  " + "  ".join(cell.ljust(width) if i == 0 else cell.rjust(width)
+                               for i, (cell, width) in enumerate(zip(cells, widths))).rstrip())
+
+
+def print_costs(costs):
+    """Print the cost per test phase and per model."""
+    cpu_label = costs["cpu_column"] or "no CPU column"
+    rss_label = costs["rss_column"] or "no memory column"
+    print(f"\n=== RESOURCE COST PER TEST PHASE (CPU from {cpu_label}, RSS from {rss_label}) ===\n")
+    _print_table(
+        ["Phase", "Start", "Length", "In capture", "CPU-s", "RSS avg/peak MB", "Network MB"],
+        [[row["phase"],
+          f"{pd.to_datetime(row['start'], unit='s'):%Y-%m-%d %H:%M:%S}",
+          f"{row['seconds']:.0f}s", f"{row['covered']:.0f}s",
+          _cell(row["cpu_seconds"], "{:.1f}"),
+          f"{_cell(row['rss_mean'], '{:.0f}')}/{_cell(row['rss_peak'], '{:.0f}')}",
+          _cell(row["network_bytes"] / 1024 / 1024, "{:.2f}")]
+         for row in costs["phases"]])
+    for run in costs["missed"]:
+        print(f"\n  Warning: {run['name']} ran {pd.to_datetime(run['start'], unit='s'):%Y-%m-%d %H:%M:%S} - "
+              f"{pd.to_datetime(run['end'], unit='s'):%Y-%m-%d %H:%M:%S} UTC, outside the capture; "
+              "none of its cost is counted")
+
+    print("\n=== RESOURCE COST PER MODEL (cheapest CPU-seconds per request first) ===\n")
+    if not costs["models"]:
+        print("  No requests to /ai/load-test/<provider> in the results.  The cost per model needs them,\n"
+              "  from k6 --out json=FILE or autocannon-load-test.js; a k6 --summary-export has no requests.")
+        if costs["unattributed"]:
+            print(f"  {costs['unattributed']} requests that name no model are only counted per phase.")
+        return
+    _print_table(
+        ["Model", "Requests", "Failed", "Busy s", "CPU-s", "CPU-s/request", "RSS avg/peak MB",
+         "Network KB/request", "Avg latency ms", "Reported ms"],
+        [[row["model"], str(row["requests"]), str(row["failed"]), f"{row['request_seconds']:.1f}",
+          _cell(row["cpu_seconds"], "{:.2f}"), _cell(row["cpu_seconds_per_request"], "{:.3f}"),
+          f"{_cell(row['rss_mean'], '{:.0f}')}/{_cell(row['rss_peak'], '{:.0f}')}",
+          _cell(row["network_bytes_per_request"] / 1024, "{:.1f}"), _cell(row["average_ms"], "{:.0f}"),
+          _cell(row["reported_ms"], "{:.0f}")]
+         for row in costs["models"]])
+    if costs["outside"]:
+        print(f"\n  {costs['outside']} requests fall outside the capture and are not counted")
+    if costs["unattributed"]:
+        print(f"\n  {costs['unattributed']} requests that name no model are only counted per phase")
@@ -0,0 +1,72 @@
+"""Decimation of long time series for drawing.
+
+A chart a thousand pixels wide cannot show more than a few thousand points,
+so series are reduced to about that many before they are plotted:
+
+* ``minmax_envelope`` splits a series into buckets of consecutive samples
+  and keeps the lowest and the highest sample of each, in time order.  Every
+  spike survives, and the drawn line covers the same pixels as the full
+  series does.  A bucket with no values keeps a NaN, so gaps stay gaps;
+* ``lttb`` (Largest-Triangle-Three-Buckets, Steinarsson 2013) keeps the one
+  sample per bucket that forms the largest triangle with its neighbours.
+  It follows the shape of a series with fewer points but can drop a spike
+  next to a larger one.  Missing values are dropped first.
+
+Both take time in O(n) and return ``(x, y)`` arrays indexing the input.
+"""
+import numpy as np
+
+
+def minmax_envelope(x, y, buckets):
+    """Keep the minimum and maximum of each of ``buckets`` runs of samples."""
+    y = np.asarray(y, dtype=float)
+    count = len(y)
+    if count <= 2 * buckets:
+        return x, y
+    size = -(-count // buckets)
+    rows = -(-count // size)
+
+    padded = np.concatenate([y, np.full(rows * size - count, np.nan)]).reshape(rows, size)
+    valid = ~np.isnan(padded)
+    # A bucket without values picks its first sample, which is NaN
+    low = np.where(valid, padded, np.inf).argmin(axis=1)
+    high = np.where(valid, padded, -np.inf).argmax(axis=1)
+    start = np.arange(rows) * size
+    index = np.column_stack([start + np.minimum(low, high), start + np.maximum(low, high)]).ravel()
+    return x[index], y[index]
+
+
+def lttb(x, y, threshold):
+    """Keep ``threshold`` samples with Largest-Triangle-Three-Buckets.
+
+    ``x`` must be numeric (for instance seconds) and increasing.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = ~np.isnan(y)
+    if not valid.all():
+        x, y = x[valid], y[valid]
+    count = len(y)
+    if threshold >= count or threshold < 3:
+        return x, y
+
+    # The first and last samples are always kept; the rest is split in threshold - 2 buckets
+    edges = np.linspace(1, count - 1, threshold - 1).astype(np.int64)
+    index = np.empty(threshold, dtype=np.int64)
+    index[0] = 0
+    index[-1] = count - 1
+    selected = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            following = slice(end, edges[bucket + 2])
+        else:
+            following = slice(count - 1, count)
+        mean_x = x[following].mean()
+        mean_y = y[following].mean()
+        # Twice the area of the triangle (selected, candidate, mean of the next bucket)
+        area = np.abs((x[selected] - mean_x) * (y[start:end] - y[selected])
+                      - (x[selected] - x[start:end]) * (mean_y - y[selected]))
+        selected = start + int(area.argmax())
+        index[bucket + 1] = selected
+    return x[index], y[index]
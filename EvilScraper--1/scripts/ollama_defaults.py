@@ -0,0 +1,28 @@
+"""Defaults of the Ollama monitoring analysis.
+
+The analysis modules take these as the defaults of their parameters, and
+the command-line tools show them in --help.  The module imports nothing,
+so the tools can build their parsers before numpy and pandas are loaded.
+Durations are in seconds.
+"""
+
+# Parts of a summary that can be computed on their own
+SECTIONS = ("summary", "bottlenecks", "episodes", "correlations", "lags")
+
+# Rows per chunk when streaming
+DEFAULT_CHUNKSIZE = 100_000
+
+# Windows of the rolling percentiles
+DEFAULT_WINDOWS = [60, 300, 900]
+
+# Longest episodes kept per threshold
+DEFAULT_TOP_EPISODES = 5
+
+# Longest lag of the lagged correlations, either way
+DEFAULT_MAX_LAG = 60
+
+# Time between two reports when following a capture
+DEFAULT_INTERVAL = 30
+
+# Longest time window drawn on one page of charts
+DEFAULT_PAGE_SECONDS = 6 * 3600
@@ -0,0 +1,219 @@
+"""Bottleneck episodes and rolling percentiles of monitoring captures.
+
+Counting the samples above a threshold cannot tell one half-hour
+saturation from hundreds of one-second blips.  ``EpisodeDetector`` finds
+the runs of consecutive samples above a threshold (run-length encoding with
+NumPy, no loop over rows) and keeps their count, total duration and the
+longest ones with their start, end and peak.  An episode ends at the first
+sample back under the threshold, or at the last sample of the capture.
+
+``RollingQuantiles`` tracks the highest p50/p95/p99 over windows of a given
+length, such as the worst five minutes of Ollama CPU.  Windows are counted
+in samples (the window length divided by the median sampling interval) and
+one is evaluated every ``1 / WINDOW_HOPS`` of a window, each by sorting it.
+Every sample is sorted ``WINDOW_HOPS`` times, so for a given window the
+work is linear in the length of the capture.
+
+Both are fed chunk by chunk, carrying an open episode or the last window of
+samples over to the next chunk, so they work on a capture in memory (one
+chunk) and on a streamed one alike, in constant memory.
+"""
+import heapq
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ollama_defaults import DEFAULT_TOP_EPISODES
+
+# Windows evaluated per window length
+WINDOW_HOPS = 10
+
+# Values sorted at once when computing window quantiles
+BATCH_VALUES = 1_000_000
+
+
+class EpisodeDetector:
+    """Episodes of a stream of samples above a threshold."""
+
+    def __init__(self, threshold, top=DEFAULT_TOP_EPISODES):
+        self.threshold = threshold
+        self.top = top
+        self.count = 0       # Finished episodes
+        self.samples = 0     # Samples above the threshold
+        self.seconds = 0.0   # Total duration of the finished episodes
+        self.last_timestamp = None
+        # Episode still running at the end of the last chunk: [start, peak, samples]
+        self.open = None
+        # Min-heap of (seconds, -start, end, peak, samples) holding the longest
+        # episodes; of two as long, the earlier one is kept
+        self._longest = []
+
+    def _finish(self, starts, ends, peaks, samples):
+        """Record finished episodes given as arrays."""
+        durations = ends - starts
+        self.count += len(durations)
+        self.seconds += float(durations.sum())
+        # Longest first, earliest first among equals
+        keep = np.lexsort((starts, -durations))[:self.top]
+        for index in keep.tolist():
+            entry = (float(durations[index]), -float(starts[index]), float(ends[index]),
+                     float(peaks[index]), int(samples[index]))
+            if len(self._longest) < self.top:
+                heapq.heappush(self._longest, entry)
+            elif entry > self._longest[0]:
+                heapq.heapreplace(self._longest, entry)
+
+    def update(self, timestamps, values):
+        """Add a chunk of samples; timestamps are in seconds and increasing."""
+        timestamps = np.asarray(timestamps, dtype=float)
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return
+        with np.errstate(invalid="ignore"):
+            above = values > self.threshold
+        self.samples += int(above.sum())
+
+        # Runs of samples above the threshold: [starts, ends)
+        change = np.diff(np.concatenate([[0], above.astype(np.int8), [0]]))
+        starts = np.flatnonzero(change == 1)
+        ends = np.flatnonzero(change == -1)
+        # Samples between runs are lower than the threshold, so they do not change the peaks
+        peaks = np.fmax.reduceat(values, starts) if len(starts) else np.empty(0)
+        samples = ends - starts
+
+        if self.open is not None:
+            start, peak, count = self.open
+            self.open = None
+            if len(starts) and starts[0] == 0:
+                # The open episode goes on into this chunk
+                peak, count = max(peak, peaks[0]), count + samples[0]
+                if ends[0] == len(values):
+                    self.open = [start, peak, count]
+                else:
+                    self._finish(np.array([start]), timestamps[ends[:1]],
+                                 np.array([peak]), np.array([count]))
+                starts, ends, peaks, samples = starts[1:], ends[1:], peaks[1:], samples[1:]
+            else:
+                self._finish(np.array([start]), timestamps[:1], np.array([peak]), np.array([count]))
+
+        if len(ends) and ends[-1] == len(values):
+            # The last run reaches the end of the chunk: it may go on in the next one
+            self.open = [float(timestamps[starts[-1]]), float(peaks[-1]), int(samples[-1])]
+            starts, ends, peaks, samples = starts[:-1], ends[:-1], peaks[:-1], samples[:-1]
+        self._finish(timestamps[starts], timestamps[ends], peaks, samples)
+        self.last_timestamp = float(timestamps[-1])
+
+    def running(self):
+        """Return ``(start, peak)`` of the episode still running at the last sample, None if there is none."""
+        if self.open is None:
+            return None
+        return self.open[0], self.open[1]
+
+    def longest(self):
+        """Return the longest episodes as dicts, longest first; a running one ends at the last sample."""
+        entries = list(self._longest)
+        if self.open is not None:
+            start, peak, samples = self.open
+            entries.append((self.last_timestamp - start, -start, self.last_timestamp, peak, samples))
+        entries.sort(reverse=True)
+        return [
+            {"start": -start, "end": end, "seconds": seconds, "peak": peak, "samples": samples}
+            for seconds, start, end, peak, samples in entries[:self.top]
+        ]
+
+    def as_dict(self):
+        running = self.open is not None
+        return {
+            "threshold": self.threshold,
+            "episodes": self.count + running,
+            "samples": self.samples,
+            "seconds": self.seconds + (self.last_timestamp - self.open[0] if running else 0.0),
+            "longest": self.longest(),
+        }
+
+
+def _lerp(low, high, weight):
+    """Interpolate like numpy.quantile's "linear" method, elementwise."""
+    return np.where(weight >= 0.5, high - (high - low) * (1 - weight), low + (high - low) * weight)
+
+
+def window_quantiles(windows, quantiles):
+    """Return the quantiles of each row of a 2-D array, ignoring NaNs: shape (quantiles, rows)."""
+    # Sorting the rows (NaNs go last) beats np.quantile's partitions, let alone
+    # np.nanquantile's loop over the rows
+    ordered = np.sort(windows, axis=1)
+    counts = (~np.isnan(ordered)).sum(axis=1)
+    last = np.maximum(counts - 1, 0)
+    result = np.empty((len(quantiles), len(windows)))
+    for row, q in enumerate(quantiles):
+        index = last * q
+        low = np.floor(index).astype(np.int64)
+        high = np.minimum(low + 1, last)
+        values = _lerp(np.take_along_axis(ordered, low[:, None], axis=1)[:, 0],
+                       np.take_along_axis(ordered, high[:, None], axis=1)[:, 0],
+                       index - low)
+        result[row] = np.where(counts > 0, values, np.nan)
+    return result
+
+
+class RollingQuantiles:
+    """Highest quantiles of a stream of samples over windows of ``window_seconds``."""
+
+    def __init__(self, window_seconds, quantiles, hops=WINDOW_HOPS):
+        self.window_seconds = window_seconds
+        self.quantiles = list(quantiles)
+        self.hops = hops
+        self.rows = None     # Window length in samples, once the interval is known
+        self.step = None     # Samples between the starts of evaluated windows
+        self.base = 0        # Index of the first tail sample in the whole stream
+        self.tail_timestamps = np.empty(0)
+        self.tail_values = np.empty(0)
+        self.peaks = np.full(len(self.quantiles), np.nan)
+        self.peak_times = np.full(len(self.quantiles), np.nan)
+
+    def update(self, timestamps, values):
+        """Add a chunk of samples; timestamps are in seconds and increasing."""
+        timestamps = np.concatenate([self.tail_timestamps, np.asarray(timestamps, dtype=float)])
+        values = np.concatenate([self.tail_values, np.asarray(values, dtype=float)])
+        if self.rows is None:
+            if len(timestamps) < 2:
+                self.tail_timestamps, self.tail_values = timestamps, values
+                return
+            interval = float(np.median(np.diff(timestamps)))
+            self.rows = max(1, round(self.window_seconds / interval)) if interval > 0 else 1
+            self.step = max(1, self.rows // self.hops)
+
+        # Evaluated windows start at multiples of step in the whole stream
+        first = -self.base % self.step
+        last = len(values) - self.rows
+        if last >= first:
+            windows = sliding_window_view(values, self.rows)[first:last + 1:self.step]
+            batch = max(1, BATCH_VALUES // self.rows)
+            for offset in range(0, len(windows), batch):
+                self._add_windows(window_quantiles(windows[offset:offset + batch], self.quantiles),
+                                  timestamps, first + offset * self.step)
+            keep = first + len(windows) * self.step
+        else:
+            keep = first
+        keep = min(keep, len(values))
+        self.base += keep
+        self.tail_timestamps, self.tail_values = timestamps[keep:], values[keep:]
+
+    def _add_windows(self, results, timestamps, first):
+        """Update the peaks from window quantiles; the windows start at first, first + step, ..."""
+        for row, values in enumerate(results):
+            if np.isnan(values).all():
+                continue
+            index = int(np.nanargmax(values))
+            if not values[index] <= self.peaks[row]:
+                self.peaks[row] = values[index]
+                # A window is dated by its last sample
+                self.peak_times[row] = timestamps[first + index * self.step + self.rows - 1]
+
+    def as_dict(self):
+        return {
+            "window_seconds": self.window_seconds,
+            "window_samples": self.rows,
+            "peaks": self.peaks.tolist(),
+            "peak_times": self.peak_times.tolist(),
+        }
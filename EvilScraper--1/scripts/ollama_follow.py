@@ -0,0 +1,174 @@
+"""Follow a capture while the monitor appends to it (--follow).
+
+``CaptureTail`` remembers how far a CSV file has been read and parses only
+the bytes appended since, keeping a line cut in the middle for the next
+read.  ``follow()`` wakes up once per interval, feeds the new rows to a
+StreamSummary and prints the refreshed summary, or only the samples above
+the bottleneck thresholds.  Reading and summarising once per interval
+instead of once per row keeps the CPU use negligible however long the
+capture runs.
+
+A file that shrinks or is replaced (a new monitor run writing to the same
+path) is read again from the start, with fresh statistics.
+"""
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from ollama_defaults import DEFAULT_INTERVAL, DEFAULT_TOP_EPISODES, DEFAULT_WINDOWS, SECTIONS
+from ollama_monitoring import (
+    EPISODE_THRESHOLDS, NETWORK_IN_COL, NETWORK_OUT_COL, TOTAL_NETWORK, StreamSummary, format_duration,
+    print_summary,
+)
+from ollama_schemas import detect_schema, read_rows
+
+# Most bytes parsed at once, so a long backlog is read in pieces
+READ_BYTES = 16 * 1024 * 1024
+
+
+class CaptureTail:
+    """Rows appended to a CSV capture since the last read."""
+
+    def __init__(self, csv_file):
+        self.csv_file = csv_file
+        self.identity = None   # (st_dev, st_ino) of the file being read
+        self._rewind()
+
+    def _rewind(self):
+        self.offset = 0        # Bytes read so far
+        self.header = None     # Header line, prepended to every read
+        self.schema = None
+        self.partial = b""     # Start of a line still being written
+
+    def restarted(self):
+        """Check whether the file was truncated or replaced; if so, read it again from the start."""
+        try:
+            stat = os.stat(self.csv_file)
+        except FileNotFoundError:
+            return False
+        identity = (stat.st_dev, stat.st_ino)
+        if self.identity is None:
+            self.identity = identity
+            return False
+        if identity == self.identity and stat.st_size >= self.offset:
+            return False
+        self.identity = identity
+        self._rewind()
+        return True
+
+    def read(self):
+        """Yield the complete rows appended since the last read as normalised DataFrames."""
+        try:
+            f = open(self.csv_file, 'rb')
+        except FileNotFoundError:
+            # The monitor has not created it yet
+            return
+        with f:
+            f.seek(self.offset)
+            while True:
+                data = f.read(READ_BYTES)
+                if not data:
+                    return
+                self.offset += len(data)
+                data = self.partial + data
+                end = data.rfind(b"\n") + 1
+                data, self.partial = data[:end], data[end:]
+                if self.header is None:
+                    if not data:
+                        continue
+                    newline = data.index(b"\n") + 1
+                    self.header, data = data[:newline], data[newline:]
+                    self.schema = detect_schema(pd.read_csv(io.BytesIO(self.header), nrows=0).columns)
+                if data:
+                    yield read_rows(io.BytesIO(self.header + data), self.schema)
+
+
+class ThresholdAlerts:
+    """Samples above the bottleneck thresholds since the last report."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.samples = 0
+        self.above = {col: [0, np.nan] for col, _ in EPISODE_THRESHOLDS}  # Count and peak
+
+    def update(self, rows):
+        self.samples += len(rows)
+        for col, threshold in EPISODE_THRESHOLDS:
+            if col == TOTAL_NETWORK:
+                values = (pd.to_numeric(rows[NETWORK_IN_COL], errors='coerce')
+                          + pd.to_numeric(rows[NETWORK_OUT_COL], errors='coerce'))
+            elif col in rows.columns:
+                values = pd.to_numeric(rows[col], errors='coerce')
+            else:
+                continue
+            high = values[values > threshold]
+            if len(high):
+                found = self.above[col]
+                found[0] += len(high)
+                found[1] = np.fmax(found[1], high.max())
+
+    def lines(self, detectors):
+        """Return the alert lines; ``detectors`` maps columns to their EpisodeDetector."""
+        lines = []
+        for col, threshold in EPISODE_THRESHOLDS:
+            count, peak = self.above[col]
+            if not count:
+                continue
+            line = f"ALERT {col} above {threshold}: {count} of {self.samples} new samples, peak {peak:.2f}"
+            detector = detectors.get(col)
+            running = detector.running() if detector is not None else None
+            if running is not None:
+                line += f", above it for {format_duration(detector.last_timestamp - running[0])}"
+            lines.append(line)
+        return lines
+
+
+def _last_time(rows):
+    timestamps = rows['Timestamp'].dropna()
+    if not len(timestamps):
+        return "no timestamp"
+    return f"{pd.to_datetime(timestamps.iloc[-1], unit='s'):%Y-%m-%d %H:%M:%S}"
+
+
+def follow(csv_file, interval=DEFAULT_INTERVAL, sections=SECTIONS, windows=DEFAULT_WINDOWS,
+           top_episodes=DEFAULT_TOP_EPISODES, alerts_only=False):
+    """Print the summary of a growing capture, or its alerts, every ``interval`` seconds until interrupted.
+
+    Returns the StreamSummary of the rows read once interrupted with Ctrl+C.
+    """
+    tail = CaptureTail(csv_file)
+    if alerts_only:
+        # Alerts say how long a threshold has been exceeded
+        sections = tuple(sections) + ("episodes",)
+    stream = StreamSummary(sections, windows, top_episodes)
+    alerts = ThresholdAlerts()
+    try:
+        while True:
+            if tail.restarted():
+                print(f"\n{csv_file} was truncated or replaced, starting over")
+                stream = StreamSummary(sections, windows, top_episodes)
+                alerts.reset()
+            last = None
+            for rows in tail.read():
+                stream.update(rows)
+                alerts.update(rows)
+                last = rows
+            if last is not None:
+                if alerts_only:
+                    detectors = stream.trackers.detectors if stream.trackers is not None else {}
+                    for line in alerts.lines(detectors):
+                        print(f"[{_last_time(last)}] {line}")
+                else:
+                    print(f"\n##### {_last_time(last)}: {stream.rows} samples, "
+                          f"{alerts.samples} new #####")
+                    print_summary(stream.summary())
+                alerts.reset()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    return stream
@@ -0,0 +1,169 @@
+"""Lagged cross-correlation of monitoring metrics.
+
+The correlation matrix only compares samples taken at the same time; what
+precedes an Ollama CPU or memory spike, such as a burst of incoming
+traffic a few seconds earlier, shows as a correlation between one metric
+and a later sample of another.  ``lagged_correlations`` computes the
+Pearson correlation of every pair of metrics at every lag up to a maximum
+and reports the lag where it is strongest.
+
+The sums behind every lag come from FFT cross-correlations, so a pair
+costs O(n log n) whatever the lag range, instead of O(n) per lag.  Missing
+samples are left out pairwise, as DataFrame.corr() does, so the
+correlation at lag 0 is the one of the correlation matrix.  Lags are
+counted in samples and converted to seconds with the median sampling
+interval: the monitors write one sample per interval, a gap in a capture
+shifts the lags across it.
+"""
+import numpy as np
+
+from ollama_defaults import DEFAULT_MAX_LAG
+
+# Fewest pairs of samples a correlation at one lag is computed from
+MIN_PAIRS = 10
+
+# Lags are tried up to this fraction of the capture: past it, too few samples
+# overlap for the correlation to mean much
+MAX_LAG_FRACTION = 0.25
+
+
+def _fast_length(n):
+    """Return the smallest 2**a * 3**b * 5**c >= n, a length numpy's FFT handles quickly."""
+    best = 1 << max(0, (n - 1).bit_length())
+    power5 = 1
+    while power5 < best:
+        power35 = power5
+        while power35 < best:
+            length = power35
+            while length < n:
+                length *= 2
+            best = min(best, length)
+            power35 *= 3
+        power5 *= 5
+    return best
+
+
+class _Series:
+    """One metric prepared for cross-correlation: centred, missing samples as 0."""
+
+    def __init__(self, values, length):
+        self.length = length
+        self.valid = ~np.isnan(values)
+        self.complete = bool(self.valid.all())
+        self.centred = np.where(self.valid, values - values[self.valid].mean(), 0.0)
+        self.spectrum = np.fft.rfft(self.centred, length)
+        self._mask_spectrum = None
+        self._square_spectrum = None
+        self._cumulative = None
+
+    def mask_spectrum(self):
+        if self._mask_spectrum is None:
+            self._mask_spectrum = np.fft.rfft(self.valid.astype(float), self.length)
+        return self._mask_spectrum
+
+    def square_spectrum(self):
+        if self._square_spectrum is None:
+            self._square_spectrum = np.fft.rfft(self.centred ** 2, self.length)
+        return self._square_spectrum
+
+    def window_sums(self, lags, leading):
+        """Sums of the values and squares that overlap the other series at each lag (complete series only).
+
+        At lag k sample t of the leading series meets sample t + k of the other.
+        """
+        n = len(self.centred)
+        if self._cumulative is None:
+            self._cumulative = (np.concatenate([[0.0], np.cumsum(self.centred)]),
+                                np.concatenate([[0.0], np.cumsum(self.centred ** 2)]))
+        sums, squares = self._cumulative
+        if leading:
+            start, end = np.maximum(-lags, 0), n - np.maximum(lags, 0)
+        else:
+            start, end = np.maximum(lags, 0), n + np.minimum(lags, 0)
+        return sums[end] - sums[start], squares[end] - squares[start]
+
+
+def _cross(a, b, length, max_lag):
+    """Return sum_t a[t] * b[t + k] for k = -max_lag..max_lag from the spectra of a and b."""
+    full = np.fft.irfft(np.conj(a) * b, length)
+    return np.concatenate([full[length - max_lag:], full[:max_lag + 1]])
+
+
+def _lag_correlations(x, y, lags):
+    """Return the Pearson correlation of x[t] and y[t + k] for every lag k."""
+    length, max_lag = x.length, int(lags[-1])
+    sxy = _cross(x.spectrum, y.spectrum, length, max_lag)
+    if x.complete and y.complete:
+        pairs = len(x.centred) - np.abs(lags)
+        sx, sxx = x.window_sums(lags, leading=True)
+        sy, syy = y.window_sums(lags, leading=False)
+    else:
+        pairs = np.rint(_cross(x.mask_spectrum(), y.mask_spectrum(), length, max_lag))
+        sx = _cross(x.spectrum, y.mask_spectrum(), length, max_lag)
+        sy = _cross(x.mask_spectrum(), y.spectrum, length, max_lag)
+        sxx = _cross(x.square_spectrum(), y.mask_spectrum(), length, max_lag)
+        syy = _cross(x.mask_spectrum(), y.square_spectrum(), length, max_lag)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        covariance = pairs * sxy - sx * sy
+        spread = (pairs * sxx - sx ** 2) * (pairs * syy - sy ** 2)
+        correlation = covariance / np.sqrt(spread)
+    # Rounding leaves a trace of variance in constant overlaps
+    scale = (pairs * np.abs(sxx) + sx ** 2) * (pairs * np.abs(syy) + sy ** 2)
+    correlation[(pairs < MIN_PAIRS) | ~(spread > scale * 1e-12)] = np.nan
+    return np.clip(correlation, -1.0, 1.0)
+
+
+def sampling_interval(timestamps):
+    """Return the median interval between timestamps in seconds, None if there is none."""
+    if len(timestamps) < 2:
+        return None
+    interval = float(np.median(np.diff(timestamps)))
+    return interval if interval > 0 else None
+
+
+def lagged_correlations(timestamps, series, max_lag=DEFAULT_MAX_LAG):
+    """Find the lag of strongest correlation of every pair of series.
+
+    ``timestamps`` are increasing seconds and ``series`` maps a name to an
+    array of values of the same length.  Lags stop at ``max_lag`` seconds
+    or a quarter of the capture, whichever is shorter.  Returns ``{"interval": seconds,
+    "max_lag": seconds, "pairs": [...]}``, the pairs strongest first::
+
+        {"leader": name, "follower": name, "lag": seconds >= 0,
+         "correlation": r at that lag, "zero_lag": r at lag 0}
+
+    The leader's samples correlate best with the follower's ``lag`` seconds
+    later.  Pairs without a correlation at any lag, one of them constant for
+    example, are left out.
+    """
+    interval = sampling_interval(timestamps)
+    names = [name for name, values in series.items() if np.count_nonzero(~np.isnan(values)) >= MIN_PAIRS]
+    if interval is None or len(names) < 2:
+        return {"interval": interval, "max_lag": max_lag, "pairs": []}
+    n = len(timestamps)
+    max_samples = max(0, min(int(n * MAX_LAG_FRACTION), round(max_lag / interval)))
+    lags = np.arange(-max_samples, max_samples + 1)
+    # Zero padding up to n + max lag keeps the circular correlation from wrapping around
+    length = _fast_length(n + max_samples)
+    prepared = {name: _Series(series[name], length) for name in names}
+    # Ties go to the shortest lag
+    by_distance = np.argsort(np.abs(lags), kind="stable")
+
+    pairs = []
+    for i, first in enumerate(names):
+        for second in names[i + 1:]:
+            correlation = _lag_correlations(prepared[first], prepared[second], lags)
+            if np.isnan(correlation).all():
+                continue
+            best = by_distance[np.nanargmax(np.abs(correlation[by_distance]))]
+            lag = int(lags[best])
+            leader, follower = (first, second) if lag >= 0 else (second, first)
+            pairs.append({
+                "leader": leader,
+                "follower": follower,
+                "lag": abs(lag) * interval,
+                "correlation": float(correlation[best]),
+                "zero_lag": float(correlation[max_samples]),
+            })
+    pairs.sort(key=lambda pair: -abs(pair["correlation"]))
+    return {"interval": interval, "max_lag": max_samples * interval, "pairs": pairs}
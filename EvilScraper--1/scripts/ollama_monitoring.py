@@ -0,0 +1,558 @@
+"""Analysis of Ollama monitoring captures.
+
+The CSV files are written by monitor-ollama-resources.sh.  The analysis is
+a set of functions over a capture loaded into a DataFrame::
+
+    df = load("ollama-monitoring.csv")
+    summarize(df)       # {"metrics": ..., "quantiles": ...}
+    bottlenecks(df)     # samples above the thresholds
+    episodes(df)        # runs above the thresholds, rolling percentiles
+    correlations(df)    # Pearson matrix of the numeric columns
+    lag_correlations(df)  # strongest lagged correlation of every pair
+    render_charts(df, "ollama-monitoring_analysis.png")  # -> [paths]
+
+``summarize_frame`` combines the sections wanted into one summary, and
+``summarize_stream`` computes the same summary from chunks of rows with
+constant memory (``StreamSummary``, built on the running aggregates of
+ollama_aggregates).
+``print_summary`` prints either one.  matplotlib is only imported by
+render_charts().
+
+Summary layout, every key but "rows" present only if its section was
+wanted::
+
+    {
+        "rows": number of samples,
+        "schema": name of the capture schema (see ollama_schemas),
+        "metrics": {column: {"count", "mean", "min", "max"} or None},
+        "quantiles": {column: {"values": [...], "exact": bool}},
+        "bottlenecks": {"high_memory": int, "high_memory_free_mb": float,
+                        "high_ollama_cpu": int, "high_network": int},
+        "episodes": {column: EpisodeDetector.as_dict()},
+        "rolling": {column: [RollingQuantiles.as_dict() per window]},
+        "correlations": DataFrame (Pearson, pairwise complete),
+        "lags": ollama_lags.lagged_correlations() result,
+    }
+
+A metric is None when its column is missing or empty; Ollama columns may
+hold strings such as "N/A" and are converted to numbers first.
+"""
+import numpy as np
+import pandas as pd
+
+from ollama_aggregates import CorrelationSums, RunningStats, StreamingQuantiles
+from ollama_defaults import (
+    DEFAULT_CHUNKSIZE, DEFAULT_MAX_LAG, DEFAULT_PAGE_SECONDS, DEFAULT_TOP_EPISODES, DEFAULT_WINDOWS, SECTIONS,
+)
+from ollama_episodes import EpisodeDetector, RollingQuantiles
+from ollama_lags import lagged_correlations
+
+OLLAMA_CPU_COL = 'Ollama CPU %'
+OLLAMA_MEMORY_COL = 'Ollama Memory %'
+OLLAMA_MEMORY_MB_COL = 'Ollama Memory MB'
+MEMORY_USAGE_COL = 'Memory Usage %'
+CPU_LOAD_COL = 'CPU Load'
+FREE_MEMORY_COL = 'Free Memory MB'
+NETWORK_IN_COL = 'Network In KB/s'
+NETWORK_OUT_COL = 'Network Out KB/s'
+TOTAL_NETWORK = 'Total Network KB/s'
+# Recorded by resource-usage captures only (see ollama_schemas)
+USED_MEMORY_MB_COL = 'Used Memory MB'
+NODE_CPU_COL = 'Node CPU %'
+NODE_MEMORY_MB_COL = 'Node Memory MB'
+RESOURCE_USAGE_METRICS = [USED_MEMORY_MB_COL, NODE_CPU_COL, NODE_MEMORY_MB_COL]
+
+# Columns that may contain strings and are converted to numbers
+OLLAMA_COLUMNS = [OLLAMA_CPU_COL, OLLAMA_MEMORY_COL, OLLAMA_MEMORY_MB_COL]
+
+# DataFrame.attrs key listing the Ollama columns that held any value before
+# they were converted to numbers ("N/A" counts), for frames loaded converted
+RAW_DATA_ATTR = "ollama_has_data"
+
+# Summarised metrics, in report order; TOTAL_NETWORK is In + Out
+METRICS = [
+    CPU_LOAD_COL, OLLAMA_CPU_COL, MEMORY_USAGE_COL, FREE_MEMORY_COL,
+    OLLAMA_MEMORY_COL, OLLAMA_MEMORY_MB_COL, USED_MEMORY_MB_COL, NODE_CPU_COL, NODE_MEMORY_MB_COL,
+    NETWORK_IN_COL, NETWORK_OUT_COL, TOTAL_NETWORK,
+]
+
+# Bottleneck thresholds
+HIGH_MEMORY_PERCENT = 95
+HIGH_OLLAMA_CPU_PERCENT = 80
+HIGH_NETWORK_KBS = 1000  # More than 1MB/s
+
+QUANTILES = [0.5, 0.95, 0.99]
+
+# DataFrame.attrs key naming the schema a capture was converted from, set
+# by ollama_schemas.normalize()
+SCHEMA_ATTR = "schema"
+
+# Columns whose episodes above the bottleneck thresholds are reported
+EPISODE_THRESHOLDS = [
+    (MEMORY_USAGE_COL, HIGH_MEMORY_PERCENT),
+    (OLLAMA_CPU_COL, HIGH_OLLAMA_CPU_PERCENT),
+    (TOTAL_NETWORK, HIGH_NETWORK_KBS),
+]
+
+# Columns whose rolling percentiles are reported
+ROLLING_COLUMNS = [CPU_LOAD_COL, OLLAMA_CPU_COL, MEMORY_USAGE_COL, TOTAL_NETWORK]
+
+# Weakest lagged correlation reported as a leading indicator of Ollama usage
+LEADING_CORRELATION = 0.3
+
+
+def load(csv_file, use_cache=True):
+    """Load a capture into a DataFrame, from its columnar cache when it is fresh."""
+    from ollama_cache import load_capture
+    return load_capture(csv_file, use_cache)[0]
+
+
+def convert_ollama_columns(df):
+    """Convert the Ollama columns with data to numbers in place and return their names.
+
+    Columns holding only missing values are left alone.  The names are
+    kept in ``df.attrs[RAW_DATA_ATTR]``, so converting again is cheap.
+    """
+    has_data = df.attrs.get(RAW_DATA_ATTR)
+    converted = []
+    for col in OLLAMA_COLUMNS:
+        if col in df.columns and (df[col].notna().any() if has_data is None else col in has_data):
+            # Convert any string values to numeric, coercing errors to NaN
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+            converted.append(col)
+    df.attrs[RAW_DATA_ATTR] = converted
+    return converted
+
+
+def _series_stats(series):
+    return {
+        "count": int(series.count()),
+        "mean": series.mean(),
+        "min": series.min(),
+        "max": series.max(),
+    }
+
+
+def summarize(df):
+    """Return the "metrics" and "quantiles" of a capture loaded into memory."""
+    series = {}
+    for col in [CPU_LOAD_COL, MEMORY_USAGE_COL, FREE_MEMORY_COL, NETWORK_IN_COL, NETWORK_OUT_COL]:
+        series[col] = df[col]
+    for col in RESOURCE_USAGE_METRICS:
+        if col in df.columns:
+            series[col] = df[col]
+    for col in convert_ollama_columns(df):
+        series[col] = df[col].dropna()
+    series[TOTAL_NETWORK] = df[NETWORK_IN_COL] + df[NETWORK_OUT_COL]
+
+    metrics = {col: _series_stats(series[col]) if col in series else None for col in METRICS}
+    quantiles = {
+        col: {"values": series[col].quantile(QUANTILES).tolist(), "exact": True}
+        for col in METRICS
+        if metrics[col] and metrics[col]["count"]
+    }
+    return {"metrics": metrics, "quantiles": quantiles}
+
+
+def bottlenecks(df):
+    """Count the samples of a capture loaded into memory above the bottleneck thresholds."""
+    high_mem_usage = df[df[MEMORY_USAGE_COL] > HIGH_MEMORY_PERCENT]
+    high_ollama_cpu = 0
+    if OLLAMA_CPU_COL in convert_ollama_columns(df):
+        high_ollama_cpu = int((df[OLLAMA_CPU_COL] > HIGH_OLLAMA_CPU_PERCENT).sum())
+    total_network = df[NETWORK_IN_COL] + df[NETWORK_OUT_COL]
+    return {
+        "high_memory": len(high_mem_usage),
+        "high_memory_free_mb": high_mem_usage[FREE_MEMORY_COL].mean(),
+        "high_ollama_cpu": high_ollama_cpu,
+        "high_network": int((total_network > HIGH_NETWORK_KBS).sum()),
+    }
+
+
+def correlations(df):
+    """Return the correlation matrix of the numeric columns of a capture loaded into memory."""
+    convert_ollama_columns(df)
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    return df[numeric_cols].corr()
+
+
+def lag_correlations(df, max_lag=DEFAULT_MAX_LAG):
+    """Return the lag of strongest correlation of every pair of numeric columns of a capture in memory."""
+    convert_ollama_columns(df)
+    timestamps = df['Timestamp'].to_numpy(dtype=float)
+    order = np.flatnonzero(~np.isnan(timestamps))
+    if np.any(np.diff(timestamps[order]) < 0):
+        order = order[np.argsort(timestamps[order], kind="stable")]
+    series = {
+        col: df[col].to_numpy(dtype=float)[order]
+        for col in df.select_dtypes(include=[np.number]).columns if col != 'Timestamp'
+    }
+    return lagged_correlations(timestamps[order], series, max_lag)
+
+
+class EpisodeTrackers:
+    """Episode detectors and rolling percentiles of a capture, fed chunk by chunk."""
+
+    def __init__(self, columns, windows=DEFAULT_WINDOWS, top=DEFAULT_TOP_EPISODES):
+        self.detectors = {
+            col: EpisodeDetector(threshold, top)
+            for col, threshold in EPISODE_THRESHOLDS if col in columns
+        }
+        self.rolling = {
+            col: [RollingQuantiles(window, QUANTILES) for window in windows]
+            for col in ROLLING_COLUMNS if col in columns
+        }
+
+    def update(self, timestamps, values):
+        """Add a chunk: timestamps in seconds and a dict of column -> values arrays."""
+        keep = ~np.isnan(timestamps)
+        if not keep.all():
+            timestamps = timestamps[keep]
+            values = {col: column[keep] for col, column in values.items()}
+        if np.any(np.diff(timestamps) < 0):
+            order = np.argsort(timestamps, kind="stable")
+            timestamps = timestamps[order]
+            values = {col: column[order] for col, column in values.items()}
+        for col, detector in self.detectors.items():
+            detector.update(timestamps, values[col])
+        for col, windows in self.rolling.items():
+            for rolling in windows:
+                rolling.update(timestamps, values[col])
+
+    def as_dict(self, columns=None):
+        """Return the "episodes" and "rolling" results, of the given columns only if any."""
+        def wanted(col):
+            return columns is None or col in columns
+        return {
+            "episodes": {
+                col: detector.as_dict() for col, detector in self.detectors.items() if wanted(col)
+            },
+            "rolling": {
+                col: [rolling.as_dict() for rolling in windows]
+                for col, windows in self.rolling.items() if wanted(col)
+            },
+        }
+
+
+def episodes(df, windows=DEFAULT_WINDOWS, top=DEFAULT_TOP_EPISODES):
+    """Return the bottleneck "episodes" and "rolling" percentiles of a capture loaded into memory."""
+    converted = convert_ollama_columns(df)
+    columns = [col for col in METRICS if col in df.columns and
+               (col not in OLLAMA_COLUMNS or col in converted)] + [TOTAL_NETWORK]
+    trackers = EpisodeTrackers(columns, windows, top)
+    values = {col: df[col].to_numpy(dtype=float) for col in columns if col != TOTAL_NETWORK}
+    values[TOTAL_NETWORK] = values[NETWORK_IN_COL] + values[NETWORK_OUT_COL]
+    trackers.update(df['Timestamp'].to_numpy(dtype=float), values)
+    return trackers.as_dict()
+
+
+def render_charts(df, output_file, page_hours=None, method="minmax"):
+    """Draw CPU, memory and network usage over time into PNG pages; return their paths.
+
+    Series are decimated with ``method`` ("minmax", "lttb" or "none") and
+    captures longer than ``page_hours`` (6 by default) are split into pages.
+    """
+    # matplotlib takes longer to import than a small capture takes to summarise
+    from ollama_charts import draw_charts
+    page_seconds = DEFAULT_PAGE_SECONDS if page_hours is None else page_hours * 3600
+    return draw_charts(df, output_file, page_seconds, method)
+
+
+def summarize_frame(df, sections=SECTIONS, windows=DEFAULT_WINDOWS, top_episodes=DEFAULT_TOP_EPISODES,
+                    max_lag=DEFAULT_MAX_LAG):
+    """Summarise the given sections of a capture loaded into memory.
+
+    Ollama columns with data are converted to numbers in place, as the
+    correlations and charts need them numeric.  ``windows`` and
+    ``top_episodes`` are passed to episodes(), ``max_lag`` (seconds) to
+    lag_correlations().
+    """
+    summary = {"rows": len(df), "schema": df.attrs.get(SCHEMA_ATTR, "ollama")}
+    if "summary" in sections:
+        summary.update(summarize(df))
+    if "bottlenecks" in sections:
+        summary["bottlenecks"] = bottlenecks(df)
+    if "episodes" in sections:
+        summary.update(episodes(df, windows, top_episodes))
+    if "correlations" in sections:
+        summary["correlations"] = correlations(df)
+    if "lags" in sections:
+        summary["lags"] = lag_correlations(df, max_lag)
+    return summary
+
+
+def _is_numeric(series):
+    """Check a column the way DataFrame.select_dtypes(include=[np.number]) does."""
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+class StreamSummary:
+    """Running aggregates of a capture fed chunk by chunk, summarised at any time.
+
+    Chunks are DataFrames normalised by ollama_schemas.  Memory does not
+    grow with the number of rows; summary() gives the numbers of
+    summarize_frame() on the rows fed so far.  Which columns count as
+    numeric is decided over all chunks, like pandas does for the whole
+    file.  The lags section needs the whole capture at once and is not
+    computed.
+    """
+
+    def __init__(self, sections=SECTIONS, windows=DEFAULT_WINDOWS, top_episodes=DEFAULT_TOP_EPISODES):
+        self.sections = sections
+        self.windows = windows
+        self.top_episodes = top_episodes
+        self.rows = 0
+        self.schema = None
+        self.columns = None
+        self.has_data = set()      # Columns with any non-missing value
+        self.non_numeric = set()   # Columns with a non-numeric chunk
+        self.stats = {col: RunningStats() for col in METRICS}
+        self.quantiles = {col: StreamingQuantiles() for col in METRICS}
+        self.high_memory_free = RunningStats()
+        self.high_ollama_cpu = self.high_network = 0
+        self.correlations = None
+        self.trackers = None
+
+    def update(self, chunk):
+        """Add a chunk of rows."""
+        self.schema = chunk.attrs.get(SCHEMA_ATTR, "ollama")
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            if "correlations" in self.sections:
+                self.correlations = CorrelationSums(self.columns)
+            if "episodes" in self.sections:
+                self.trackers = EpisodeTrackers(self.columns + [TOTAL_NETWORK], self.windows,
+                                                self.top_episodes)
+        self.rows += len(chunk)
+
+        values = {}
+        for col in self.columns:
+            series = chunk[col]
+            if col not in self.has_data and series.notna().any():
+                self.has_data.add(col)
+            if _is_numeric(series):
+                values[col] = series.to_numpy(dtype=float)
+            else:
+                self.non_numeric.add(col)
+                if col in METRICS:
+                    values[col] = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float)
+                else:
+                    # Left out of the correlations anyway
+                    values[col] = np.full(len(chunk), np.nan)
+        values[TOTAL_NETWORK] = values[NETWORK_IN_COL] + values[NETWORK_OUT_COL]
+
+        if "summary" in self.sections:
+            for col in METRICS:
+                if col in values:
+                    self.stats[col].update(values[col])
+                    self.quantiles[col].update(values[col])
+
+        with np.errstate(invalid="ignore"):
+            high_memory = values[MEMORY_USAGE_COL] > HIGH_MEMORY_PERCENT
+            self.high_memory_free.update(values[FREE_MEMORY_COL][high_memory])
+            if OLLAMA_CPU_COL in values:
+                self.high_ollama_cpu += int((values[OLLAMA_CPU_COL] > HIGH_OLLAMA_CPU_PERCENT).sum())
+            self.high_network += int((values[TOTAL_NETWORK] > HIGH_NETWORK_KBS).sum())
+        if self.trackers is not None:
+            self.trackers.update(values['Timestamp'], values)
+        if self.correlations is not None:
+            self.correlations.update(np.column_stack([values[col] for col in self.columns]))
+
+    def summary(self):
+        """Return the summary of the rows fed so far; raises ValueError before the first chunk."""
+        if self.columns is None:
+            raise ValueError("No columns to parse from file")
+        columns, has_data = self.columns, self.has_data
+
+        summary = {"rows": self.rows, "schema": self.schema}
+        if "summary" in self.sections:
+            metrics = {}
+            for col in METRICS:
+                if (col in OLLAMA_COLUMNS and col not in has_data or
+                        col in RESOURCE_USAGE_METRICS and col not in columns):
+                    metrics[col] = None
+                else:
+                    metrics[col] = self.stats[col].as_dict()
+            summary["metrics"] = metrics
+            summary["quantiles"] = {
+                col: {
+                    "values": [self.quantiles[col].quantile(q) for q in QUANTILES],
+                    "exact": self.quantiles[col].exact,
+                }
+                for col in METRICS
+                if metrics[col] and metrics[col]["count"]
+            }
+        if "bottlenecks" in self.sections:
+            summary["bottlenecks"] = {
+                "high_memory": self.high_memory_free.count,
+                "high_memory_free_mb": self.high_memory_free.as_dict()["mean"],
+                "high_ollama_cpu": self.high_ollama_cpu,
+                "high_network": self.high_network,
+            }
+        if self.trackers is not None:
+            # Like episodes(), leave out the Ollama columns without any data
+            summary.update(self.trackers.as_dict(
+                [col for col in columns + [TOTAL_NETWORK] if col not in OLLAMA_COLUMNS or col in has_data]))
+        if self.correlations is not None:
+            # Converted Ollama columns are numeric whatever their chunks held
+            numeric_cols = [col for col in columns if col not in self.non_numeric or col in OLLAMA_COLUMNS]
+            keep = [columns.index(col) for col in numeric_cols]
+            matrix = self.correlations.correlation()[np.ix_(keep, keep)]
+            summary["correlations"] = pd.DataFrame(matrix, index=numeric_cols, columns=numeric_cols)
+        return summary
+
+
+def summarize_stream(csv_file, chunksize=DEFAULT_CHUNKSIZE, sections=SECTIONS,
+                     windows=DEFAULT_WINDOWS, top_episodes=DEFAULT_TOP_EPISODES):
+    """Summarise a capture read in chunks of rows; memory does not grow with its length.
+
+    The numbers are those of summarize_frame() on the whole file; sections
+    that are not wanted cost nothing, the correlations most of all.  The
+    lags section is not computed, see StreamSummary.
+    """
+    # ollama_schemas imports this module
+    from ollama_schemas import read_chunks
+
+    stream = StreamSummary(sections, windows, top_episodes)
+    for chunk in read_chunks(csv_file, chunksize):
+        stream.update(chunk)
+    return stream.summary()
+
+
+def format_duration(seconds):
+    """Format seconds as "1h 2m 3s", leaving out zero parts."""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    parts = [f"{value}{unit}" for value, unit in ((hours, "h"), (minutes, "m"), (seconds, "s")) if value]
+    return " ".join(parts) or "0s"
+
+
+def _format_time(timestamp):
+    return f"{pd.to_datetime(timestamp, unit='s'):%Y-%m-%d %H:%M:%S}"
+
+
+def _metric_line(label, stats, fmt):
+    if stats is None:
+        return f"  {label}: No data available"
+    if not stats["count"]:
+        return f"  {label}: No valid data"
+    return f"  {label}: " + fmt.format(**stats)
+
+
+def print_summary(summary):
+    """Print the sections of a summary: resource usage, bottlenecks, episodes and correlations."""
+    rows = summary["rows"]
+
+    if "metrics" in summary:
+        metrics = summary["metrics"]
+        print("\n=== RESOURCE USAGE SUMMARY ===")
+        print("\nCPU Usage:")
+        print(_metric_line("System CPU Load", metrics[CPU_LOAD_COL], "avg={mean:.2f}, max={max:.2f}, min={min:.2f}"))
+        print(_metric_line("Ollama CPU Usage", metrics[OLLAMA_CPU_COL],
+                           "avg={mean:.2f}%, max={max:.2f}%, min={min:.2f}%"))
+        if metrics[NODE_CPU_COL] is not None:
+            print(_metric_line("Node.js CPU Usage", metrics[NODE_CPU_COL],
+                               "avg={mean:.2f}%, max={max:.2f}%, min={min:.2f}%"))
+
+        print("\nMemory Usage:")
+        print(_metric_line("System Memory", metrics[MEMORY_USAGE_COL],
+                           "avg={mean:.2f}%, max={max:.2f}%, min={min:.2f}%"))
+        if metrics[USED_MEMORY_MB_COL] is not None:
+            print(_metric_line("Used Memory", metrics[USED_MEMORY_MB_COL], "avg={mean:.2f}MB, max={max:.2f}MB"))
+        print(_metric_line("Free Memory", metrics[FREE_MEMORY_COL], "avg={mean:.2f}MB, min={min:.2f}MB"))
+        print(_metric_line("Ollama Memory Usage", metrics[OLLAMA_MEMORY_COL],
+                           "avg={mean:.2f}%, max={max:.2f}%, min={min:.2f}%"))
+        print(_metric_line("Ollama Memory Consumption", metrics[OLLAMA_MEMORY_MB_COL],
+                           "avg={mean:.2f}MB, max={max:.2f}MB"))
+        if metrics[NODE_MEMORY_MB_COL] is not None:
+            print(_metric_line("Node.js Memory Consumption", metrics[NODE_MEMORY_MB_COL],
+                               "avg={mean:.2f}MB, max={max:.2f}MB"))
+
+        print("\nNetwork Usage:")
+        for label, col in (("Network In", NETWORK_IN_COL), ("Network Out", NETWORK_OUT_COL),
+                           ("Total Network", TOTAL_NETWORK)):
+            print(_metric_line(label, metrics[col], "avg={mean:.2f}KB/s, max={max:.2f}KB/s"))
+
+        print("\nPercentiles (p50 / p95 / p99):")
+        for col, quantile in summary["quantiles"].items():
+            values = " / ".join(f"{value:.2f}" for value in quantile["values"])
+            print(f"  {col}: {values}" + ("" if quantile["exact"] else " (approximate)"))
+
+    if "bottlenecks" in summary:
+        # Check for potential bottlenecks
+        print("\n=== POTENTIAL BOTTLENECKS ===")
+        found = summary["bottlenecks"]
+        count = found["high_memory"]
+        if count > 0:
+            print(f"- HIGH MEMORY PRESSURE: System memory usage exceeded {HIGH_MEMORY_PERCENT}% for {count} of {rows} samples ({count/rows*100:.1f}%)")
+            print(f"  Average free memory during high usage: {found['high_memory_free_mb']:.2f}MB")
+        count = found["high_ollama_cpu"]
+        if count > 0:
+            print(f"- HIGH CPU USAGE: Ollama CPU usage exceeded {HIGH_OLLAMA_CPU_PERCENT}% for {count} of {rows} samples ({count/rows*100:.1f}%)")
+        count = found["high_network"]
+        if count > 0:
+            print(f"- HIGH NETWORK USAGE: Total network traffic exceeded 1MB/s for {count} of {rows} samples ({count/rows*100:.1f}%)")
+
+    if "episodes" in summary:
+        print("\n=== BOTTLENECK EPISODES ===")
+        for col, found in summary["episodes"].items():
+            count = found["episodes"]
+            if not count:
+                print(f"\n{col} above {found['threshold']}: no episodes")
+                continue
+            print(f"\n{col} above {found['threshold']}: {count} episodes, "
+                  f"{format_duration(found['seconds'])} in total ({found['samples']} samples)")
+            for episode in found["longest"]:
+                print(f"  {_format_time(episode['start'])} - {_format_time(episode['end'])}"
+                      f"  {format_duration(episode['seconds']):>10}  peak {episode['peak']:.2f}")
+
+    if "rolling" in summary:
+        labels = " / ".join(f"p{q * 100:g}" for q in QUANTILES)
+        print(f"\n=== ROLLING PERCENTILES (highest {labels} per window) ===")
+        for col, windows in summary["rolling"].items():
+            print(f"\n{col}:")
+            for window in windows:
+                label = format_duration(window["window_seconds"])
+                peaks = window["peaks"]
+                if all(pd.isna(peak) for peak in peaks):
+                    print(f"  {label}: capture shorter than the window")
+                    continue
+                values = " / ".join(f"{peak:.2f}" for peak in peaks)
+                # Hosts are sized for p95, so say when it peaked
+                index = QUANTILES.index(0.95)
+                print(f"  {label}: {values} (p95 highest in the window ending "
+                      f"{_format_time(window['peak_times'][index])})")
+
+    if "correlations" in summary:
+        # Correlation analysis
+        print("\n=== CORRELATION ANALYSIS ===")
+        correlation_matrix = summary["correlations"]
+        for col, title in ((OLLAMA_CPU_COL, "Ollama CPU usage"), (OLLAMA_MEMORY_COL, "Ollama Memory usage")):
+            if col in correlation_matrix.columns:
+                print(f"\nFactors most correlated with {title}:")
+                for other, val in correlation_matrix[col].sort_values(ascending=False).items():
+                    if other != col and not pd.isna(val):
+                        print(f"  {other}: {val:.3f}")
+
+    if "lags" in summary:
+        lags = summary["lags"]
+        print(f"\n=== LAGGED CORRELATIONS (lags up to {lags['max_lag']:g}s) ===")
+        pairs = lags["pairs"]
+        if not pairs:
+            print("\nNot enough samples")
+        for col, title in ((OLLAMA_CPU_COL, "Ollama CPU usage"), (OLLAMA_MEMORY_COL, "Ollama Memory usage")):
+            leading = [pair for pair in pairs if pair["follower"] == col and pair["lag"] > 0
+                       and abs(pair["correlation"]) >= LEADING_CORRELATION]
+            if leading:
+                print(f"\nLeading indicators of {title}:")
+                for pair in leading:
+                    print(f"  {pair['leader']}: {pair['correlation']:.3f} {pair['lag']:g}s earlier "
+                          f"({pair['zero_lag']:.3f} at the same time)")
+        if pairs:
+            print("\nStrongest lag of every pair (leader -> follower):")
+            width = max(len(pair["leader"]) + len(pair["follower"]) for pair in pairs) + 4
+            for pair in pairs:
+                names = f"{pair['leader']} -> {pair['follower']}"
+                print(f"  {names:<{width}} {pair['correlation']:6.3f} at {pair['lag']:g}s "
+                      f"({pair['zero_lag']:.3f} at 0s)")
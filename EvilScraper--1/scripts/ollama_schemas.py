@@ -0,0 +1,146 @@
+"""Schema adapters for monitoring captures.
+
+Two monitors write captures with different columns:
+
+* scripts/monitor-ollama-resources.sh writes ``ollama-monitoring-*.csv``
+  with epoch-second timestamps and the columns of ollama_monitoring;
+* monitor-resources.sh writes ``resource-usage-*.csv`` with datetime
+  strings as timestamps, load averages, memory used as "15G" and the CPU
+  and memory of the Node.js server, which become the Used Memory MB,
+  Node CPU % and Node Memory MB columns.  Older captures hold the whole
+  "PhysMem: 15G used (5354M wired, 1186M compressor), 691M unused." line
+  of top as memory used, commas included and unquoted.
+
+An adapter recognises its schema from the CSV header and converts a
+DataFrame of it, a whole capture or a chunk of one, to the Ollama schema:
+epoch-second timestamps, every column the analysis reads (NaN when the
+monitor does not record it), and the other columns kept under their own
+names.  Datetime strings carry no time zone and are read as UTC, so they
+print as the same wall-clock times.  An adapter also has the read_csv()
+options of its schema, read_capture() and read_chunks() pick them from the
+header of the file; read_rows() reads appended rows of a known schema.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from ollama_monitoring import (
+    CPU_LOAD_COL, FREE_MEMORY_COL, MEMORY_USAGE_COL, NETWORK_IN_COL, NETWORK_OUT_COL, NODE_CPU_COL,
+    NODE_MEMORY_MB_COL, SCHEMA_ATTR, USED_MEMORY_MB_COL,
+)
+
+# Columns the analysis reads from every capture
+CORE_COLUMNS = ['Timestamp', CPU_LOAD_COL, MEMORY_USAGE_COL, FREE_MEMORY_COL,
+                NETWORK_IN_COL, NETWORK_OUT_COL]
+
+# resource-usage columns with an Ollama schema name.  CPU Load is the
+# 1-minute load average in both monitors; the Node.js columns are missing
+# from older captures
+RESOURCE_USAGE_COLUMNS = {
+    'Load_Avg_1m': CPU_LOAD_COL,
+    'Memory_Usage_Percent': MEMORY_USAGE_COL,
+    'Memory_Usage_MB': USED_MEMORY_MB_COL,
+    'Node_Process_CPU_Percent': NODE_CPU_COL,
+    'Node_Process_Memory_MB': NODE_MEMORY_MB_COL,
+}
+
+# Megabytes per unit of a "15G" style size
+SIZE_UNITS = {"": 1.0, "K": 1 / 1024, "M": 1.0, "G": 1024.0, "T": 1024.0 * 1024}
+
+# "15G", "512 MiB", "2048" or top's "PhysMem: 15G used (...), 691M unused."
+SIZE_PATTERN = re.compile(r"^\s*(?:PhysMem:\s*)?([0-9]*\.?[0-9]+)\s*([KMGT]?)i?B?(?:\s+used\b.*)?\s*$",
+                          re.IGNORECASE)
+
+# Fields of resource-usage captures are split at commas not followed by a
+# space, which only occur inside top's PhysMem line
+RESOURCE_USAGE_READ_OPTIONS = {"sep": r",(?! )", "engine": "python"}
+
+
+def parse_megabytes(series):
+    """Convert sizes such as "15G", "512M" or plain megabytes to float megabytes; NaN if unreadable."""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    parts = series.astype(object).where(series.notna(), "").astype(str).str.extract(SIZE_PATTERN)
+    factors = parts[1].str.upper().map(SIZE_UNITS)
+    return pd.to_numeric(parts[0], errors='coerce') * factors
+
+
+def parse_datetime_seconds(series):
+    """Convert "YYYY-MM-DD HH:MM:SS[.fff]" strings to epoch seconds; NaN if unreadable."""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    times = pd.to_datetime(series, format="ISO8601", errors='coerce')
+    return (times - pd.Timestamp(0)) / pd.Timedelta(seconds=1)
+
+
+def _add_missing_columns(df):
+    for col in CORE_COLUMNS:
+        if col not in df.columns:
+            df[col] = np.nan
+    return df
+
+
+def _from_ollama(df):
+    return df
+
+
+def _from_resource_usage(df):
+    df = df.rename(columns=RESOURCE_USAGE_COLUMNS)
+    df['Timestamp'] = parse_datetime_seconds(df['Timestamp'])
+    df[USED_MEMORY_MB_COL] = parse_megabytes(df[USED_MEMORY_MB_COL])
+    for col in RESOURCE_USAGE_COLUMNS.values():
+        df[col] = pd.to_numeric(df[col], errors='coerce') if col in df.columns else np.nan
+    return _add_missing_columns(df)
+
+
+# (name, columns that identify it, converter, read_csv() options), tried in order
+ADAPTERS = [
+    ("ollama", {'Timestamp', CPU_LOAD_COL, MEMORY_USAGE_COL, FREE_MEMORY_COL,
+                NETWORK_IN_COL, NETWORK_OUT_COL}, _from_ollama, {}),
+    ("resource-usage", {'Timestamp', 'CPU_Usage_Percent', 'Memory_Usage_MB', 'Load_Avg_1m',
+                        'Memory_Usage_Percent'}, _from_resource_usage, RESOURCE_USAGE_READ_OPTIONS),
+]
+
+
+def _adapter(schema):
+    return next(adapter for adapter in ADAPTERS if adapter[0] == schema)
+
+
+def detect_schema(columns):
+    """Return the name of the schema of a CSV header; raises ValueError if none matches."""
+    for name, required, _, _ in ADAPTERS:
+        if required.issubset(columns):
+            return name
+    raise ValueError(f"unknown capture schema with columns {', '.join(map(str, columns))}")
+
+
+def read_capture(csv_file):
+    """Read a whole capture with the options of its schema and normalize() it."""
+    schema = detect_schema(pd.read_csv(csv_file, nrows=0).columns)
+    return normalize(pd.read_csv(csv_file, **_adapter(schema)[3]), schema)
+
+
+def read_rows(buffer, schema):
+    """Read CSV data of a known schema, header line first, and normalize() it."""
+    return normalize(pd.read_csv(buffer, **_adapter(schema)[3]), schema)
+
+
+def read_chunks(csv_file, chunksize):
+    """Yield a capture as normalized DataFrames of ``chunksize`` rows."""
+    schema = detect_schema(pd.read_csv(csv_file, nrows=0).columns)
+    for chunk in pd.read_csv(csv_file, chunksize=chunksize, **_adapter(schema)[3]):
+        yield normalize(chunk, schema)
+
+
+def normalize(df, schema=None):
+    """Convert a capture (or a chunk of one) to the Ollama schema.
+
+    ``schema`` is the name from detect_schema(), detected from df when None.
+    The result has the schema name in ``df.attrs[SCHEMA_ATTR]``.
+    """
+    if schema is None:
+        schema = detect_schema(df.columns)
+    df = _adapter(schema)[2](df)
+    df.attrs[SCHEMA_ATTR] = schema
+    return df
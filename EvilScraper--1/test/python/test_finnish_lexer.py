@@ -0,0 +1,66 @@
+"""Lexer findings do not depend on how the file is split into blocks."""
+import io
+import random
+import time
+
+import pytest
+
+import cascade_finnish_finder
+import finnish_finder
+import finnish_reader
+from finnish_lexer import create_lexer
+
+# Lines of each language; spans that continue over lines, escapes and
+# characters that start tokens put block edges everywhere a lexer keeps state
+SNIPPETS = {
+    "app.js": [
+        'const a = "hyvää päivää";\n', "// kommentti ä\n", "/* monirivinen\n ö kommentti */\n",
+        "let re = /[äö]+/g;\n", "const t = `tausta ${x} ääni\n toinen rivi`;\n", "x = y / 2; // jako ö\n",
+        "s = 'yksi \\' ä';\n", "const url = 'http://example.com';\n", "plain(code);\n",
+        "const ö = 1;\n", "throw new Error('Virhe palvelin vastannut');\n", "/* ä */ b = 1;\n",
+    ],
+    "tool.py": [
+        "# kommentti ä\n", 's = "ääni"\n', "t = '''monta\nriviä ö\n'''\n", 'u = f"{x} ö"\n',
+        "x = 1  # ö\n", "r = r'\\d ä'\n", 'd = """\nVirhe\n"""\n', "y = x / 2\n",
+    ],
+    "run.sh": [
+        "# ä kommentti\n", 'echo "hei ö"\n', "cat <<EOF\nääni\nEOF\n", "x=1\n", "echo 'yö'\n",
+        "cat <<-END\n\tvirhe\n\tEND\n", 'echo "${x} # ei kommentti ä"\n',
+    ],
+}
+
+MATCHERS = [finnish_finder.FINNISH_MATCHER, cascade_finnish_finder.FINNISH_MATCHER]
+
+BLOCK_SIZES = [1, 2, 3, 7, 64, 1000]
+
+# A search per slash rescanning the rest of the line took over ten seconds
+MAX_SECONDS = 3
+
+
+def source(name, seed, lines=300):
+    rng = random.Random(seed)
+    return "".join(rng.choice(SNIPPETS[name]) for _ in range(lines)).encode("utf-8")
+
+
+def findings(name, data, matcher):
+    return list(finnish_reader.iter_findings(io.BytesIO(data), matcher, lexer=create_lexer(name, matcher)))
+
+
+@pytest.mark.parametrize("matcher", MATCHERS)
+@pytest.mark.parametrize("name", sorted(SNIPPETS))
+def test_findings_do_not_depend_on_block_size(monkeypatch, name, matcher):
+    data = source(name, seed=len(name))
+    expected = findings(name, data, matcher)
+    assert expected
+    for size in BLOCK_SIZES:
+        monkeypatch.setattr(finnish_reader, "CHUNK_SIZE", size)
+        assert findings(name, data, matcher) == expected, f"block size {size}"
+
+
+@pytest.mark.parametrize("matcher", MATCHERS)
+def test_unterminated_regex_literals_are_searched_once(matcher):
+    data = b"x=/[" * 25_000 + "\n// ä\n".encode("utf-8")
+    started = time.perf_counter()
+    found = findings("app.js", data, matcher)
+    assert time.perf_counter() - started < MAX_SECONDS
+    assert [(line, column) for line, column, _ in found] == [(2, 1)]
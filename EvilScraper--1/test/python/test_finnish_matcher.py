@@ -0,0 +1,46 @@
+"""FinnishMatcher finds the same lines and columns as the original per-line regexes."""
+import random
+import re
+
+import pytest
+
+import cascade_finnish_finder
+import finnish_finder
+
+# Pieces random lines are made of: every kind of pattern, words in both cases,
+# words inside longer words and Finnish characters on their own
+PIECES = ["a", "b", "x_y", " ", "\t", "ä", "ö", "Ä", "Ö", "//", "#", '"', "'", "virhe", "Virhe",
+          "VIRHE", "virheellinen", "pyyntö", "palvelin", "palvelinx", "määrä", "yritä", "1"]
+
+# (matcher, the original patterns, their flags)
+MATCHERS = [
+    (finnish_finder.FINNISH_MATCHER, finnish_finder.FINNISH_PATTERNS, 0),
+    (cascade_finnish_finder.FINNISH_MATCHER, cascade_finnish_finder.FINNISH_PATTERNS, re.IGNORECASE),
+]
+
+
+def random_lines(seed, count=3000):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(PIECES) for _ in range(rng.randint(0, 12))) for _ in range(count)]
+
+
+def original_column(regex, line):
+    match = regex.search(line)
+    return match.start() if match else -1
+
+
+@pytest.mark.parametrize("matcher, patterns, flags", MATCHERS)
+def test_search_matches_original_patterns(matcher, patterns, flags):
+    regex = re.compile("|".join(patterns), flags)
+    for line in random_lines(1):
+        assert matcher.search(line) == original_column(regex, line), line
+
+
+@pytest.mark.parametrize("matcher, patterns, flags", MATCHERS)
+def test_scan_matches_original_patterns_line_by_line(matcher, patterns, flags):
+    regex = re.compile("|".join(patterns), flags)
+    lines = random_lines(2)
+    expected = [(index, original_column(regex, line)) for index, line in enumerate(lines)
+                if original_column(regex, line) >= 0]
+    found = [(index, column) for index, column, _ in matcher.scan("\n".join(lines) + "\n")]
+    assert found == expected
@@ -0,0 +1,79 @@
+"""The scan cache re-checks racy entries, drops stale versions and prunes deleted files."""
+import os
+import sqlite3
+import time
+
+import finnish_finder
+import finnish_scan_cache
+from finnish_scan_cache import RACY_WINDOW_NS, ScanCache
+from finnish_scanner import Scanner
+
+MATCHER = finnish_finder.FINNISH_MATCHER
+
+
+def scan(cache_path, files, prune=True):
+    scanner = Scanner(MATCHER, (".js",), cache_path=str(cache_path))
+    findings = [(os.path.basename(f.path), f.text) for f in scanner.scan_files(files, prune_cache=prune)]
+    return findings, scanner.stats["cached"]
+
+
+def write(path, text, mtime_ns):
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def stored_paths(cache_path):
+    connection = sqlite3.connect(cache_path)
+    try:
+        return {os.path.basename(path) for (path,) in connection.execute("SELECT path FROM files")}
+    finally:
+        connection.close()
+
+
+def test_racy_entry_is_rechecked_after_a_same_size_rewrite(tmp_path):
+    cache_path, source = tmp_path / "cache.sqlite", tmp_path / "app.js"
+    # Written just now, so the same mtime can still come with other content
+    mtime_ns = time.time_ns()
+    write(source, "// ä\n", mtime_ns)
+    assert scan(cache_path, [str(source)]) == ([("app.js", "// ä")], 0)
+
+    write(source, "// ö\n", mtime_ns)
+    assert scan(cache_path, [str(source)]) == ([("app.js", "// ö")], 0)
+
+
+def test_settled_entry_is_reused_without_reading(tmp_path):
+    cache_path, source = tmp_path / "cache.sqlite", tmp_path / "app.js"
+    write(source, "// ä\n", time.time_ns() - 2 * RACY_WINDOW_NS)
+    assert scan(cache_path, [str(source)]) == ([("app.js", "// ä")], 0)
+    assert scan(cache_path, [str(source)]) == ([("app.js", "// ä")], 1)
+
+
+def test_version_bump_discards_stored_findings(tmp_path, monkeypatch):
+    cache_path, source = str(tmp_path / "cache.sqlite"), tmp_path / "app.js"
+    write(source, "// ä\n", time.time_ns() - 2 * RACY_WINDOW_NS)
+    stat = os.stat(source)
+    with ScanCache(cache_path, MATCHER.fingerprint) as cache:
+        cache.store(str(source), stat, "digest", [(1, 1, "// ä")])
+    with ScanCache(cache_path, MATCHER.fingerprint) as cache:
+        assert cache.lookup(str(source), stat) == (True, "digest", [(1, 1, "// ä")])
+
+    monkeypatch.setattr(finnish_scan_cache, "CACHE_VERSION", finnish_scan_cache.CACHE_VERSION + 1)
+    with ScanCache(cache_path, MATCHER.fingerprint) as cache:
+        assert cache.lookup(str(source), stat) == (False, None, None)
+    assert stored_paths(cache_path) == set()
+
+
+def test_deleted_files_are_pruned(tmp_path):
+    cache_path = tmp_path / "cache.sqlite"
+    files = [tmp_path / "a.js", tmp_path / "b.js"]
+    for path in files:
+        write(path, "// ä\n", time.time_ns() - 2 * RACY_WINDOW_NS)
+    scan(cache_path, [str(path) for path in files])
+    assert stored_paths(cache_path) == {"a.js", "b.js"}
+
+    # A partial scan keeps the entries of the files it did not see
+    os.remove(files[1])
+    scan(cache_path, [str(files[0])], prune=False)
+    assert stored_paths(cache_path) == {"a.js", "b.js"}
+    scan(cache_path, [str(files[0])])
+    assert stored_paths(cache_path) == {"a.js"}
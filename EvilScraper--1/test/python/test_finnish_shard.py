@@ -0,0 +1,59 @@
+"""The merged report of a sharded scan is byte-identical to the report of a single run."""
+import os
+import random
+import subprocess
+import sys
+
+import finnish_finder
+from finnish_shard import select_shard
+
+FINDER = finnish_finder.__file__
+
+SHARDS = 4
+
+LINES = ["const x = 1;\n", "// kommentti ä\n", 'msg = "hyvää päivää"\n', "# ö kommentti\n",
+         "plain text\n", "let s = 'yö';\n", "Virhe: ääni\n"]
+
+
+def make_tree(root, files=60, seed=0):
+    rng = random.Random(seed)
+    for index in range(files):
+        directory = os.path.join(root, f"dir{index % 5}", f"sub{index % 3}")
+        os.makedirs(directory, exist_ok=True)
+        extension = rng.choice([".js", ".ts", ".py", ".sh", ".md"])
+        with open(os.path.join(directory, f"file{index}{extension}"), "w", encoding="utf-8") as f:
+            f.writelines(rng.choice(LINES) for _ in range(rng.randint(1, 40)))
+
+
+def run_finder(cwd, *args):
+    subprocess.run([sys.executable, FINDER, *args], cwd=cwd, check=True, capture_output=True)
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_four_shard_merge_matches_a_single_run(tmp_path):
+    make_tree(str(tmp_path / "tree"))
+    files = [os.path.join(directory, name) for directory, _, names in os.walk(tmp_path / "tree")
+             for name in names]
+    # Every shard has files, so the merge combines four non-empty partials
+    assert all(select_shard(files, str(tmp_path / "tree"), shard, SHARDS) for shard in range(1, SHARDS + 1))
+
+    serial, sharded = tmp_path / "serial", tmp_path / "sharded"
+    serial.mkdir()
+    sharded.mkdir()
+    run_finder(serial, "../tree", "--no-cache", "--jsonl", "findings.jsonl")
+    partials = []
+    for shard in range(1, SHARDS + 1):
+        partial = f"part{shard}.jsonl"
+        run_finder(sharded, "../tree", "--no-cache", "--shard", f"{shard}/{SHARDS}", "--partial", partial)
+        partials.append(partial)
+    # Given out of order on purpose
+    run_finder(sharded, "merge", *reversed(partials), "--jsonl", "findings.jsonl")
+
+    report = read(serial / "finnish_content_report.txt")
+    assert report.count(b"\n") > 20
+    assert read(sharded / "finnish_content_report.txt") == report
+    assert read(sharded / "findings.jsonl") == read(serial / "findings.jsonl")
@@ -0,0 +1,75 @@
+"""VLQ decoding, mapping lookups and the source map cache."""
+import json
+import os
+
+import pytest
+
+from finnish_sourcemap import SourceMap, SourceMapCache, decode_mappings, decode_vlq
+
+# Line 1: column 0 -> 0:0, column 4 -> 0:4, column 7 unmapped;
+# line 2: column 0 -> 1:4, column 2 -> 1:6 (all 0-based, source 0)
+MAPPINGS = "AAAA,IAAI,G;AACA,EAAE"
+
+
+@pytest.mark.parametrize("segment, values", [
+    ("AAAA", [0, 0, 0, 0]),
+    ("gBAAgB", [16, 0, 0, 16]),
+    ("D", [-1]),
+    ("", []),
+])
+def test_decode_vlq(segment, values):
+    assert decode_vlq(segment) == values
+
+
+def test_decode_mappings_accumulates_fields():
+    assert decode_mappings(MAPPINGS) == [
+        ([0, 4, 7], [(0, 0, 0), (0, 0, 4), None]),
+        ([0, 2], [(0, 1, 4), (0, 1, 6)]),
+    ]
+
+
+def test_decode_mappings_sorts_columns_of_a_line():
+    # Column 4, then back to column 2
+    assert decode_mappings("IAAI,FAAF") == [([2, 4], [(0, 0, 2), (0, 0, 4)])]
+
+
+@pytest.mark.parametrize("line, column, expected", [
+    (1, 1, (1, 1)),
+    # Between segments: the segment that starts before the column
+    (1, 3, (1, 1)),
+    (1, 5, (1, 5)),
+    (1, 7, (1, 5)),
+    # Columns start over on every line
+    (2, 1, (2, 5)),
+    (2, 2, (2, 5)),
+    (2, 3, (2, 7)),
+    (2, 100, (2, 7)),
+])
+def test_lookup(line, column, expected):
+    source_map = SourceMap({"sources": ["src/app.ts"], "mappings": MAPPINGS}, "dist")
+    assert source_map.lookup(line, column) == (os.path.join("dist", "src", "app.ts"), *expected)
+
+
+@pytest.mark.parametrize("line, column", [(1, 8), (1, 50), (3, 1), (0, 1)])
+def test_lookup_outside_the_mappings(line, column):
+    source_map = SourceMap({"sources": ["src/app.ts"], "mappings": MAPPINGS}, "dist")
+    assert source_map.lookup(line, column) is None
+
+
+def write_map(path, source, mtime_ns):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": 3, "sources": [source], "mappings": "AAAA"}, f)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_cache_reloads_a_map_named_by_source_mapping_url(tmp_path):
+    bundle = tmp_path / "main.js"
+    bundle.write_text("run();\n//# sourceMappingURL=main.abc123.js.map\n")
+    map_path = str(tmp_path / "main.abc123.js.map")
+    write_map(map_path, "old.ts", 1_000_000_000)
+
+    cache = SourceMapCache()
+    assert cache.get(str(bundle)).lookup(1, 1)[0] == str(tmp_path / "old.ts")
+    # Same size, only the map changes
+    write_map(map_path, "new.ts", 2_000_000_000)
+    assert cache.get(str(bundle)).lookup(1, 1)[0] == str(tmp_path / "new.ts")
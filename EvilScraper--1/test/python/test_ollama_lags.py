@@ -0,0 +1,74 @@
+"""FFT lagged correlations agree with shifting and correlating the series in pandas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from ollama_lags import MIN_PAIRS, _fast_length, _lag_correlations, _Series, lagged_correlations
+
+ROWS = 600
+MAX_LAG = 40
+
+# The FFT sums round differently from pandas' direct ones; a few ulps of r
+TOLERANCE = 1e-14
+
+
+def make_series(missing):
+    rng = np.random.default_rng(4)
+    load = np.cumsum(rng.normal(size=ROWS + 20))
+    series = {
+        "load": load[20:],
+        # Follows load 7 samples later, with noise
+        "cpu": 3 * load[13:-7] + rng.normal(scale=2, size=ROWS),
+        "memory": rng.normal(size=ROWS),
+        "constant": np.full(ROWS, 5.0),
+    }
+    if missing:
+        for values in series.values():
+            values[rng.random(ROWS) < 0.1] = np.nan
+    return series
+
+
+def brute_force(x, y, max_lag):
+    """Correlation of x[t] and y[t + k] for k = -max_lag..max_lag, by pandas."""
+    x, y = pd.Series(x), pd.Series(y)
+    return np.array([x.corr(y.shift(-k), min_periods=MIN_PAIRS) for k in range(-max_lag, max_lag + 1)])
+
+
+@pytest.mark.parametrize("missing", [False, True])
+def test_every_lag_matches_brute_force(missing):
+    series = make_series(missing)
+    lags = np.arange(-MAX_LAG, MAX_LAG + 1)
+    length = _fast_length(ROWS + MAX_LAG)
+    names = ["load", "cpu", "memory"]
+    for i, first in enumerate(names):
+        for second in names[i + 1:]:
+            found = _lag_correlations(_Series(series[first], length), _Series(series[second], length), lags)
+            expected = brute_force(series[first], series[second], MAX_LAG)
+            np.testing.assert_array_equal(np.isnan(found), np.isnan(expected))
+            np.testing.assert_allclose(found, expected, rtol=0, atol=TOLERANCE)
+
+
+@pytest.mark.parametrize("missing", [False, True])
+def test_strongest_lags_match_brute_force(missing):
+    series = make_series(missing)
+    timestamps = np.arange(ROWS, dtype=float) * 2
+    result = lagged_correlations(timestamps, series, max_lag=MAX_LAG * 2)
+    assert result["interval"] == 2
+    assert result["max_lag"] == MAX_LAG * 2
+
+    pairs = {(pair["leader"], pair["follower"]): pair for pair in result["pairs"]}
+    # A constant series correlates with nothing
+    assert not any("constant" in names for names in pairs)
+    assert len(pairs) == 3
+
+    lags = np.arange(-MAX_LAG, MAX_LAG + 1)
+    for (leader, follower), pair in pairs.items():
+        expected = brute_force(series[leader], series[follower], MAX_LAG)
+        # Strongest lag, ties to the shortest; the leader leads, so the lag is >= 0
+        best = min(np.flatnonzero(np.abs(expected) == np.nanmax(np.abs(expected))), key=lambda i: abs(lags[i]))
+        assert lags[best] >= 0
+        assert pair["lag"] == lags[best] * 2
+        assert pair["correlation"] == pytest.approx(expected[best], abs=TOLERANCE)
+        assert pair["zero_lag"] == pytest.approx(expected[MAX_LAG], abs=TOLERANCE)
+
+    assert pairs[("load", "cpu")]["lag"] == 14
@@ -0,0 +1,67 @@
+"""Streaming quantiles agree with numpy, and a streamed summary with the one in memory."""
+import numpy as np
+import pytest
+
+from ollama_aggregates import SKETCH_RELATIVE_ERROR, StreamingQuantiles
+from ollama_benchmark import generate_capture
+from ollama_monitoring import QUANTILES, StreamSummary, load, summarize_frame
+from ollama_schemas import read_chunks
+
+PROBES = [0, 0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 1]
+
+
+def feed(quantiles, values, chunk=997):
+    for start in range(0, len(values), chunk):
+        quantiles.update(values[start:start + chunk])
+    return quantiles
+
+
+def test_exact_while_distinct_values_are_few():
+    rng = np.random.default_rng(0)
+    values = rng.integers(-50, 500, 20_000).astype(float)
+    values[::17] = np.nan
+    quantiles = feed(StreamingQuantiles(), values)
+    assert quantiles.exact
+    finite = values[~np.isnan(values)]
+    for q in PROBES:
+        assert quantiles.quantile(q) == np.quantile(finite, q)
+
+
+@pytest.mark.parametrize("sign", [1, -1])
+def test_sketch_within_its_relative_error(sign):
+    rng = np.random.default_rng(1)
+    values = sign * rng.lognormal(3, 2, 50_000)
+    quantiles = feed(StreamingQuantiles(max_distinct=1000), values)
+    assert not quantiles.exact
+    for q in PROBES:
+        expected = np.quantile(values, q)
+        assert abs(quantiles.quantile(q) - expected) <= SKETCH_RELATIVE_ERROR * abs(expected) * (1 + 1e-12)
+
+
+def test_empty_stream_has_no_quantiles():
+    quantiles = feed(StreamingQuantiles(), np.array([np.nan, np.inf]))
+    assert np.isnan(quantiles.quantile(0.5))
+
+
+def test_stream_summary_matches_summary_in_memory(tmp_path):
+    csv_file = str(tmp_path / "capture.csv")
+    generate_capture(csv_file, 5000, seed=3)
+    in_memory = summarize_frame(load(csv_file, use_cache=False), ("summary",), windows=())
+
+    stream = StreamSummary(("summary",), windows=())
+    for chunk in read_chunks(csv_file, 777):
+        stream.update(chunk)
+    streamed = stream.summary()
+
+    assert streamed["quantiles"].keys() == in_memory["quantiles"].keys()
+    for col, quantile in in_memory["quantiles"].items():
+        assert streamed["quantiles"][col]["exact"]
+        np.testing.assert_allclose(streamed["quantiles"][col]["values"], quantile["values"], rtol=1e-12)
+        assert len(quantile["values"]) == len(QUANTILES)
+    for col, stats in in_memory["metrics"].items():
+        if stats is None:
+            assert streamed["metrics"][col] is None
+        else:
+            for key in ("count", "min", "max"):
+                assert streamed["metrics"][col][key] == pytest.approx(stats[key], nan_ok=True)
+            assert streamed["metrics"][col]["mean"] == pytest.approx(stats["mean"], rel=1e-12, nan_ok=True)